@@ -0,0 +1,178 @@
+# backend-python/analysis/accuracy.py
+"""
+Accuracy per CPU second of the spatial schemes.
+
+Wave study: the TestC1 system (c = 1, delta = 1/5) on [0, 1] is advanced
+to t_end from two pulses that stay clear of the boundaries, so the exact
+solution is the periodic one (solvers/highorder.py, periodic_exact).
+Schemes:
+    maccormack    second order, simulations/TestC1.py
+    compact_rk4   fourth-order compact differences + RK4, transmissive ends
+    characteristics  shifted Riemann invariants (solvers/characteristics.py),
+                  exact shifts at the default CFL = 1
+Profiles: "bump" (the C1 cosine bump of TestC1) and "gaussian" (smooth).
+
+Artery study (--artery): artery_sim_full with order 2 and 4 against a fine
+order-4 run; the error is the max over the monitor pressures in mmHg.
+
+Reported per run: grid points, CFL, relative max error of A, and CPU time
+(time.process_time). cheapest(report, tol) picks the run with the lowest
+CPU time that meets a tolerance.
+
+Usage:
+    python -m analysis.accuracy
+    python -m analysis.accuracy --profile gaussian --tol 1e-4 --json accuracy.json
+    python -m analysis.accuracy --artery
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+
+import numpy as np
+
+from simulations import TestC1
+from solvers.characteristics import CharacteristicSolver
+from solvers.highorder import CompactRK4, at_boundary, periodic_exact
+from solvers.workspace import Workspace
+
+GRIDS = (100, 200, 400, 800, 1600, 3200)
+CFL = {"maccormack": 0.9, "compact_rk4": 1.5, "characteristics": 1.0}
+N_EXACT = 6400          # reference grid; every study grid must divide it
+DELTA = 1.0 / 5.0
+
+
+def _profile(z, kind, eps=0.02):
+    """(Q, A) at t = 0: TestC1's pulses, or gaussians of the same width."""
+    if kind == "bump":
+        shape = lambda center: TestC1.bump(z, center, eps)
+    elif kind == "gaussian":
+        shape = lambda center: np.exp(-((z - center) / (0.5 * eps))**2)
+    else:
+        raise ValueError(f"Unknown profile '{kind}'")
+    return 1e-6 * shape(0.4), TestC1.A_ref * shape(0.7)
+
+
+def _exact(profile, t_end):
+    z = np.arange(N_EXACT) / N_EXACT
+    Q0, A0 = _profile(z, profile)
+    A, _ = periodic_exact(A0, Q0, 1.0, TestC1.c, DELTA, t_end)
+    return np.append(A, A[0])       # z = 1 is z = 0 of the periodic grid
+
+
+def _run_maccormack(Q, A, dz, dt, Nt):
+    ws = Workspace((len(A),), ("Q", "A"), TestC1.MACCORMACK_SCRATCH).load(Q=Q, A=A)
+    for _ in range(Nt):
+        TestC1.maccormack_step_into(ws, dt, dz=dz)
+    return ws.cur["A"]
+
+
+def _run_compact(Q, A, dz, dt, Nt):
+    c = TestC1.c
+    solver = CompactRK4(len(A), dz, c, DELTA)
+    solver.state[0], solver.state[1] = A, Q
+
+    def open_ends(w, t):
+        at_boundary(w, 0, c)
+        at_boundary(w, -1, c)
+
+    for n in range(Nt):
+        solver.step(n * dt, dt, open_ends)
+    return solver.state[0]
+
+
+def _run_characteristics(Q, A, dz, dt, Nt):
+    solver = CharacteristicSolver(len(A), dz, TestC1.c, DELTA).load(A, Q)
+    for _ in range(Nt):
+        solver.step(dt)
+    return solver.fields()[0]
+
+
+RUNNERS = {"maccormack": _run_maccormack, "compact_rk4": _run_compact,
+           "characteristics": _run_characteristics}
+
+
+def wave_study(profile="bump", grids=GRIDS, t_end=0.2, cfl=None):
+    """Error and CPU time of every scheme on every grid; a list of run dicts."""
+    cfl = {**CFL, **(cfl or {})}
+    A_exact = _exact(profile, t_end)
+    scale = np.max(np.abs(A_exact))
+    runs = []
+    for scheme, runner in RUNNERS.items():
+        for N in grids:
+            if N_EXACT % N:
+                raise ValueError(f"grid {N} does not divide the reference grid {N_EXACT}")
+            dz = 1.0 / N
+            Nt = int(np.ceil(t_end / (cfl[scheme] * dz / TestC1.c)))
+            dt = t_end / Nt
+            Q0, A0 = _profile(np.linspace(0.0, 1.0, N + 1), profile)
+
+            start = time.process_time()
+            A = runner(Q0, A0, dz, dt, Nt)
+            cpu = time.process_time() - start
+
+            error = np.max(np.abs(A - A_exact[::N_EXACT // N])) / scale
+            runs.append({"scheme": scheme, "N": N, "cfl": TestC1.c * dt / dz,
+                         "error": float(error), "cpu_s": cpu})
+    return runs
+
+
+def artery_study(dz_values=(4e-3, 2e-3, 1e-3), ref_dz=2.5e-4):
+    """artery_sim_full, order 2 (CFL 0.9) and 4 (CFL 1.5), against a fine order-4 run."""
+    from simulations import artery_sim_full as artery
+
+    c0 = float(artery.artery_parameters()["c0"])
+
+    def run(order, dz, cfl, save_every=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.process_time()
+            result = artery.run_artery_simulation(order=order, dz=dz, dt=cfl * dz / c0,
+                                                  save_every=save_every)
+            return result, time.process_time() - start
+
+    ref, _ = run(4, ref_dz, 1.0, save_every=10)
+    t_ref, P_ref = np.array(ref["t"]), np.array(ref["pressure_mmHg"])
+    runs = []
+    for order, cfl in ((2, 0.9), (4, 1.5)):
+        for dz in dz_values:
+            result, cpu = run(order, dz, cfl)
+            t, P = np.array(result["t"]), np.array(result["pressure_mmHg"])
+            error = max(np.max(np.abs(np.interp(t_ref, t, P[k]) - P_ref[k])) for k in range(len(P)))
+            runs.append({"scheme": artery.SPATIAL_ORDERS[order], "N": int(round(artery.DEFAULT_PARAMS["L"] / dz)),
+                         "cfl": cfl, "error": float(error), "cpu_s": cpu})
+    return runs
+
+
+def cheapest(runs, tol):
+    """The run with the lowest CPU time whose error is at most tol, or None."""
+    ok = [r for r in runs if r["error"] <= tol]
+    return min(ok, key=lambda r: r["cpu_s"]) if ok else None
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Accuracy per CPU second of the spatial schemes")
+    parser.add_argument("--profile", default="bump", choices=("bump", "gaussian"))
+    parser.add_argument("--t-end", type=float, default=0.2)
+    parser.add_argument("--artery", action="store_true", help="study artery_sim_full instead (mmHg errors)")
+    parser.add_argument("--tol", type=float, default=None, help="report the cheapest run meeting this error")
+    parser.add_argument("--json", default=None, help="write the runs to this file")
+    args = parser.parse_args()
+
+    runs = artery_study() if args.artery else wave_study(args.profile, t_end=args.t_end)
+    print(f"{'scheme':16s} {'N':>6s} {'CFL':>5s} {'error':>10s} {'cpu [s]':>9s}")
+    for r in runs:
+        print(f"{r['scheme']:16s} {r['N']:6d} {r['cfl']:5.2f} {r['error']:10.2e} {r['cpu_s']:9.3f}")
+
+    if args.tol is not None:
+        best = cheapest(runs, args.tol)
+        print(f"cheapest for error <= {args.tol:g}: "
+              + (f"{best['scheme']} N={best['N']} ({best['cpu_s']:.3f} s)" if best else "none"))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(runs, f, indent=2)
+
+
+if __name__ == "__main__":
+    _main()
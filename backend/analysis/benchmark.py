@@ -0,0 +1,310 @@
+# backend-python/analysis/benchmark.py
+"""
+Benchmark suite with tracked baselines.
+
+Cases:
+    sim:<name>                      every SIMULATION_REGISTRY entry with its
+                                    default parameters (artery_sim_full also
+                                    with the python kernel backend)
+    kernel:<scheme>:<N>:<steps>     one solver kernel stepped `steps` times
+                                    on N grid points, setup excluded
+
+Each case runs in a fresh worker process so its peak RSS is its own.
+Measured per case:
+    wall_s          best of `repeats` runs
+    steps_per_s     time steps per second of the best run
+    peak_rss_mb     peak resident set size of the worker (/proc VmHWM, else
+                    ru_maxrss; None on Windows)
+    traced_peak_mb  peak of the memory traced by tracemalloc during one more
+                    run (Python objects and NumPy buffers)
+    retained_kb     traced memory still held after that run
+CPython has no cheap per-allocation hook, so peak traced memory and
+retained memory stand in for allocation counts: a kernel that starts
+allocating temporaries per step shows up in traced_peak_mb.
+
+Results are JSON; benchmarks/baseline.json is the tracked baseline.
+compare flags every case whose wall time grew by more than the threshold
+(or whose traced peak grew by more than the memory threshold and 1 MB) and
+exits with status 1, so it can guard CI or a local change.
+
+Usage:
+    python -m analysis.benchmark run --out /tmp/bench.json
+    python -m analysis.benchmark run --quick --out benchmarks/baseline.json
+    python -m analysis.benchmark compare benchmarks/baseline.json /tmp/bench.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "benchmarks", "baseline.json")
+GRIDS = (200, 2000, 20000)
+STEPS = (20, 200)
+QUICK_GRIDS = (200, 2000)
+QUICK_STEPS = (50,)
+SIM_OPTIONS = {"artery_sim_full": ({}, {"backend": "python"})}
+
+
+# ---------- kernels: factory(N) -> step() ----------
+def _pulses(N):
+    z = np.linspace(0.0, 1.0, N)
+    return np.exp(-((z - 0.45) / 0.04)**2), np.exp(-((z - 0.55) / 0.04)**2)
+
+
+def _maccormack(N):
+    from simulations import TestC1
+    from solvers.workspace import Workspace
+    Q, A = _pulses(N)
+    dz = 1.0 / (N - 1)
+    ws = Workspace((N,), ("Q", "A"), TestC1.MACCORMACK_SCRATCH).load(Q=Q, A=A)
+    return lambda: TestC1.maccormack_step_into(ws, 0.8 * dz, dz=dz)
+
+
+def _maccormack_cells(N):
+    from simulations import healthy_domain_sim as cells
+    from solvers.workspace import Workspace
+    Q, A = _pulses(N)
+    dx = 1.0 / N
+    ws = Workspace((N + 2,), ("a", "q"), cells.MACCORMACK_SCRATCH)
+    a, q = ws.state()
+    a[1:-1], q[1:-1] = A, Q
+
+    def step():
+        cells.NEUMANN.apply(*ws.state())
+        cells.mac_cormack_into(ws, 0.8 * dx, dx=dx)
+    return step
+
+
+def _lax_wendroff(N):
+    from simulations import Test_model_laxw_half_step as laxw
+    from solvers.workspace import Workspace
+    Q, A = _pulses(N)
+    dz = 1.0 / (N - 1)
+    ws = Workspace((N,), ("A", "Q"), laxw.LAXW_SCRATCH).load(A=A, Q=Q)
+    return lambda: laxw.lax_wendroff_step_into(ws, dt=0.8 * dz, dz=dz)
+
+
+def _compact_rk4(N):
+    from solvers.highorder import CompactRK4
+    Q, A = _pulses(N)
+    dz = 1.0 / (N - 1)
+    solver = CompactRK4(N, dz, 1.0, 0.2)
+    solver.state[0], solver.state[1] = A, Q
+    return lambda: solver.step(0.0, 1.2 * dz)
+
+
+def _characteristics(N):
+    from solvers.characteristics import CharacteristicSolver
+    Q, A = _pulses(N)
+    dz = 1.0 / (N - 1)
+    solver = CharacteristicSolver(N, dz, 1.0, 0.2).load(A, Q)
+    return lambda: solver.step(0.8 * dz)
+
+
+KERNELS = {
+    "maccormack": _maccormack,
+    "maccormack_cells": _maccormack_cells,
+    "lax_wendroff": _lax_wendroff,
+    "compact_rk4": _compact_rk4,
+    "characteristics": _characteristics,
+}
+
+
+# ---------- measurement (runs in the worker) ----------
+def _peak_rss_mb():
+    # VmHWM belongs to this address space; on Linux ru_maxrss also carries
+    # the parent's peak over the fork + exec that starts a worker
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10      # bytes on macOS, KiB elsewhere
+
+
+def _case_callable(case):
+    """(run(), steps per run) for a case dict."""
+    if case["kind"] == "sim":
+        module = importlib.import_module(f"simulations.{case['name']}")
+        options = case.get("options", {})
+        manifest = getattr(module, "MANIFEST", None)
+        steps = None
+        if manifest is not None and manifest.numerics is not None:
+            steps = int(manifest.numerics()["Nt"])
+        return (lambda: module.run_simulation(**options)), steps
+
+    step = KERNELS[case["name"]](case["N"])
+
+    def run():
+        for _ in range(case["steps"]):
+            step()
+    return run, case["steps"]
+
+
+def measure(case, repeats=3):
+    """Timing and memory of one case, in this process."""
+    run, steps = _case_callable(case)
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        peak_rss = _peak_rss_mb()
+
+        tracemalloc.start()
+        run()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        **case,
+        "wall_s": best,
+        "steps_per_s": steps / best if steps else None,
+        "peak_rss_mb": peak_rss,
+        "traced_peak_mb": peak / 2**20,
+        "retained_kb": current / 2**10,
+    }
+
+
+def _measure(args):
+    return measure(*args)
+
+
+def case_key(case):
+    if case["kind"] == "sim":
+        options = ",".join(f"{k}={v}" for k, v in sorted(case.get("options", {}).items()))
+        return f"sim:{case['name']}" + (f"[{options}]" if options else "")
+    return f"kernel:{case['name']}:{case['N']}:{case['steps']}"
+
+
+def cases(simulations=None, kernels=tuple(KERNELS), grids=GRIDS, steps=STEPS):
+    """All benchmark cases; simulations default to the SIMULATION_REGISTRY entries."""
+    if simulations is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            from api.registry import SIMULATION_REGISTRY
+        simulations = sorted(SIMULATION_REGISTRY)
+    out = []
+    for name in simulations:
+        for options in SIM_OPTIONS.get(name, ({},)):
+            out.append({"kind": "sim", "name": name, **({"options": options} if options else {})})
+    for name in kernels:
+        for N in grids:
+            for n_steps in steps:
+                out.append({"kind": "kernel", "name": name, "N": N, "steps": n_steps})
+    return out
+
+
+def run_suite(case_list, repeats=3):
+    """Measures every case in its own worker process; returns the results document."""
+    results = {}
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        for case, result in zip(case_list, pool.map(_measure, [(c, repeats) for c in case_list])):
+            results[case_key(case)] = result
+            print(f"{case_key(case):40s} {result['wall_s']:9.4f} s", file=sys.stderr)
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "repeats": repeats,
+        "cases": results,
+    }
+
+
+def compare(baseline, current, threshold=0.15, memory_threshold=0.25):
+    """
+    Rows (case, baseline wall, current wall, relative change, flags) for the
+    cases present in both documents; flags name the regressed metrics.
+    """
+    rows = []
+    for key, new in current["cases"].items():
+        old = baseline["cases"].get(key)
+        if old is None:
+            continue
+        change = new["wall_s"] / old["wall_s"] - 1.0
+        flags = []
+        if change > threshold:
+            flags.append("time")
+        grown = new["traced_peak_mb"] - old["traced_peak_mb"]
+        if grown > 1.0 and new["traced_peak_mb"] > old["traced_peak_mb"] * (1.0 + memory_threshold):
+            flags.append("memory")
+        rows.append((key, old["wall_s"], new["wall_s"], change, flags))
+    return rows
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Benchmark suite with tracked baselines")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="measure the cases and write a results file")
+    run.add_argument("--out", default=None, help="results file (default: print only)")
+    run.add_argument("--simulations", nargs="*", default=None, help="default: the simulation registry")
+    run.add_argument("--kernels", nargs="*", default=list(KERNELS))
+    run.add_argument("--quick", action="store_true", help="smaller grids and one step count")
+    run.add_argument("--repeats", type=int, default=3)
+
+    cmp_ = sub.add_parser("compare", help="flag regressions of a results file against a baseline")
+    cmp_.add_argument("baseline", nargs="?", default=BASELINE)
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=0.15, help="relative wall-time increase")
+    cmp_.add_argument("--memory-threshold", type=float, default=0.25, help="relative traced-peak increase")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        grids, steps = (QUICK_GRIDS, QUICK_STEPS) if args.quick else (GRIDS, STEPS)
+        doc = run_suite(cases(args.simulations, args.kernels, grids, steps), args.repeats)
+        print(f"{'case':40s} {'wall [s]':>9s} {'steps/s':>10s} {'RSS [MB]':>9s} {'traced [MB]':>11s}")
+        for key, r in doc["cases"].items():
+            rate = f"{r['steps_per_s']:10.0f}" if r["steps_per_s"] else " " * 10
+            rss = f"{r['peak_rss_mb']:9.1f}" if r["peak_rss_mb"] is not None else " " * 9
+            print(f"{key:40s} {r['wall_s']:9.4f} {rate} {rss} {r['traced_peak_mb']:11.2f}")
+        if args.out:
+            os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+            with open(args.out, "w") as f:
+                json.dump(doc, f, indent=2)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["machine"] != current["machine"]:
+        print("warning: baseline was measured on a different machine or software stack", file=sys.stderr)
+
+    rows = compare(baseline, current, args.threshold, args.memory_threshold)
+    print(f"{'case':40s} {'baseline':>9s} {'current':>9s} {'change':>8s}")
+    for key, old, new, change, flags in rows:
+        print(f"{key:40s} {old:9.4f} {new:9.4f} {change:+8.1%} {' '.join(flags).upper()}")
+    regressions = [row for row in rows if row[4]]
+    print(f"{len(regressions)} regression(s) in {len(rows)} case(s)")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,71 @@
+# backend-python/analysis/boundaries.py
+"""
+How far the domain can be truncated with each boundary condition
+(solvers/boundaries.py).
+
+healthy_domain_sim is run on a long domain (reference: the right end is so
+far away that nothing it reflects comes back before the end of the run)
+and on shorter ones, with the same condition at both ends. The difference
+on the cells the short domain keeps, except the last EDGE_CELLS (the width
+of the damping layer, whose cells are not physical), is what its right end
+reflected:
+    error   max |a - a_ref| over all frames, relative to the pulse amplitude
+    cells   grid size of the short run
+    cpu_s   CPU time of the short run
+
+Usage:
+    python -m analysis.boundaries
+    python -m analysis.boundaries --lengths 1.0 0.8 --json boundaries.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from simulations import healthy_domain_sim as sim
+from solvers.boundaries import BOUNDARIES, DampingLayer
+
+REFERENCE_LENGTH = 4.0
+AMPLITUDE = 0.10
+EDGE_CELLS = DampingLayer().cells
+
+
+def _run(boundary, length):
+    start = time.process_time()
+    x, times, a, q = sim.run_simulation(save_every=10, boundary=boundary, length=length)
+    return a, len(x), time.process_time() - start
+
+
+def truncation(boundaries=tuple(BOUNDARIES), lengths=(1.0, 0.8)):
+    """Truncation error, grid size and CPU time per (boundary, length); a list of run dicts."""
+    runs = []
+    for boundary in boundaries:
+        a_ref, _, _ = _run(boundary, REFERENCE_LENGTH)
+        for length in lengths:
+            a, cells, cpu = _run(boundary, length)
+            kept = cells - EDGE_CELLS
+            error = np.max(np.abs(a[:, :kept] - a_ref[:, :kept])) / AMPLITUDE
+            runs.append({"boundary": BOUNDARIES[boundary], "length": length, "cells": cells,
+                         "error": float(error), "cpu_s": cpu})
+    return runs
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Domain truncation error of the boundary conditions")
+    parser.add_argument("--lengths", type=float, nargs="+", default=[1.0, 0.8])
+    parser.add_argument("--json", default=None, help="write the runs to this file")
+    args = parser.parse_args()
+
+    runs = truncation(lengths=args.lengths)
+    print(f"{'boundary':16s} {'length':>6s} {'cells':>6s} {'error':>10s} {'cpu [s]':>8s}")
+    for r in runs:
+        print(f"{r['boundary']:16s} {r['length']:6.2f} {r['cells']:6d} {r['error']:10.2e} {r['cpu_s']:8.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(runs, f, indent=2)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,178 @@
+# backend-python/analysis/convergence.py
+"""
+Grid-convergence and scheme-verification study.
+
+Every scheme of simulations/ is run on a sequence of grids refined by a
+factor 2 in dz and dt together (fixed CFL), from a smooth initial state of
+the damped linear wave system
+
+    A_t + Q_z = 0
+    Q_t + c^2 A_z = -delta Q
+
+whose pulses stay clear of the boundaries up to t_end. The analytic
+solution is the exact Fourier propagation of the same data (the damping of
+each scheme's simulation is used), evaluated at the scheme's own grid
+points, so node- and cell-centred grids are verified alike.
+
+Reported per level: grid points, dz, dt, max error of A relative to the
+pulse amplitude, observed order log2(e_coarse / e_fine), wall and CPU
+time. The levels run in a process pool, one task per (scheme, level).
+
+Schemes:
+    maccormack        simulations/TestC1.py
+    maccormack_cells  simulations/healthy_domain_sim.py (cell-centred, ghost cells)
+    lax_wendroff      simulations/Test_model_laxw_half_step.py
+    compact_rk4       solvers/highorder.py
+    characteristics   solvers/characteristics.py
+
+Usage:
+    python -m analysis.convergence
+    python -m analysis.convergence maccormack lax_wendroff --levels 6 --workers 4 --json convergence.json
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis import accuracy
+from simulations import Test_model_laxw_half_step as laxw
+from simulations import healthy_domain_sim as cells
+from solvers.workspace import Workspace
+
+C = 1.0
+SIGMA = 0.04            # pulse width
+CENTERS = {"A": 0.55, "Q": 0.45}
+AMPLITUDE = {"A": 1.0, "Q": 0.5}
+N_MODES = 4096          # Fourier resolution of the analytic solution
+
+
+def _pulse(z, field):
+    return AMPLITUDE[field] * np.exp(-((z - CENTERS[field]) / SIGMA)**2)
+
+
+def exact(z, t, delta):
+    """A(z, t) of the analytic solution at arbitrary points z in [0, 1]."""
+    grid = np.arange(N_MODES) / N_MODES
+    k = 2.0 * np.pi * np.fft.rfftfreq(N_MODES, 1.0 / N_MODES)
+    a, q = np.fft.rfft(_pulse(grid, "A")), np.fft.rfft(_pulse(grid, "Q"))
+    M = np.zeros((len(k), 2, 2), dtype=complex)
+    M[:, 0, 1] = -1j * k
+    M[:, 1, 0] = -1j * k * C**2
+    M[:, 1, 1] = -delta
+    lam, V = np.linalg.eig(M)
+    coeff = np.linalg.solve(V, np.stack([a, q], axis=1)[..., None])
+    a_t = (V @ (np.exp(lam * t)[..., None] * coeff))[:, 0, 0]
+
+    weight = np.full(len(k), 2.0)          # rfft: every mode but 0 (and N/2) twice
+    weight[0] = weight[-1] = 1.0
+    phase = np.exp(1j * np.outer(z, k))
+    return (phase @ (weight * a_t)).real / N_MODES
+
+
+def _run_lax_wendroff(Q, A, dz, dt, Nt):
+    ws = Workspace((len(A),), ("A", "Q"), laxw.LAXW_SCRATCH).load(A=A, Q=Q)
+    for _ in range(Nt):
+        laxw.lax_wendroff_step_into(ws, dt=dt, dz=dz)
+    return ws.cur["A"]
+
+
+def _run_cells(Q, A, dz, dt, Nt):
+    ws = Workspace((len(A) + 2,), ("a", "q"), cells.MACCORMACK_SCRATCH)
+    a, q = ws.state()
+    a[1:-1], q[1:-1] = A, Q
+    for _ in range(Nt):
+        a, q = ws.state()
+        cells.NEUMANN.apply(a, q)
+        cells.mac_cormack_into(ws, dt, dx=dz)
+    return ws.cur["a"][1:-1]
+
+
+# name: (runner(Q0, A0, dz, dt, Nt) -> A, damping, grid, CFL)
+SCHEMES = {
+    "maccormack": (accuracy.RUNNERS["maccormack"], accuracy.DELTA, "nodes", 0.8),
+    "maccormack_cells": (_run_cells, cells.K3, "cells", 0.8),
+    "lax_wendroff": (_run_lax_wendroff, laxw.delta, "nodes", 0.8),
+    "compact_rk4": (accuracy.RUNNERS["compact_rk4"], accuracy.DELTA, "nodes", 1.2),
+    "characteristics": (accuracy.RUNNERS["characteristics"], accuracy.DELTA, "nodes", 0.8),
+}
+
+
+def grid_points(kind, N):
+    if kind == "cells":
+        return (np.arange(N) + 0.5) / N
+    return np.arange(N + 1) / N
+
+
+def run_level(scheme, N, t_end=0.15):
+    """One refinement level of a scheme: error against the analytic solution and timings."""
+    runner, delta, kind, cfl = SCHEMES[scheme]
+    dz = 1.0 / N
+    Nt = int(math.ceil(t_end / (cfl * dz / C)))
+    dt = t_end / Nt
+    z = grid_points(kind, N)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    A = runner(_pulse(z, "Q"), _pulse(z, "A"), dz, dt, Nt)
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    error = np.max(np.abs(A - exact(z, t_end, delta))) / AMPLITUDE["A"]
+    return {"scheme": scheme, "N": N, "dz": dz, "dt": dt, "steps": Nt,
+            "error": float(error), "wall_s": wall, "cpu_s": cpu}
+
+
+def _run_level(task):
+    return run_level(*task)
+
+
+def study(schemes=tuple(SCHEMES), n0=50, levels=5, t_end=0.15, workers=None):
+    """
+    All levels of all schemes, run in a process pool (workers=1 runs
+    in-process). Returns {scheme: [level dicts with "order" from the second on]}.
+    """
+    tasks = [(scheme, n0 * 2**k, t_end) for scheme in schemes for k in range(levels)]
+    if workers == 1:
+        results = list(map(_run_level, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            results = list(pool.map(_run_level, tasks))
+
+    report = {scheme: [] for scheme in schemes}
+    for level in results:
+        runs = report[level["scheme"]]
+        if runs and level["error"] > 0.0:
+            level["order"] = math.log2(runs[-1]["error"] / level["error"])
+        runs.append(level)
+    return report
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Observed convergence order of the schemes")
+    parser.add_argument("schemes", nargs="*", default=list(SCHEMES), help=f"any of {', '.join(SCHEMES)}")
+    parser.add_argument("--n0", type=int, default=50, help="grid intervals of the coarsest level")
+    parser.add_argument("--levels", type=int, default=5)
+    parser.add_argument("--t-end", type=float, default=0.15)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--json", default=None, help="write the report to this file")
+    args = parser.parse_args()
+    unknown = set(args.schemes) - set(SCHEMES)
+    if unknown:
+        parser.error(f"unknown schemes: {', '.join(sorted(unknown))}")
+
+    report = study(args.schemes, args.n0, args.levels, args.t_end, args.workers)
+    print(f"{'scheme':16s} {'N':>6s} {'steps':>6s} {'error':>10s} {'order':>6s} {'wall [s]':>9s}")
+    for scheme, runs in report.items():
+        for r in runs:
+            order = f"{r['order']:6.2f}" if "order" in r else " " * 6
+            print(f"{scheme:16s} {r['N']:6d} {r['steps']:6d} {r['error']:10.2e} {order} {r['wall_s']:9.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,424 @@
+# backend-python/analysis/loadtest.py
+"""
+Load test of the API (api/server.py) for sizing a deployment.
+
+The app is started locally under uvicorn (or an already running server is
+targeted with --url) and a request mix is replayed against it by a pool of
+closed-loop clients: each client sends its next request as soon as the
+previous one is answered, so `concurrency` is the number of simultaneous
+users. Each client sends its own X-Client-Id (user-<seed>), so the fair
+scheduler of the server (api/scheduler.py) sees separate users rather than
+one address. Every concurrency level runs for a fixed duration after a
+warm-up.
+
+Request kinds (MIXES gives their weights):
+    list        GET /simulations
+    simulation  GET /simulation/{name} with parameters drawn from PARAMS
+    artery_raw  GET /simulation-raw/artery_sim_full with varied wall and
+                Windkessel parameters
+
+Reported per level, overall and per kind:
+    throughput_rps          completed requests per second
+    error_rate              share of responses >= 400 or failed connections
+    latency_ms              p50, p95, p99, mean, max
+and for the server process tree (Linux /proc; None elsewhere or when the
+server is not local and no --pid is given):
+    cpu_percent             CPU time over wall time (100 = one core busy)
+    rss_mb_mean/peak        resident memory sampled every 0.2 s
+capacity is the highest level whose p95 stays within --slo-ms with at most
+1 % errors. Client and server share the machine's CPUs, so measure with
+the client on another host (--url) when the server is CPU bound.
+
+Usage:
+    python -m analysis.loadtest run --concurrency 1 2 4 8 --duration 30 --out load.json
+    python -m analysis.loadtest run --url http://10.0.0.5:8000 --mix list=1 simulation=1
+    python -m analysis.loadtest compare load_1worker.json load_2workers.json
+"""
+import argparse
+import contextlib
+import datetime
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIXES = {
+    "default": {"list": 0.3, "simulation": 0.5, "artery_raw": 0.2},
+    "browse": {"list": 0.8, "simulation": 0.2},
+    "compute": {"simulation": 0.5, "artery_raw": 0.5},
+}
+# simulation: {parameter: choices}; every request draws one value per parameter
+PARAMS = {
+    "TestC1": {"order": (2, 4), "boundary": (0, 1)},
+    "healthy_domain_sim": {"save_every": (10, 50), "boundary": (0, 1, 2)},
+    "Test_model_laxw_half_step": {"T_FINAL": (0.5, 1.0), "characteristics": (0, 1)},
+}
+ARTERY_PARAMS = {"E": (1.0e6, 1.5e6, 2.0e6), "Rd": (1.0e9, 2.0e9), "save_every": (5, 20)}
+SLO_MS = 1000.0
+MAX_ERROR_RATE = 0.01
+
+
+# ---------- request mix ----------
+def _query(rng, choices):
+    return urllib.parse.urlencode({k: rng.choice(v) for k, v in choices.items()})
+
+
+def request_path(kind, rng):
+    """Path (with query) of one request of a kind."""
+    if kind == "list":
+        return "/simulations"
+    if kind == "simulation":
+        name = rng.choice(sorted(PARAMS))
+        return f"/simulation/{name}?{_query(rng, PARAMS[name])}"
+    if kind == "artery_raw":
+        return f"/simulation-raw/artery_sim_full?{_query(rng, ARTERY_PARAMS)}"
+    raise ValueError(f"Unknown request kind '{kind}'")
+
+
+def parse_mix(items):
+    """{kind: weight} from a MIXES name or kind=weight items."""
+    if len(items) == 1 and items[0] in MIXES:
+        return dict(MIXES[items[0]])
+    mix = {}
+    for item in items:
+        kind, _, weight = item.partition("=")
+        request_path(kind, random.Random(0))        # ValueError on an unknown kind
+        mix[kind] = float(weight or 1.0)
+    return mix
+
+
+# ---------- server ----------
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _get(url, path, timeout=5.0):
+    parts = urllib.parse.urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+@contextlib.contextmanager
+def local_server(workers=1, startup_timeout=300.0):
+    """
+    Starts `uvicorn api.server:app` on a free port and yields (url, pid) once
+    GET / answers; importing the simulation registry can take a minute.
+    """
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "api.server:app", "--host", "127.0.0.1",
+           "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with status {proc.returncode}")
+            try:
+                if _get(url, "/") == 200:
+                    break
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server did not answer within {startup_timeout:.0f} s")
+            time.sleep(0.5)
+        yield url, proc.pid
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+class ServerMonitor:
+    """CPU and RSS of a process and its children, sampled from /proc in a thread."""
+
+    PERIOD = 0.2
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.available = pid is not None and os.path.exists(f"/proc/{pid}/stat")
+        self._stop = threading.Event()
+        self._thread = None
+        self.rss = []
+
+    def _tree(self):
+        pids, children = [self.pid], {}
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                with contextlib.suppress(OSError):
+                    with open(f"/proc/{entry}/stat") as f:
+                        ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                    children.setdefault(ppid, []).append(int(entry))
+        for pid in pids:
+            pids.extend(children.get(pid, ()))
+        return pids
+
+    def _sample(self):
+        """(CPU seconds, RSS in MB) summed over the process tree."""
+        cpu, rss = 0.0, 0.0
+        tick, page = os.sysconf("SC_CLK_TCK"), os.sysconf("SC_PAGE_SIZE")
+        for pid in self._tree():
+            with contextlib.suppress(OSError):
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / tick        # utime + stime
+                rss += int(fields[21]) * page / 2**20
+        return cpu, rss
+
+    def _loop(self):
+        while not self._stop.wait(self.PERIOD):
+            self.rss.append(self._sample()[1])
+
+    def __enter__(self):
+        if self.available:
+            self._start = (time.perf_counter(), self._sample()[0])
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.available:
+            self._stop.set()
+            self._thread.join()
+            wall, cpu = time.perf_counter(), self._sample()[0]
+            self.cpu_percent = 100.0 * (cpu - self._start[1]) / (wall - self._start[0])
+
+    def summary(self):
+        if not self.available:
+            return None
+        return {"cpu_percent": self.cpu_percent,
+                "rss_mb_mean": float(np.mean(self.rss)) if self.rss else None,
+                "rss_mb_peak": float(np.max(self.rss)) if self.rss else None}
+
+
+# ---------- load ----------
+def _client(url, mix, seed, stop, record, timeout):
+    """One closed-loop user: requests until stop is set; record(kind, status, seconds)."""
+    rng = random.Random(seed)
+    headers = {"X-Client-Id": f"user-{seed}"}
+    kinds, weights = list(mix), list(mix.values())
+    parts = urllib.parse.urlsplit(url)
+    conn = None
+    while not stop.is_set():
+        kind = rng.choices(kinds, weights)[0]
+        path = request_path(kind, rng)
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = None
+            conn.close()
+            conn = None         # reconnect
+        record(kind, status, time.perf_counter() - start)
+    if conn is not None:
+        conn.close()
+
+
+def _latency(seconds):
+    if not seconds:
+        return None
+    ms = 1e3 * np.asarray(seconds)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+            "mean": float(ms.mean()), "max": float(ms.max())}
+
+
+def _stats(samples, duration):
+    errors = sum(1 for _, status, _ in samples if status is None or status >= 400)
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / duration,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "latency_ms": _latency([s for _, status, s in samples if status is not None]),
+    }
+
+
+def run_level(url, mix, concurrency, duration, warmup=5.0, pid=None, seed=0, timeout=120.0):
+    """One concurrency level: warm-up, then `duration` seconds of measured load."""
+    samples, lock = [], threading.Lock()
+    measuring = threading.Event()
+
+    def record(kind, status, seconds):
+        if measuring.is_set():
+            with lock:
+                samples.append((kind, status, seconds))
+
+    stop = threading.Event()
+    clients = [threading.Thread(target=_client, args=(url, mix, seed + i, stop, record, timeout), daemon=True)
+               for i in range(concurrency)]
+    for client in clients:
+        client.start()
+    time.sleep(warmup)
+
+    with ServerMonitor(pid) as monitor:
+        measuring.set()
+        start = time.perf_counter()
+        time.sleep(duration)
+        measuring.clear()
+        elapsed = time.perf_counter() - start
+    stop.set()
+    for client in clients:
+        client.join()
+
+    level = {"concurrency": concurrency, **_stats(samples, elapsed), "server": monitor.summary()}
+    level["by_kind"] = {kind: _stats([s for s in samples if s[0] == kind], elapsed) for kind in mix}
+    return level
+
+
+def capacity(levels, slo_ms=SLO_MS):
+    """Highest concurrency whose p95 latency is within slo_ms with at most MAX_ERROR_RATE errors."""
+    ok = [level["concurrency"] for level in levels
+          if level["latency_ms"] and level["latency_ms"]["p95"] <= slo_ms
+          and level["error_rate"] <= MAX_ERROR_RATE]
+    return max(ok) if ok else None
+
+
+def run(url, pid, mix, concurrency=(1, 2, 4, 8), duration=30.0, warmup=5.0, slo_ms=SLO_MS, seed=0):
+    """All levels against a running server; returns the results document."""
+    levels = []
+    for n in concurrency:
+        levels.append(run_level(url, mix, n, duration, warmup, pid, seed))
+        level = levels[-1]
+        p95 = level["latency_ms"]["p95"] if level["latency_ms"] else float("nan")
+        print(f"concurrency {n:4d}: {level['throughput_rps']:8.2f} req/s, p95 {p95:9.1f} ms, "
+              f"{level['error_rate']:.1%} errors", file=sys.stderr)
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "url": url,
+        "mix": mix,
+        "duration_s": duration,
+        "slo_ms": slo_ms,
+        "capacity": capacity(levels, slo_ms),
+        "levels": levels,
+    }
+
+
+def compare(baseline, current, threshold=0.15):
+    """
+    Rows (concurrency, metric, baseline, current, relative change, regressed)
+    for the levels present in both documents: throughput and p95 latency.
+    """
+    old_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    rows = []
+    for new in current["levels"]:
+        old = old_levels.get(new["concurrency"])
+        if old is None or not old["latency_ms"] or not new["latency_ms"]:
+            continue
+        for metric, a, b, worse in (
+            ("throughput_rps", old["throughput_rps"], new["throughput_rps"], -1.0),
+            ("p95_ms", old["latency_ms"]["p95"], new["latency_ms"]["p95"], 1.0),
+            ("p99_ms", old["latency_ms"]["p99"], new["latency_ms"]["p99"], 1.0),
+        ):
+            change = b / a - 1.0 if a else 0.0
+            rows.append((new["concurrency"], metric, a, b, change, worse * change > threshold))
+        rows.append((new["concurrency"], "error_rate", old["error_rate"], new["error_rate"], None,
+                     new["error_rate"] > max(old["error_rate"], MAX_ERROR_RATE)))
+    return rows
+
+
+def _print_levels(doc):
+    print(f"{'users':>5s} {'req/s':>8s} {'errors':>7s} {'p50 [ms]':>9s} {'p95 [ms]':>9s} "
+          f"{'p99 [ms]':>9s} {'CPU [%]':>8s} {'RSS [MB]':>9s}")
+    for level in doc["levels"]:
+        lat = level["latency_ms"] or {"p50": np.nan, "p95": np.nan, "p99": np.nan}
+        server = level["server"] or {}
+        cpu = f"{server['cpu_percent']:8.0f}" if server.get("cpu_percent") is not None else " " * 8
+        rss = f"{server['rss_mb_peak']:9.1f}" if server.get("rss_mb_peak") is not None else " " * 9
+        print(f"{level['concurrency']:5d} {level['throughput_rps']:8.2f} {level['error_rate']:7.1%} "
+              f"{lat['p50']:9.1f} {lat['p95']:9.1f} {lat['p99']:9.1f} {cpu} {rss}")
+    print(f"capacity within p95 <= {doc['slo_ms']:.0f} ms: {doc['capacity'] or 'none'} concurrent users")
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="API load test with latency percentiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_ = sub.add_parser("run", help="replay a request mix and write a results file")
+    run_.add_argument("--url", default=None, help="target a running server (default: start one locally)")
+    run_.add_argument("--pid", type=int, default=None, help="server process to monitor with --url")
+    run_.add_argument("--workers", type=int, default=1, help="uvicorn workers of the local server")
+    run_.add_argument("--mix", nargs="+", default=["default"],
+                      help=f"one of {', '.join(MIXES)} or kind=weight items")
+    run_.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    run_.add_argument("--duration", type=float, default=30.0, help="measured seconds per level")
+    run_.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before each level")
+    run_.add_argument("--slo-ms", type=float, default=SLO_MS, help="p95 latency target for the capacity")
+    run_.add_argument("--seed", type=int, default=0)
+    run_.add_argument("--out", default=None, help="results file (default: print only)")
+
+    cmp_ = sub.add_parser("compare", help="compare two results files level by level")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("current")
+    cmp_.add_argument("--threshold", type=float, default=0.15, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        try:
+            mix = parse_mix(args.mix)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.url:
+            doc = run(args.url, args.pid, mix, args.concurrency, args.duration, args.warmup,
+                      args.slo_ms, args.seed)
+        else:
+            with local_server(args.workers) as (url, pid):
+                doc = run(url, pid, mix, args.concurrency, args.duration, args.warmup,
+                          args.slo_ms, args.seed)
+            doc["workers"] = args.workers
+        _print_levels(doc)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(doc, f, indent=2)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["mix"] != current["mix"]:
+        print("warning: the runs replayed different request mixes", file=sys.stderr)
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'users':>5s} {'metric':16s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for users, metric, old, new, change, regressed in rows:
+        change = f"{change:+8.1%}" if change is not None else " " * 8
+        print(f"{users:5d} {metric:16s} {old:10.3f} {new:10.3f} {change} {'REGRESSION' if regressed else ''}")
+    print(f"capacity: {baseline['capacity'] or 'none'} -> {current['capacity'] or 'none'} concurrent users")
+    regressions = [row for row in rows if row[5]]
+    print(f"{len(regressions)} regression(s) in {len(rows)} comparison(s)")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    _main()
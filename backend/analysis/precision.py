@@ -0,0 +1,113 @@
+# backend-python/analysis/precision.py
+"""
+Validation of the reduced-precision modes (solvers/precision.py).
+
+Each simulation is run in float64 (reference) and in every other mode with
+its default parameters. Reported per output array:
+    max_abs     max |x - x_ref|
+    rel         max_abs / max |x_ref|, the error relative to the signal range
+and per run the wall time of the solver and of the JSON encoding the API
+does (float32 output is converted to short decimals, which costs time
+in the solver call and saves it in the encoder), and the payload size
+against the reference.
+
+Usage:
+    python -m analysis.precision
+    python -m analysis.precision artery_sim_full TestC1 --json precision.json
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import time
+
+import numpy as np
+
+from solvers.precision import PRECISIONS, to_list
+
+SIMULATIONS = ("artery_sim_full", "TestC1", "healthy_domain_sim", "Test_model_laxw_half_step")
+TUPLE_OUTPUTS = ("x", "times", "a", "q")
+
+
+def _outputs(result):
+    """{name: float array} of a run_simulation result (dict or 4-tuple)."""
+    if isinstance(result, dict):
+        items = result.items()
+    else:
+        items = zip(TUPLE_OUTPUTS, result)
+    out = {}
+    for name, value in items:
+        try:
+            out[name] = np.asarray(value, dtype=float)
+        except (TypeError, ValueError):
+            continue        # nested payloads such as envelopes
+    return out
+
+
+def _payload(result):
+    """(bytes, seconds) of the JSON the API sends for a result."""
+    start = time.perf_counter()
+    if not isinstance(result, dict):
+        result = {name: value if isinstance(value, list) else to_list(value)
+                  for name, value in zip(TUPLE_OUTPUTS, result)}
+    size = len(json.dumps(result))
+    return size, time.perf_counter() - start
+
+
+def _run(run_simulation, precision):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = run_simulation(precision=precision)
+        return result, time.perf_counter() - start
+
+
+def compare(name, precisions=PRECISIONS[1:]):
+    """Error of each precision mode of simulations.<name> against its float64 run."""
+    run_simulation = importlib.import_module(f"simulations.{name}").run_simulation
+    reference, ref_time = _run(run_simulation, "float64")
+    ref_bytes, ref_encode = _payload(reference)
+    ref_out = _outputs(reference)
+    report = {"simulation": name, "float64_s": ref_time, "float64_encode_s": ref_encode, "modes": {}}
+
+    for precision in precisions:
+        result, elapsed = _run(run_simulation, precision)
+        n_bytes, encode = _payload(result)
+        errors = {}
+        for key, ref in ref_out.items():
+            diff = float(np.max(np.abs(_outputs(result)[key] - ref))) if ref.size else 0.0
+            scale = float(np.max(np.abs(ref))) if ref.size else 0.0
+            errors[key] = {"max_abs": diff, "rel": diff / scale if scale else 0.0}
+        report["modes"][precision] = {
+            "wall_time_s": elapsed,
+            "encode_s": encode,
+            "speedup": (ref_time + ref_encode) / (elapsed + encode),
+            "payload_ratio": n_bytes / ref_bytes,
+            "max_rel": max(e["rel"] for e in errors.values()),
+            "errors": errors,
+        }
+    return report
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Error of the reduced-precision modes against float64")
+    parser.add_argument("names", nargs="*", default=SIMULATIONS)
+    parser.add_argument("--json", default=None, help="write the full report to this file")
+    args = parser.parse_args()
+
+    reports = []
+    print(f"{'simulation':28s} {'mode':8s} {'max rel err':>12s} {'speedup':>8s} {'payload':>8s}")
+    for name in args.names:
+        report = compare(name)
+        reports.append(report)
+        for precision, mode in report["modes"].items():
+            print(f"{name:28s} {precision:8s} {mode['max_rel']:12.2e} "
+                  f"{mode['speedup']:8.2f} {mode['payload_ratio']:8.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,362 @@
+# backend-python/analysis/rom.py
+"""
+Reduced-order POD/Galerkin surrogate for the artery_sim_full model.
+
+Offline stage:
+    run the full MacCormack solver over a design of (E, Rp, Rd) values,
+    collect (A, Q) state snapshots, build a POD basis from their SVD and
+    store it together with the projected reduced operator.
+
+Online stage:
+    for new parameters the full step is applied to the r basis vectors only
+    (Galerkin projection, r full-grid steps), and the r-dimensional system
+    is integrated over the heart cycle. The projection residual of every
+    reduced step is accumulated into an error estimate for the outlet
+    pressure.
+
+The discretization is linear, so one full step is x_{n+1} = M x_n + b u_n
+with state x = [A, Q, Q_out^{n-1}, Q_out^{n-2}] and input u_n the inlet
+area perturbation. The grid (dz, dt, L) is fixed by the stored basis.
+
+Usage:
+    python -m analysis.rom            # train and save output/rom_artery.npz
+"""
+import os
+import time
+
+import numpy as np
+
+from simulations.artery_sim_full import (
+    MACCORMACK_SCRATCH,
+    artery_parameters,
+    inlet_pressure,
+    linear_step,
+    maccormack_step_into,
+    mmHg_to_Pa,
+    pack_state,
+    step_coefficients,
+)
+from solvers.workspace import Workspace
+
+# Parameter ranges covered by the surrogate (sampled log-uniformly)
+SURROGATE_RANGES = {
+    "E": (0.75e6, 2.5e6),      # Young's modulus [Pa]
+    "Rp": (3.0e8, 1.5e9),      # proximal resistance
+    "Rd": (0.5e10, 2.0e10),    # distal resistance
+}
+
+ROM_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "output", "rom_artery.npz",
+)
+
+
+def _design(n_lhs=8, seed=0):
+    """Corners + centre of the parameter box plus a Latin hypercube fill."""
+    names = list(SURROGATE_RANGES)
+    d = len(names)
+
+    corners = np.array(np.meshgrid(*[[0.0, 1.0]] * d)).reshape(d, -1).T
+    centre = np.full((1, d), 0.5)
+
+    rng = np.random.default_rng(seed)
+    lhs = (np.argsort(rng.random((n_lhs, d)), axis=0) + rng.random((n_lhs, d))) / n_lhs
+
+    unit = np.vstack([corners, centre, lhs])
+    lo = np.log([SURROGATE_RANGES[k][0] for k in names])
+    hi = np.log([SURROGATE_RANGES[k][1] for k in names])
+    values = np.exp(lo + unit * (hi - lo))
+    return {k: values[:, j] for j, k in enumerate(names)}
+
+
+# -------------------------
+# Offline stage
+# -------------------------
+def collect_snapshots(design, snapshot_every=20, **fixed):
+    """
+    Runs the full solver for all design points at once (batched columns)
+    and returns the packed state snapshots, shape (n_state, n_snap * n_design).
+    """
+    prm = artery_parameters(**fixed, **design)
+    Nx, Nt, dt = prm["Nx"], prm["Nt"], prm["dt"]
+    k = len(next(iter(design.values())))
+
+    P_in = inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"])
+    A_in = (P_in[:, None] - prm["P_ref"]) / prm["alpha"]
+
+    ws = Workspace((Nx, k), ("A", "Q"), MACCORMACK_SCRATCH)
+    coef = step_coefficients(prm)
+    Q_out_hist = np.zeros((3, k))
+
+    snapshots = []
+    for n in range(Nt):
+        maccormack_step_into(ws, Q_out_hist, A_in[n], coef, wk_active=n >= 2)
+        if (n + 1) % snapshot_every == 0:
+            snapshots.append(pack_state(*ws.state(), Q_out_hist))
+
+    return np.hstack(snapshots)
+
+
+def train_surrogate(tol=1e-12, max_rank=80, snapshot_every=20, n_lhs=8, **fixed):
+    """
+    Offline stage: snapshots over the design, POD basis, projected operator.
+
+    tol is the fraction of snapshot energy the discarded modes may carry.
+    Galerkin projection of a hyperbolic system is not stable for every
+    rank, so the rank is then increased until the reduced operator has
+    spectral radius <= 1 at every design point.
+    Extra keyword arguments fix non-design parameters (e.g. dz, dt).
+    """
+    start = time.perf_counter()
+    design = _design(n_lhs=n_lhs)
+    ref = artery_parameters(**fixed)
+    Nx = ref["Nx"]
+
+    # scale A by the reference wave speed so both fields carry flow units
+    scale = np.ones(2*Nx + 2)
+    scale[:Nx] = ref["c0"]
+
+    X = collect_snapshots(design, snapshot_every=snapshot_every, **fixed)
+    U, s, _ = np.linalg.svd(scale[:, None] * X, full_matrices=False)
+
+    energy = np.cumsum(s**2) / np.sum(s**2)
+    rank = min(int(np.searchsorted(energy, 1.0 - tol)) + 1, max_rank)
+
+    points = [{k: v[i] for k, v in design.items()} for i in range(len(design["E"]))]
+    while True:
+        rom = ArterySurrogate(U[:, :rank], scale, fixed=fixed)
+        rho = max(rom.spectral_radius(**p) for p in points)
+        if rho <= 1.0 or rank >= max_rank:
+            break
+        rank += 1
+
+    rom.singular_values = s
+    rom.design = design
+    rom.Mr, rom.br = rom.project(**fixed)[:2]
+
+    print(f"POD basis: rank {rank} of {len(s)}, spectral radius {rho:.6f} "
+          f"({X.shape[1]} snapshots, {time.perf_counter() - start:.1f} s)")
+    return rom
+
+
+def propagate(Mr, br, u, a0, block=64):
+    """
+    States a_1..a_N of the reduced recurrence a_{n+1} = Mr a_n + br u_n.
+
+    Within a block of K steps the state is Mr^k a_start plus a convolution
+    of the input with the impulse responses Mr^j br, so the Python loop
+    runs over N/K block starts instead of N steps.
+    """
+    r, N = len(a0), len(u)
+    K = max(min(block, N), 1)
+
+    # powers P[k] = Mr^(k+1) and impulse responses G[j] = Mr^j br
+    P = np.empty((K, r, r))
+    P[0] = Mr
+    for k in range(1, K):
+        P[k] = Mr @ P[k-1]
+    G = np.empty((K, r))
+    G[0] = br
+    G[1:] = P[:-1] @ br
+
+    nb = -(-N // K)
+    U = np.zeros(nb * K)
+    U[:N] = u
+    U = U.reshape(nb, K)
+
+    # forced response inside each block: F[b, k] = sum_{j<=k} G[k-j] u[b, j]
+    T = np.zeros((K, K, r))
+    for j in range(K):
+        T[j, j:] = G[:K-j]
+    F = (U @ T.reshape(K, K*r)).reshape(nb, K, r)
+
+    starts = np.empty((nb, r))
+    a = a0
+    for b in range(nb):
+        starts[b] = a
+        a = P[-1] @ a + F[b, -1]
+
+    states = np.einsum("bs,kts->bkt", starts, P) + F
+    return states.reshape(nb*K, r)[:N]
+
+
+# -------------------------
+# Online stage
+# -------------------------
+class ArterySurrogate:
+    """POD/Galerkin surrogate of artery_sim_full on a fixed grid."""
+
+    def __init__(self, basis, scale, fixed=None):
+        self.basis = basis              # (n_state, r), orthonormal in scaled coordinates
+        self.scale = scale              # (n_state,), scaled = scale * physical
+        self.fixed = dict(fixed or {})  # non-design parameters (grid, timing)
+        self.singular_values = None
+        self.design = None
+        self.Mr = self.br = None        # reduced operator at the reference parameters
+
+    @property
+    def rank(self):
+        return self.basis.shape[1]
+
+    def save(self, path=ROM_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(
+            path,
+            basis=self.basis,
+            scale=self.scale,
+            singular_values=self.singular_values,
+            Mr=self.Mr,
+            br=self.br,
+            design_names=np.array(list(self.design)),
+            design_values=np.array(list(self.design.values())),
+            fixed_names=np.array(list(self.fixed), dtype=str),
+            fixed_values=np.array(list(self.fixed.values()), dtype=float),
+        )
+
+    @classmethod
+    def load(cls, path=ROM_PATH):
+        data = np.load(path)
+        fixed = dict(zip(data["fixed_names"].tolist(), data["fixed_values"].tolist()))
+        rom = cls(data["basis"], data["scale"], fixed=fixed)
+        rom.singular_values = data["singular_values"]
+        rom.design = dict(zip(data["design_names"].tolist(), data["design_values"]))
+        rom.Mr, rom.br = data["Mr"], data["br"]
+        return rom
+
+    def _parameters(self, **params):
+        for name, values in (self.design or {}).items():
+            if name in params and not values.min() <= params[name] <= values.max():
+                raise ValueError(
+                    f"{name}={params[name]:g} outside surrogate range "
+                    f"[{values.min():g}, {values.max():g}]"
+                )
+        for name in self.fixed:
+            if name in params and params[name] != self.fixed[name]:
+                raise ValueError(f"Surrogate was trained with fixed {name}={self.fixed[name]}")
+        prm = artery_parameters(**{**params, **self.fixed})
+        if 2*prm["Nx"] + 2 != self.basis.shape[0]:
+            raise ValueError("Parameters do not match the surrogate grid")
+        return prm
+
+    def project(self, wk_active=True, **params):
+        """
+        Galerkin projection of the full step at the given parameters.
+
+        Returns (Mr, br, R) where R maps [a; u] to the projection residual
+        norm of a reduced step (upper-triangular, from a QR factorization).
+        """
+        prm = self._parameters(**params)
+        V = self.basis
+        phys = V / self.scale[:, None]
+
+        MV = self.scale[:, None] * linear_step(phys, np.zeros(V.shape[1]), prm, wk_active)
+        b = self.scale * linear_step(np.zeros(V.shape[0]), 1.0, prm, wk_active)
+
+        W = np.column_stack([MV, b])
+        Wr = V.T @ W
+        R = np.linalg.qr(W - V @ Wr, mode="r")
+        return Wr[:, :-1], Wr[:, -1], R
+
+    def spectral_radius(self, **params):
+        """Spectral radius of the reduced operator; > 1 means the surrogate is unstable."""
+        Mr = self.project(**params)[0]
+        return float(np.max(np.abs(np.linalg.eigvals(Mr))))
+
+    def run(self, **params):
+        """
+        Evaluates the surrogate and returns the same fields as
+        run_artery_simulation plus an "error_estimate" entry.
+        """
+        start = time.perf_counter()
+        prm = self._parameters(**params)
+        L, Nx, Nt = prm["L"], prm["Nx"], prm["Nt"]
+        dt, save_every = prm["dt"], prm["save_every"]
+        A_ref, alpha, P_ref = prm["A_ref"], prm["alpha"], prm["P_ref"]
+
+        Mr0, br0, R0 = self.project(wk_active=False, **params)
+        Mr, br, R = self.project(**params)
+
+        A_in = (inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"]) - P_ref) / alpha
+
+        # reduced time loop (Windkessel derivatives switch on at n = 2)
+        a_hist = np.empty((Nt + 1, self.rank))
+        a_hist[0] = 0.0
+        for n in range(min(2, Nt)):
+            a_hist[n + 1] = Mr0 @ a_hist[n] + br0 * A_in[n]
+        if Nt > 2:
+            a_hist[3:] = propagate(Mr, br, A_in[2:], a_hist[2])
+
+        # projection residual of every step, accumulated as an error bound
+        au = np.column_stack([a_hist[:-1], A_in])
+        res = np.linalg.norm(au @ R.T, axis=1)
+        res[:2] = np.linalg.norm(au[:2] @ R0.T, axis=1)
+        err_bound = np.concatenate([[0.0], np.cumsum(res)])
+
+        # decimated output at the monitor locations
+        z = np.linspace(0, L, Nx)
+        monitor_z = np.array([0.0, L/2, L])
+        monitor_idx = [int(np.argmin(np.abs(z - zz))) for zz in monitor_z]
+
+        saved = [n for n in range(Nt) if n % save_every == 0 or n == Nt - 1]
+        a_saved = a_hist[np.array(saved) + 1]
+        phys = self.basis / self.scale[:, None]
+        A_mon = a_saved @ phys[monitor_idx].T
+        Q_mon = a_saved @ phys[[Nx + i for i in monitor_idx]].T
+        P_mon = P_ref + alpha * A_mon
+
+        # outlet pressure error: scaled state error divided by the A scaling
+        P_err = alpha / self.scale[Nx - 1] * err_bound[np.array(saved) + 1]
+
+        return {
+            "t": ((np.array(saved) + 1) * dt).tolist(),
+            "monitor_z": monitor_z.tolist(),
+            "pressure_mmHg": (P_mon / mmHg_to_Pa).T.tolist(),
+            "flow": Q_mon.T.tolist(),
+            "area": (A_mon + A_ref).T.tolist(),
+            "P_out_mmHg": (P_mon[:, -1] / mmHg_to_Pa).tolist(),
+            "Q_out": Q_mon[:, -1].tolist(),
+            "P_wk_mmHg": (P_mon[:, -1] / mmHg_to_Pa).tolist(),
+            "rom_rank": self.rank,
+            "error_estimate": {
+                "P_out_bound_mmHg": float(np.max(P_err) / mmHg_to_Pa),
+                "residual_max": float(np.max(res)),
+                "spectral_radius": float(np.max(np.abs(np.linalg.eigvals(Mr)))),
+            },
+            "elapsed_s": time.perf_counter() - start,
+        }
+
+    def validate(self, **params):
+        """Runs the full model at the same parameters and reports the actual error."""
+        from simulations.artery_sim_full import run_artery_simulation
+
+        rom = self.run(**params)
+        full = run_artery_simulation(**{**params, **self.fixed})
+
+        P_rom = np.array(rom["P_out_mmHg"])
+        P_full = np.array(full["P_out_mmHg"])
+        return {
+            "P_out_max_error_mmHg": float(np.max(np.abs(P_rom - P_full))),
+            "P_out_bound_mmHg": rom["error_estimate"]["P_out_bound_mmHg"],
+            "pulse_pressure_mmHg": float(np.ptp(P_full)),
+        }
+
+
+_surrogate = None
+
+
+def load_surrogate(path=ROM_PATH):
+    """Returns the stored surrogate (cached per process); raises FileNotFoundError if untrained."""
+    global _surrogate
+    if _surrogate is None:
+        _surrogate = ArterySurrogate.load(path)
+    return _surrogate
+
+
+if __name__ == "__main__":
+    rom = train_surrogate()
+    rom.save()
+    print(f"Saved surrogate to {ROM_PATH}")
+
+    for params in ({}, {"E": 2.0e6, "Rp": 1.0e9}, {"E": 0.9e6, "Rd": 1.5e10}):
+        check = rom.validate(**params)
+        print(params or "defaults", check)
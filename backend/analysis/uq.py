@@ -0,0 +1,411 @@
+# backend-python/analysis/uq.py
+"""
+Monte Carlo / quasi-Monte Carlo uncertainty quantification for artery_sim_full.
+
+Uncertain inputs : E, h, D_ref and the Windkessel Rp, Rd, Cw
+Outputs (QoIs)   : outlet systolic / diastolic / mean pressure [mmHg] and
+                   pulse-wave velocity [m/s]. The linearized model is
+                   non-dispersive, so PWV is the Moens–Korteweg speed c0;
+                   foot-to-foot transit over the short segment is dominated
+                   by the Windkessel reflection and is not used.
+
+Samples are drawn in batches (scrambled Sobol or Latin hypercube) and each
+batch runs as one vectorized ensemble: the MacCormack step works on
+(Nx, k) arrays with per-column parameters. Batches can also be spread over
+a process pool. Results stream into running moment (Welford/Chan) and P²
+quantile estimators, so memory does not grow with the sample count, and the
+run stops early once the statistics have converged.
+
+Usage:
+    python -m analysis.uq --samples 1024 --batch 64 --sampler sobol --workers 2
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from simulations.artery_sim_full import (
+    MACCORMACK_SCRATCH,
+    artery_parameters,
+    inlet_pressure,
+    maccormack_step_into,
+    mmHg_to_Pa,
+    step_coefficients,
+)
+from solvers.workspace import Workspace
+
+# name -> (distribution, *arguments); lognormal takes (median, coefficient of variation)
+UNCERTAIN_PARAMS = {
+    "E": ("lognormal", 1.5e6, 0.20),
+    "h": ("lognormal", 3.0e-4, 0.10),
+    "D_ref": ("lognormal", 3.0e-3, 0.05),
+    "Rp": ("lognormal", 6.7e8, 0.20),
+    "Rd": ("lognormal", 1.0e10, 0.20),
+    "Cw": ("lognormal", 1.5e-11, 0.20),
+}
+
+QOI_NAMES = ["P_out_sys_mmHg", "P_out_dia_mmHg", "P_out_mean_mmHg", "PWV"]
+
+
+# -------------------------
+# Sampling
+# -------------------------
+
+# Joe–Kuo direction numbers (new-joe-kuo-6.21201): (s, a, m_1..m_s) for dimensions 2..
+_SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+]
+_SOBOL_BITS = 32
+
+
+def _sobol_direction_vectors(d):
+    if d > len(_SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"Sobol sampler supports up to {len(_SOBOL_DIRECTIONS) + 1} dimensions")
+
+    V = np.zeros((d, _SOBOL_BITS), dtype=np.uint64)
+    V[0] = [1 << (_SOBOL_BITS - k) for k in range(1, _SOBOL_BITS + 1)]
+
+    for j in range(1, d):
+        s, a, m = _SOBOL_DIRECTIONS[j - 1]
+        v = [0] * (_SOBOL_BITS + 1)
+        for k in range(1, s + 1):
+            v[k] = m[k - 1] << (_SOBOL_BITS - k)
+        for k in range(s + 1, _SOBOL_BITS + 1):
+            v[k] = v[k - s] ^ (v[k - s] >> s)
+            for i in range(1, s):
+                if (a >> (s - 1 - i)) & 1:
+                    v[k] ^= v[k - i]
+        V[j] = v[1:]
+    return V
+
+
+def sobol(start, n, d, seed=None):
+    """
+    Points start..start+n-1 of the d-dimensional Sobol sequence in (0, 1).
+
+    With a seed the points get a random digital shift (XOR scramble), which
+    keeps the net structure and moves the first point off the origin.
+    """
+    V = _sobol_direction_vectors(d)
+    idx = np.arange(start, start + n, dtype=np.uint64)
+    gray = idx ^ (idx >> np.uint64(1))
+
+    X = np.zeros((n, d), dtype=np.uint64)
+    for k in range(_SOBOL_BITS):
+        bit = (gray >> np.uint64(k)) & np.uint64(1)
+        X ^= bit[:, None] * V[:, k]
+
+    if seed is not None:
+        shift = np.random.default_rng(seed).integers(0, 2**_SOBOL_BITS, size=d, dtype=np.uint64)
+        X ^= shift
+
+    # centre the points in their 2^-32 cells so the unit interval is open
+    return (X.astype(float) + 0.5) / 2.0**_SOBOL_BITS
+
+
+def latin_hypercube(n, d, rng):
+    """One Latin hypercube of n points in (0, 1)^d."""
+    strata = np.argsort(rng.random((n, d)), axis=0)
+    return (strata + rng.random((n, d))) / n
+
+
+def to_parameters(unit, uncertain=None):
+    """Maps unit-cube samples (n, d) to parameter arrays via inverse CDFs."""
+    uncertain = uncertain or UNCERTAIN_PARAMS
+    normal = np.vectorize(NormalDist().inv_cdf)
+    params = {}
+    for j, (name, (dist, *args)) in enumerate(uncertain.items()):
+        u = unit[:, j]
+        if dist == "uniform":
+            lo, hi = args
+            params[name] = lo + u * (hi - lo)
+        elif dist == "lognormal":
+            median, cv = args
+            sigma = np.sqrt(np.log1p(cv**2))
+            params[name] = median * np.exp(sigma * normal(u))
+        else:
+            raise ValueError(f"Unknown distribution '{dist}' for {name}")
+    return params
+
+
+# -------------------------
+# Vectorized ensemble solver
+# -------------------------
+def simulate_batch(samples, N_cycles=2, **fixed):
+    """
+    Runs one ensemble (all samples at once) and returns the QoIs per sample.
+    Statistics use the last heart cycle. Samples that violate the CFL
+    condition are returned as NaN.
+    """
+    prm = artery_parameters(N_cycles=N_cycles, **fixed, **samples)
+    Nx, Nt, dt, dz = prm["Nx"], prm["Nt"], prm["dt"], prm["dz"]
+    alpha, P_ref = prm["alpha"], prm["P_ref"]
+    k = len(next(iter(samples.values())))
+
+    P_in = inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"])
+    A_in = (P_in[:, None] - P_ref) / alpha
+
+    n_cycle = int(round(prm["T_heart"] / dt))
+    first = max(Nt - n_cycle, 0)
+
+    ws = Workspace((Nx, k), ("A", "Q"), MACCORMACK_SCRATCH)
+    coef = step_coefficients(prm)
+    Q_out_hist = np.zeros((3, k))
+    P_out = np.empty((Nt - first, k))
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for n in range(Nt):
+            maccormack_step_into(ws, Q_out_hist, A_in[n], coef, wk_active=n >= 2)
+            if n >= first:
+                P_out[n - first] = P_ref + alpha * ws.cur["A"][-1]
+
+    P_mmHg = P_out / mmHg_to_Pa
+
+    qoi = {
+        "P_out_sys_mmHg": P_mmHg.max(axis=0),
+        "P_out_dia_mmHg": P_mmHg.min(axis=0),
+        "P_out_mean_mmHg": P_mmHg.mean(axis=0),
+        "PWV": np.broadcast_to(prm["c0"], (k,)).astype(float),
+    }
+
+    unstable = (prm["c0"] * dt / dz > 1.0) | ~np.all(np.isfinite(P_out), axis=0)
+    for values in qoi.values():
+        values[unstable] = np.nan
+    return qoi
+
+
+def _run_batch(args):
+    samples, fixed = args
+    return simulate_batch(samples, **fixed)
+
+
+# -------------------------
+# Streaming statistics
+# -------------------------
+class RunningMoments:
+    """Mean, variance, min and max of a stream, merged batch-wise (Chan et al.)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        nb = len(values)
+        if nb == 0:
+            return
+        mean_b = values.mean()
+        m2_b = np.sum((values - mean_b)**2)
+
+        n = self.n + nb
+        delta = mean_b - self.mean
+        self.mean += delta * nb / n
+        self.m2 += m2_b + delta**2 * self.n * nb / n
+        self.n = n
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def sem(self):
+        """Standard error of the mean."""
+        return np.sqrt(self.var / self.n) if self.n > 0 else np.inf
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with five markers (Jain & Chlamtac's P²
+    algorithm): O(1) memory regardless of the number of samples.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.pos = np.arange(1.0, 6.0)
+        self.desired = np.array([1.0, 1 + 2*p, 1 + 4*p, 3 + 2*p, 5.0])
+        self.increment = np.array([0.0, p/2, p, (1 + p)/2, 1.0])
+
+    def update(self, values):
+        for x in np.asarray(values, dtype=float).ravel():
+            if np.isfinite(x):
+                self._add(x)
+
+    def _add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = int(np.searchsorted(q, x, side="right")) - 1
+
+        self.pos[k + 1:] += 1
+        self.desired += self.increment
+
+        for i in (1, 2, 3):
+            d = self.desired[i] - self.pos[i]
+            if (d >= 1 and self.pos[i + 1] - self.pos[i] > 1) or \
+               (d <= -1 and self.pos[i - 1] - self.pos[i] < -1):
+                d = 1.0 if d > 0 else -1.0
+                h = self._parabolic(i, d)
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + d * (q[i + int(d)] - q[i]) / (self.pos[i + int(d)] - self.pos[i])
+                q[i] = h
+                self.pos[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.pos
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self):
+        q = self.heights
+        if len(q) < 5:
+            return float(np.quantile(q, self.p)) if q else np.nan
+        return q[2]
+
+
+# -------------------------
+# Runner
+# -------------------------
+def _batches(n_max, batch_size, sampler, d, seed):
+    rng = np.random.default_rng(seed)
+    start = 0
+    while start < n_max:
+        n = min(batch_size, n_max - start)
+        if sampler == "sobol":
+            yield sobol(start, n, d, seed=seed)
+        elif sampler == "lhs":
+            yield latin_hypercube(n, d, rng)
+        elif sampler == "mc":
+            yield rng.random((n, d))
+        else:
+            raise ValueError(f"Unknown sampler '{sampler}'")
+        start += n
+
+
+def run_uq(n_max=1024, batch_size=64, sampler="sobol", workers=1, rtol=2e-3,
+           min_samples=128, quantiles=(0.05, 0.5, 0.95), seed=0,
+           uncertain=None, **fixed):
+    """
+    Streams batches of samples through the ensemble solver until n_max
+    samples are done or every statistic has converged.
+
+    Convergence: relative standard error of each mean below rtol and no
+    quantile moving by more than rtol (relative) over the last batch.
+    Returns a JSON-friendly report with statistics and convergence history.
+    """
+    start_time = time.perf_counter()
+    uncertain = uncertain or UNCERTAIN_PARAMS
+    if sampler == "sobol" and batch_size & (batch_size - 1):
+        raise ValueError("Sobol batches must be a power of two to keep balanced nets")
+
+    moments = {q: RunningMoments() for q in QOI_NAMES}
+    qtrack = {q: [P2Quantile(p) for p in quantiles] for q in QOI_NAMES}
+    history = []
+    rejected = 0
+    converged = False
+
+    batches = (to_parameters(u, uncertain) for u in _batches(n_max, batch_size, sampler, len(uncertain), seed))
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        while not converged:
+            wave = [b for _, b in zip(range(workers), batches)]
+            if not wave:
+                break
+            if pool:
+                results = pool.map(_run_batch, [(b, fixed) for b in wave])
+            else:
+                results = (simulate_batch(b, **fixed) for b in wave)
+
+            for qoi in results:
+                rejected += int(np.sum(~np.isfinite(qoi[QOI_NAMES[0]])))
+                before = {q: [t.value for t in qtrack[q]] for q in QOI_NAMES}
+                for q in QOI_NAMES:
+                    moments[q].update(qoi[q])
+                    for t in qtrack[q]:
+                        t.update(qoi[q])
+
+                rel_sem = max(
+                    moments[q].sem / abs(moments[q].mean) if moments[q].mean else np.inf
+                    for q in QOI_NAMES
+                )
+                q_change = max(
+                    abs(t.value - b) / abs(t.value) if t.value else np.inf
+                    for q in QOI_NAMES for t, b in zip(qtrack[q], before[q])
+                )
+                n = moments[QOI_NAMES[0]].n
+                history.append({"n": n, "rel_sem": float(rel_sem), "quantile_change": float(q_change)})
+
+                if n >= min_samples and rel_sem < rtol and q_change < rtol:
+                    converged = True
+                    break
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    stats = {}
+    for q in QOI_NAMES:
+        m = moments[q]
+        stats[q] = {
+            "mean": float(m.mean),
+            "std": float(np.sqrt(m.var)),
+            "sem": float(m.sem),
+            "min": float(m.min),
+            "max": float(m.max),
+            "quantiles": {str(p): float(t.value) for p, t in zip(quantiles, qtrack[q])},
+        }
+
+    return {
+        "n_samples": moments[QOI_NAMES[0]].n,
+        "rejected": rejected,
+        "sampler": sampler,
+        "converged": converged,
+        "statistics": stats,
+        "convergence": history,
+        "elapsed_s": time.perf_counter() - start_time,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UQ study for artery_sim_full")
+    parser.add_argument("--samples", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--sampler", choices=["sobol", "lhs", "mc"], default="sobol")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rtol", type=float, default=2e-3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run_uq(n_max=args.samples, batch_size=args.batch, sampler=args.sampler,
+                    workers=args.workers, rtol=args.rtol, seed=args.seed)
+    print(json.dumps({k: v for k, v in report.items() if k != "convergence"}, indent=2))
@@ -0,0 +1,149 @@
+# backend-python/api/batch.py
+"""
+Batches of simulation requests (POST /simulations/batch).
+
+A batch is a list of (name, params) requests, each answered as
+/simulation/{name} answers it, or as /simulation-raw/{name} for simulations
+with a vectorized run_batch() hook (BATCH_REGISTRY, artery_sim_full), whose
+results are custom payloads. All requests are pre-flighted first, so an
+invalid one rejects the batch before anything runs. Then
+
+    identical requests (same pre-flight cache key) become one item,
+    items found in the result caches (the in-memory and shared caches and
+    the warm store, see controllers.cached_get) are answered from them,
+    items of a run_batch() simulation that differ only in its BATCH_PARAMS
+    form a group solved in one vectorized run (at most MAX_GROUP items),
+    every other item is a group of its own.
+
+Groups run PARALLEL at a time in threads, each through the scheduler
+(api/scheduler.py) at the summed pre-flight cost of its items, and their
+results are stored in the in-memory and shared caches under the keys of the
+single routes, so other requests and worker processes find them. The
+batch's Progress (api/runs.py) follows the steps of each group as it runs
+and cancels it mid-run; its CPU budget covers the whole batch.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from solvers.progress import Cancelled
+from .controllers import (
+    _resolve_simulation_name,
+    cached_get,
+    cached_put,
+    preflight,
+    run_batch_by_name,
+    run_simulation_by_name,
+)
+from .registry import BATCH_REGISTRY
+from .scheduler import SCHEDULER
+
+MAX_ITEMS = int(os.environ.get("SIM_BATCH_MAX_ITEMS", "64"))
+MAX_GROUP = int(os.environ.get("SIM_BATCH_MAX_GROUP", "16"))
+PARALLEL = int(os.environ.get("SIM_BATCH_PARALLEL", "2"))
+
+
+class Item:
+    """One distinct request of a batch and the batch indices asking for it."""
+
+    def __init__(self, name, params, estimate):
+        self.name, self.params, self.estimate = name, params, estimate
+        self.indices = []
+        self.result, self.hit = None, False
+
+    @property
+    def cost(self):
+        return self.estimate["wall_time_s"] if self.estimate else 0.0
+
+    @property
+    def key(self):
+        # the result cache key of the single route answering this request
+        key = self.estimate.get("cache_key") if self.estimate else None
+        if key is None:
+            return None
+        if self.name in BATCH_REGISTRY:
+            return key, "raw", False, None, None
+        return key, "simulation", None
+
+
+def plan(requests):
+    """
+    (items, groups to run) of a batch of (name, params) requests. Raises
+    like preflight(), with the index of the failing request in the message.
+    """
+    if len(requests) > MAX_ITEMS:
+        raise ValueError(f"A batch takes at most {MAX_ITEMS} requests, got {len(requests)}")
+
+    items = {}
+    for index, (name, params) in enumerate(requests):
+        try:
+            name = _resolve_simulation_name(name)
+            params, estimate = preflight(name, **params)
+        except (KeyError, ValueError) as e:
+            e.args = (f"Request {index}: {e.args[0]}",) + e.args[1:]
+            raise
+        item = Item(name, params, estimate)
+        identity = item.key or (name, json.dumps(params, sort_keys=True))
+        items.setdefault(identity, item).indices.append(index)
+    items = list(items.values())
+
+    groups, vectorized = [], {}
+    for item in items:
+        cached = cached_get(item.key)
+        if cached is not None:
+            item.result, item.hit = cached, True
+            continue
+        if item.name in BATCH_REGISTRY:
+            _, batch_params = BATCH_REGISTRY[item.name]
+            shared = tuple(sorted((k, v) for k, v in item.params.items() if k not in batch_params))
+            group = vectorized.get((item.name, shared))
+            if group is None or len(group) >= MAX_GROUP:
+                group = vectorized[(item.name, shared)] = []
+                groups.append(group)
+            group.append(item)
+        else:
+            groups.append([item])
+    return items, groups
+
+
+def _run_group(group, client, progress):
+    name = group[0].name
+    if progress is not None and progress.cancelled:
+        raise Cancelled(progress.label)
+    if name in BATCH_REGISTRY:
+        run = lambda: run_batch_by_name(name, [item.params for item in group], progress=progress)
+    else:
+        run = lambda: [run_simulation_by_name(name, progress=progress, **group[0].params)]
+    results = SCHEDULER.run(client, sum(item.cost for item in group), run, progress)
+    for item, result in zip(group, results):
+        item.result = result
+        cached_put(item.key, result)
+    return group
+
+
+def execute(items, groups, client, progress=None):
+    """
+    Answers {index, name, cache, result} of every request of a planned batch,
+    cached ones first and the others as their groups finish. A failing group
+    stops the batch (its exception is raised) and cancels the groups that
+    have not started.
+    """
+    def answers(item):
+        for index in item.indices:
+            yield {"index": index, "name": item.name, "cache": "hit" if item.hit else "miss",
+                   "result": item.result}
+
+    for item in items:
+        if item.hit:
+            yield from answers(item)
+    if not groups:
+        return
+    with ThreadPoolExecutor(max_workers=PARALLEL) as pool:
+        futures = [pool.submit(_run_group, group, client, progress) for group in groups]
+        try:
+            for future in as_completed(futures):
+                for item in future.result():
+                    yield from answers(item)
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,97 @@
+# backend-python/api/cache.py
+"""
+In-process cache of simulation results.
+
+Results are deterministic in the simulation's validated parameters, so the
+pre-flight cache key (solvers/manifest.py: simulation, manifest version,
+parameters) plus the run options that change the payload identify a
+result. The cache keeps the most recently used results of this worker
+within SIM_RESULT_CACHE_MB (default 256, or 32 with the cache shared by
+all workers of api/shared_cache.py, which then holds the bulk; 0 disables
+it). Results are nested lists of Python floats, about VALUE_BYTES each.
+Lookups and evictions are counted in api/metrics.py.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from . import metrics
+
+VALUE_BYTES = 32        # list slot + float object
+
+
+def result_bytes(result):
+    """Approximate memory of a result: its numbers times VALUE_BYTES."""
+    if isinstance(result, dict):
+        return sum(result_bytes(v) for v in result.values())
+    if isinstance(result, (list, tuple)):
+        if result and isinstance(result[0], (list, tuple, dict)):
+            return sum(result_bytes(v) for v in result)
+        return VALUE_BYTES * len(result)
+    return VALUE_BYTES
+
+
+class ResultCache:
+    """Least-recently-used map of result keys to results, within a memory budget."""
+
+    def __init__(self, max_mb=256.0):
+        self.max_bytes = max_mb * 2**20
+        self._items = OrderedDict()         # key: (result, bytes)
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """The cached result, or None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+        metrics.CACHE_REQUESTS.inc(result="miss" if item is None else "hit")
+        return None if item is None else item[0]
+
+    def put(self, key, value):
+        size = result_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (value, size)
+            self.bytes += size
+            evicted = 0
+            while self.bytes > self.max_bytes:
+                _, (_, dropped) = self._items.popitem(last=False)
+                self.bytes -= dropped
+                evicted += 1
+            entries, total = len(self._items), self.bytes
+        if evicted:
+            metrics.CACHE_EVICTIONS.inc(evicted)
+        metrics.CACHE_ENTRIES.set(entries)
+        metrics.CACHE_BYTES.set(total)
+
+    def get_or_run(self, key, run):
+        """
+        (result, hit): the cached result for key, or run() stored under it.
+        key None (no cache key for the request) always runs.
+        """
+        if key is None or self.max_bytes <= 0:
+            return run(), False
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = run()
+        self.put(key, value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+        metrics.CACHE_ENTRIES.set(0)
+        metrics.CACHE_BYTES.set(0)
+
+
+RESULTS = ResultCache(float(os.environ.get(
+    "SIM_RESULT_CACHE_MB", "32" if os.environ.get("SIM_SHARED_CACHE_DIR") else "256"
+)))
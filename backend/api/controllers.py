@@ -1,5 +1,36 @@
-from .registry import SIMULATION_REGISTRY
+from .registry import BATCH_REGISTRY, MANIFEST_REGISTRY, SIMULATION_REGISTRY, STATE_SPACE_REGISTRY
+from . import metrics
+from .cache import RESULTS
+from .payload import simulation_payload
+from .shared_cache import SHARED
+from .warm import WARMER
+from utils.encoder import to_lists
 import inspect
+import math
+import os
+import time
+
+from solvers import precision as fp
+
+# Pre-flight limits for a single request
+MAX_WALL_TIME_S = 60.0
+MAX_MEMORY_MB = 1024.0
+CFL_TARGET = 0.9        # fraction of the scheme's CFL limit when dt is reduced
+MIN_CELLS = 32          # coarsening stops at this many grid points
+PREVIEW_WALL_TIME_S = float(os.environ.get("SIM_PREVIEW_S", "0.25"))   # budget of a coarse preview run
+PREVIEW_FACTORS = (2, 3, 4, 6, 8)   # coarsening of grid and time step tried for a preview
+PREVIEW_VALUE_COST_S = 1.5e-6       # JSON encoding time per output value, counted for a preview
+
+# measured wall time per step, per simulation (exponential moving average)
+_STEP_COST = {}
+
+
+class PreflightRejected(ValueError):
+    """The request is unstable or too expensive and cannot be reshaped."""
+
+    def __init__(self, message, estimate):
+        super().__init__(message)
+        self.estimate = estimate
 
 
 def _resolve_simulation_name(name: str) -> str:
@@ -19,59 +50,460 @@ def _resolve_simulation_name(name: str) -> str:
     raise KeyError(f"Simulation '{name}' not found")
 
 
-def normalize_result(result):
+def _accepted_params(resolved_name, params):
     """
-    Ensures the simulation output format is always standardized.
-    Acceptable formats:
-       (x, times, a, q)
-       (x, times, a_arr, q_arr)
+    Validated parameters for a simulation: its manifest coerces, range-checks
+    and fills defaults (ValueError on unknown or invalid values). Simulations
+    without a manifest fall back to their run_simulation signature.
     """
-    if len(result) != 4:
-        raise RuntimeError("Simulation must return 4 values")
+    manifest = MANIFEST_REGISTRY.get(resolved_name)
+    if manifest is not None:
+        return manifest.validate(params)
 
-    x, times, a, q = result
-    return x, times, a, q
+    sig = inspect.signature(SIMULATION_REGISTRY[resolved_name])
+    return {k: v for k, v in params.items() if v is not None and k in sig.parameters}
 
 
-def run_simulation_by_name(name, **params):
-    resolved_name = _resolve_simulation_name(name)
-    sim_func = SIMULATION_REGISTRY[resolved_name]
+def _timed_run(resolved_name, sim_func, params, **options):
+    """
+    Run the simulation (options are passed to it but are not manifest
+    parameters), book it in api/metrics.py and fold its wall time per step
+    into _STEP_COST. Runs on an explicitly chosen kernel backend or
+    precision are not folded in, since the estimate is for the default ones.
+    """
+    metrics.JOBS.inc(state="active")
+    try:
+        start = time.perf_counter()
+        result = sim_func(**params, **options)
+        elapsed = time.perf_counter() - start
+    finally:
+        metrics.JOBS.dec(state="active")
 
-    # Filter params to only those accepted by the target simulation
-    if params:
-        sig = inspect.signature(sim_func)
-        accepted = {
-            k: v
-            for k, v in params.items()
-            if v is not None and k in sig.parameters
-        }
-        result = sim_func(**accepted) if accepted else sim_func()
-    else:
-        result = sim_func()  # call simulation with defaults
+    manifest = MANIFEST_REGISTRY.get(resolved_name)
+    steps = None
+    if manifest is not None and manifest.numerics is not None:
+        steps = manifest.numerics(**params)["Nt"]
+    metrics.observe_run(resolved_name, elapsed, steps)
+    if steps is not None and not options.keys() & {"backend", "precision"}:
+        per_step = elapsed / max(steps, 1)
+        old = _STEP_COST.get(resolved_name)
+        _STEP_COST[resolved_name] = per_step if old is None else 0.7 * old + 0.3 * per_step
+    return result
 
-    x, times, a, q = normalize_result(result)
 
-    def to_list(v):
-        return v.tolist() if hasattr(v, "tolist") else v
+def cached_run(estimate, options, run, progress=None):
+    """
+    (result, hit): run() through the result cache (api/cache.py), keyed by
+    the pre-flight cache key and the options that change the payload. On a
+    miss the cache shared by the worker processes (api/shared_cache.py,
+    when enabled) and then the warm result store (api/warm.py) are
+    consulted before running. Requests without a cache key always run.
+    progress, when given, cancels a wait for another worker's run of the
+    same key.
+    """
+    key = estimate.get("cache_key") if estimate else None
+    key = key and (key, *options)
+    found = []
+
+    def load_or_run():
+        result = WARMER.store.get(key) if key in WARMER.store else None
+        if result is None:
+            return run()
+        found.append("warm")
+        return result
 
+    def shared_or_run():
+        if SHARED is None:
+            return load_or_run()
+        result, hit = SHARED.get_or_run(key, load_or_run, progress)
+        if not hit:
+            return result
+        found.append("shared")
+        return to_lists(result)         # mapped arrays -> lists for the JSON response
+
+    result, hit = RESULTS.get_or_run(key, shared_or_run)
+    return result, hit or bool(found)
+
+
+def cached_get(key):
+    """
+    The result under a full result cache key (pre-flight key and options),
+    looked up as cached_run does: the in-memory cache, the shared cache,
+    the warm store; None when none has it. Lower layers' results enter the
+    in-memory cache.
+    """
+    if key is None:
+        return None
+    result = RESULTS.get(key)
+    if result is not None:
+        return result
+    if SHARED is not None:
+        result = SHARED.get(key)
+        if result is not None:
+            result = to_lists(result)
+    if result is None and key in WARMER.store:
+        result = WARMER.store.get(key)
+    if result is not None:
+        RESULTS.put(key, result)
+    return result
+
+
+def cached_put(key, result):
+    """Store a result computed outside cached_run in the in-memory and shared caches."""
+    if key is None:
+        return
+    RESULTS.put(key, result)
+    if SHARED is not None:
+        SHARED.put(key, result)
+
+
+def simulation_manifest(name):
+    """Declared parameters and outputs of a simulation, plus the cost of a default run."""
+    resolved_name = _resolve_simulation_name(name)
+    manifest = MANIFEST_REGISTRY.get(resolved_name)
+    if manifest is None:
+        raise KeyError(f"Simulation '{name}' has no manifest")
     return {
-        "x": to_list(x),
-        "times": to_list(times),
-        "a": to_list(a),
-        "q": to_list(q),
+        **manifest.to_dict(),
+        "default_output_shapes": manifest.output_shapes(),
+        "default_cost_s": manifest.cost(step_cost_s=_STEP_COST.get(resolved_name)),
+    }
+
+
+def preflight(name, **params):
+    """
+    Estimate CFL, von Neumann amplification, steps, wall time and peak
+    memory of a request from the simulation's numerics() declaration
+    in its manifest (see solvers/stability.py), before anything runs.
+
+    An unstable time step is reduced to CFL_TARGET of the limit and a run
+    over budget is coarsened (grid and time step together, keeping the CFL
+    number; output decimation for memory) when the simulation declares
+    those parameters as adjustable. Otherwise PreflightRejected is raised.
+
+    Returns (params to run with, estimate); the estimate is None for
+    simulations without numerics().
+    """
+    resolved_name = _resolve_simulation_name(name)
+    params = _accepted_params(resolved_name, params)
+    manifest = MANIFEST_REGISTRY.get(resolved_name)
+    if manifest is None or manifest.numerics is None:
+        return params, None
+
+    from solvers.stability import estimate
+
+    def current():
+        num = manifest.numerics(**params)
+        return num, estimate(num, _STEP_COST.get(resolved_name))
+
+    num, est = current()
+    resolution = num.get("resolution", {})
+    adjusted = {}
+
+    if not est["stable"]:
+        if "dt" not in resolution:
+            raise PreflightRejected(
+                f"Unstable: CFL = {est['cfl']:.3f}, amplification = {est['amplification']:.4f}", est
+            )
+        params[resolution["dt"]] = adjusted["dt"] = CFL_TARGET * est["cfl_limit"] * num["dz"] / num["c"]
+        num, est = current()
+
+    while (est["wall_time_s"] > MAX_WALL_TIME_S and est["cells"] > MIN_CELLS
+           and "dt" in resolution and "dz" in resolution):
+        # cost ~ 1 / (dz dt) at most: scale both by the same factor to keep the CFL number
+        factor = min(1.05 * math.sqrt(est["wall_time_s"] / MAX_WALL_TIME_S), est["cells"] / MIN_CELLS)
+        params[resolution["dt"]] = adjusted["dt"] = num["dt"] * factor
+        params[resolution["dz"]] = adjusted["dz"] = num["dz"] * factor
+        num, est = current()
+
+    if est["peak_memory_mb"] > MAX_MEMORY_MB and "save_every" in resolution:
+        factor = math.ceil(est["peak_memory_mb"] / MAX_MEMORY_MB)
+        params[resolution["save_every"]] = adjusted["save_every"] = num["save_every"] * factor
+        num, est = current()
+
+    est["adjusted"] = adjusted
+    est["cache_key"] = manifest.cache_key(params)
+    if not est["stable"]:
+        raise PreflightRejected("Unstable after reducing the time step", est)
+    if est["wall_time_s"] > MAX_WALL_TIME_S:
+        raise PreflightRejected(
+            f"Estimated wall time {est['wall_time_s']:.0f} s exceeds the {MAX_WALL_TIME_S:.0f} s limit", est
+        )
+    if est["peak_memory_mb"] > MAX_MEMORY_MB:
+        raise PreflightRejected(
+            f"Estimated memory {est['peak_memory_mb']:.0f} MB exceeds the {MAX_MEMORY_MB:.0f} MB limit", est
+        )
+    return params, est
+
+
+def preview_params(name, params):
+    """
+    Parameters of a coarse preview of a validated request: grid and time
+    step coarsened together (keeping the CFL number) by the smallest of
+    PREVIEW_FACTORS estimated to be answered within PREVIEW_WALL_TIME_S
+    (run and JSON encoding of its output; or the largest factor that keeps
+    MIN_CELLS and the declared ranges), and the output decimation reduced
+    accordingly so the preview has at most as many frames.
+    Fixed factors keep the preview's cache key stable as the measured step
+    cost changes. Returns (params, estimate), or None when the simulation
+    cannot be coarsened or the request is already that fast.
+    """
+    resolved_name = _resolve_simulation_name(name)
+    manifest = MANIFEST_REGISTRY.get(resolved_name)
+    if manifest is None or manifest.numerics is None:
+        return None
+
+    from solvers.stability import estimate
+
+    num = manifest.numerics(**params)
+    resolution = num.get("resolution", {})
+    if "dt" not in resolution or "dz" not in resolution:
+        return None
+    step_cost = _STEP_COST.get(resolved_name)
+
+    def answer_time(num, est):
+        return est["wall_time_s"] + PREVIEW_VALUE_COST_S * num.get("n_output_values", 0)
+
+    if answer_time(num, estimate(num, step_cost)) <= PREVIEW_WALL_TIME_S:
+        return None
+
+    preview = None
+    for factor in PREVIEW_FACTORS:
+        coarse = {**params, resolution["dt"]: num["dt"] * factor, resolution["dz"]: num["dz"] * factor}
+        if "save_every" in resolution:
+            coarse[resolution["save_every"]] = math.ceil(num["save_every"] / factor)
+        try:
+            coarse = manifest.validate(coarse)
+        except ValueError:
+            break               # coarsened out of the declared ranges
+        coarse_num = manifest.numerics(**coarse)
+        est = estimate(coarse_num, step_cost)
+        if not est["stable"] or coarse_num["Nx"] < MIN_CELLS:
+            break
+        est["adjusted"] = {k: coarse[resolution[k]] for k in ("dt", "dz")}
+        est["cache_key"] = manifest.cache_key(coarse)
+        preview = coarse, est
+        if answer_time(coarse_num, est) <= PREVIEW_WALL_TIME_S:
+            break
+    return preview
+
+
+def server_timing(phases):
+    """Server-Timing header value for {phase: seconds}, shown by browser dev tools."""
+    return ", ".join(f"{name};dur={1e3 * seconds:.1f}" for name, seconds in phases.items())
+
+
+def preflight_headers(estimate):
+    """Response headers carrying a pre-flight estimate."""
+    if estimate is None:
+        return {}
+    headers = {
+        "X-Preflight-CFL": f"{estimate['cfl']:.4f}",
+        "X-Preflight-Amplification": f"{estimate['amplification']:.6f}",
+        "X-Preflight-Steps": str(estimate["steps"]),
+        "X-Preflight-Wall-Time-S": f"{estimate['wall_time_s']:.3f}",
+        "X-Preflight-Peak-Memory-MB": f"{estimate['peak_memory_mb']:.1f}",
     }
+    if estimate.get("cache_key"):
+        headers["X-Cache-Key"] = estimate["cache_key"]
+    if estimate.get("adjusted"):
+        headers["X-Preflight-Adjusted"] = ",".join(
+            f"{k}={v:.6g}" for k, v in estimate["adjusted"].items()
+        )
+    return headers
+
+
+def _precision_option(precision):
+    """run_simulation options for a precision mode (solvers/precision.py); float64 is the default."""
+    if precision is None or fp.check(precision) == "float64":
+        return {}
+    return {"precision": precision}
+
+
+def _progress_option(sim_func, progress):
+    """run_simulation options for a solvers/progress.py Progress, if the simulation takes one."""
+    if progress is None:
+        return {}
+    parameters = inspect.signature(sim_func).parameters
+    if "progress" in parameters or any(p.kind == p.VAR_KEYWORD for p in parameters.values()):
+        return {"progress": progress}
+    return {}
+
+
+def run_simulation_by_name(name, precision=None, progress=None, **params):
+    resolved_name = _resolve_simulation_name(name)
+    sim_func = SIMULATION_REGISTRY[resolved_name]
+
+    result = _timed_run(resolved_name, sim_func, _accepted_params(resolved_name, params),
+                        **_precision_option(precision), **_progress_option(sim_func, progress))
+    return simulation_payload(result)
+
+
+def run_batch_by_name(name, params_list, progress=None):
+    """
+    Raw results of a simulation for several validated parameter sets, from
+    one vectorized run of its run_batch() hook; booked as a single run of
+    all their steps. progress (solvers/progress.py) follows and cancels the
+    run when the hook takes one.
+    """
+    resolved_name = _resolve_simulation_name(name)
+    run_batch, _ = BATCH_REGISTRY[resolved_name]
+    metrics.JOBS.inc(state="active")
+    try:
+        start = time.perf_counter()
+        results = run_batch(params_list, **_progress_option(run_batch, progress))
+        elapsed = time.perf_counter() - start
+    finally:
+        metrics.JOBS.dec(state="active")
+
+    manifest = MANIFEST_REGISTRY.get(resolved_name)
+    steps = None
+    if manifest is not None and manifest.numerics is not None:
+        steps = sum(manifest.numerics(**params)["Nt"] for params in params_list)
+    metrics.observe_run(resolved_name, elapsed, steps)
+    return results
 
 
 def list_simulations():
     return list(SIMULATION_REGISTRY.keys())
 
 
-def run_simulation_raw(name):
+FIDELITIES = ("0d", "1d")
+
+
+def run_simulation_raw(name, fidelity="1d", warm_start=False, backend=None, precision=None,
+                       timings=False, progress=None, initial_state=None, state_out=None, **params):
     """
     Run a simulation and return its raw output without normalization.
     Useful for simulations that return dictionaries or custom payloads
     (e.g., artery_sim_full time-series data).
+
+    fidelity="0d" answers with the lumped model (solvers/lumped.py) instead
+    of the 1-D solver; warm_start starts the 1-D run from the periodic 0-D
+    state. Both are only available for artery_sim_full, as is the choice of
+    kernel backend (python / numpy / jit, see solvers/backends.py).
+    precision="mixed"/"float32" runs the 1-D solver with a float32 state
+    and returns float32 values (solvers/precision.py).
+    timings adds the solver's per-phase wall times (solvers/instrument.py)
+    to the 1-D result as "timings"; an (x, times, a, q) result is then
+    returned as its {x, times, a, q} payload with them. progress (solvers/progress.py) follows
+    and cancels the 1-D run. initial_state starts the 1-D run from given
+    fields and state_out (a dict) receives its final ones, see
+    api/progressive.py.
     """
     resolved_name = _resolve_simulation_name(name)
+    if fidelity not in FIDELITIES:
+        raise ValueError(f"Unknown fidelity '{fidelity}' (expected one of {FIDELITIES})")
+    if (fidelity == "0d" or warm_start) and resolved_name != "artery_sim_full":
+        raise ValueError(f"Simulation '{name}' has no 0-D model")
+    if backend is not None and resolved_name != "artery_sim_full":
+        raise ValueError(f"Simulation '{name}' has no selectable kernel backend")
+    if (initial_state is not None or state_out is not None) and resolved_name != "artery_sim_full":
+        raise ValueError(f"Simulation '{name}' cannot start from a given state")
+
     sim_func = SIMULATION_REGISTRY[resolved_name]
-    return sim_func()
+    params = _accepted_params(resolved_name, params)
+
+    if fidelity == "0d":
+        from solvers.lumped import run_lumped
+
+        return run_lumped(periodic=warm_start, **params)
+
+    options = {"warm_start": True} if warm_start else {}
+    if initial_state is not None:
+        options["initial_state"] = initial_state
+    if state_out is not None:
+        options["state_out"] = state_out
+    clock = None
+    if timings and "clock" in inspect.signature(sim_func).parameters:
+        from solvers.instrument import PhaseTimer
+
+        clock = options["clock"] = PhaseTimer()
+    elif timings:
+        options["timings"] = True
+    options.update(_precision_option(precision))
+    options.update(_progress_option(sim_func, progress))
+    if backend is not None:
+        from solvers.backends import resolve
+
+        options["backend"] = resolve(backend)
+    result = _timed_run(resolved_name, sim_func, params, **options)
+    if clock is not None:
+        steps = MANIFEST_REGISTRY[resolved_name].numerics(**params)["Nt"]
+        result = {**simulation_payload(result), "timings": clock.breakdown(steps=steps)}
+    return result
+
+
+def kernel_backends():
+    """Kernel backends of this process: the resolved default and whether Numba is installed."""
+    from solvers import backends
+
+    return {
+        "backends": list(backends.BACKENDS),
+        "default": backends.resolve(),
+        "jit_available": backends.jit_available(),
+    }
+
+
+def run_surrogate(name, **params):
+    """
+    Evaluate the reduced-order surrogate of a simulation for fast parameter
+    queries. Only artery_sim_full has a surrogate (see analysis/rom.py);
+    it must have been trained with `python -m analysis.rom` beforehand.
+    """
+    resolved_name = _resolve_simulation_name(name)
+    if resolved_name != "artery_sim_full":
+        raise KeyError(f"No surrogate for simulation '{name}'")
+
+    from analysis.rom import load_surrogate
+
+    rom = load_surrogate()
+    return rom.run(**{k: v for k, v in params.items() if v is not None})
+
+
+def state_space_summary(name):
+    """
+    Assemble the linear step operator of a simulation and report its size,
+    sparsity and spectral radius (see analysis/linear_operator.py), so
+    stability can be checked without running it.
+    """
+    resolved_name = _resolve_simulation_name(name)
+    if resolved_name not in STATE_SPACE_REGISTRY:
+        raise KeyError(f"Simulation '{name}' has no linear state-space form")
+
+    from analysis.linear_operator import StateSpace
+
+    return StateSpace.from_hook(STATE_SPACE_REGISTRY[resolved_name]()).summary()
+
+
+def profiling_enabled():
+    """The debug profiler endpoint is off unless SIM_DEBUG_PROFILE=1."""
+    return os.environ.get("SIM_DEBUG_PROFILE") == "1"
+
+
+def profile_simulation(name, mode="sample", interval_ms=1.0, **params):
+    """
+    Run a simulation under a profiler (solvers/instrument.py) and return the
+    profile instead of the result. mode="sample" gives stack samples as
+    folded text for flame graphs, mode="cprofile" per-function statistics.
+    """
+    from solvers import instrument
+
+    resolved_name = _resolve_simulation_name(name)
+    if mode not in instrument.PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}' (expected one of {instrument.PROFILE_MODES})")
+    if mode == "sample" and not interval_ms >= instrument.MIN_SAMPLE_INTERVAL_S * 1e3:
+        raise ValueError(f"interval_ms must be at least {instrument.MIN_SAMPLE_INTERVAL_S * 1e3}, "
+                         f"got {interval_ms}")
+    sim_func = SIMULATION_REGISTRY[resolved_name]
+    params = _accepted_params(resolved_name, params)
+
+    start = time.perf_counter()
+    if mode == "sample":
+        _, counts = instrument.sample_stacks(sim_func, interval=interval_ms / 1e3, **params)
+        profile = {"samples": sum(counts.values()), "folded": instrument.folded(counts)}
+    else:
+        _, rows = instrument.cprofile_stats(sim_func, **params)
+        profile = {"functions": rows}
+    return {"simulation": resolved_name, "params": params, "mode": mode,
+            "wall_s": time.perf_counter() - start, **profile}
@@ -0,0 +1,201 @@
+# backend-python/api/metrics.py
+"""
+Service metrics in the Prometheus text format (GET /metrics).
+
+Counters, gauges and histograms are kept in-process, one series per label
+combination, and rendered on each scrape; with several workers every
+worker is scraped (or reports) separately.
+
+    simulation_runs_total{simulation}           solver runs (cache misses)
+    simulation_duration_seconds{simulation}     histogram of run wall time
+    simulation_steps_total{simulation}          time steps run
+    simulation_steps_per_second{simulation}     rate of the last run
+    response_size_bytes{route}                  histogram of response bodies
+    result_cache_requests_total{result}         hit / miss of the result cache
+    result_cache_evictions_total                least recently used results dropped
+    result_cache_entries                        results held
+    result_cache_bytes                          their approximate memory
+    simulation_requests_in_flight               simulation requests received
+                                                and not yet answered
+    simulation_jobs{state}                      of those, solving (active) or
+                                                not (queued: waiting for a
+                                                thread, pre-flight, encoding)
+    process_resident_memory_bytes               RSS of this worker
+    process_cpu_seconds_total                   CPU time of this worker
+"""
+import math
+import os
+import sys
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(10**k for k in range(2, 9))        # 100 B ... 100 MB
+
+_lock = threading.Lock()
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help = name, help
+        self.labelnames = tuple(labelnames)
+        self.series = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}")
+        return tuple(labels[k] for k in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            items = sorted(self.series.items())
+        for key, value in items:
+            lines.extend(self._sample_lines(key, value))
+        return lines
+
+    def _sample_lines(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.series[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts, total = self.series.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[key] = (counts, total + value)
+
+    def _sample_lines(self, key, value):
+        counts, total = value
+        lines = [f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {n}"
+                 for bound, n in zip(self.buckets, counts)]
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {counts[-1]}")
+        return lines
+
+
+RUNS = Counter("simulation_runs_total", "Solver runs (result cache misses)", ("simulation",))
+DURATION = Histogram("simulation_duration_seconds", "Wall time of solver runs", ("simulation",))
+STEPS = Counter("simulation_steps_total", "Time steps run", ("simulation",))
+STEP_RATE = Gauge("simulation_steps_per_second", "Time steps per second of the last run", ("simulation",))
+RESPONSE_SIZE = Histogram("response_size_bytes", "Size of response bodies", ("route",), SIZE_BUCKETS)
+CACHE_REQUESTS = Counter("result_cache_requests_total", "Result cache lookups", ("result",))
+CACHE_EVICTIONS = Counter("result_cache_evictions_total", "Results evicted from the cache")
+CACHE_ENTRIES = Gauge("result_cache_entries", "Results held in the cache")
+CACHE_BYTES = Gauge("result_cache_bytes", "Approximate memory of the cached results")
+IN_FLIGHT = Gauge("simulation_requests_in_flight", "Simulation requests received and not yet answered")
+JOBS = Gauge("simulation_jobs", "Simulation requests solving (active) or waiting (queued)", ("state",))
+IN_FLIGHT.set(0)
+for _state in ("active", "queued"):
+    JOBS.set(0, state=_state)
+for _result in ("hit", "miss"):
+    CACHE_REQUESTS.inc(0, result=_result)
+CACHE_EVICTIONS.inc(0)
+CACHE_ENTRIES.set(0)
+CACHE_BYTES.set(0)
+
+
+def observe_run(simulation, seconds, steps=None):
+    """Book one solver run."""
+    RUNS.inc(simulation=simulation)
+    DURATION.observe(seconds, simulation=simulation)
+    if steps:
+        STEPS.inc(steps, simulation=simulation)
+        if seconds > 0:
+            STEP_RATE.set(steps / seconds, simulation=simulation)
+
+
+def _process_lines():
+    rss = None
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss     # no current RSS: the peak
+            rss = peak if sys.platform == "darwin" else peak * 1024        # bytes on macOS, KiB elsewhere
+        except ImportError:
+            pass
+    lines = [
+        "# HELP process_cpu_seconds_total User and system CPU time of this worker",
+        "# TYPE process_cpu_seconds_total counter",
+        f"process_cpu_seconds_total {_number(time.process_time())}",
+    ]
+    if rss is not None:
+        lines += [
+            "# HELP process_resident_memory_bytes Resident memory of this worker",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {rss}",
+        ]
+    return lines
+
+
+def render():
+    """All metrics of this process as Prometheus exposition text."""
+    with _lock:
+        queued = IN_FLIGHT.series[()] - JOBS.series[("active",)]
+    JOBS.set(max(queued, 0), state="queued")
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    lines.extend(_process_lines())
+    return "\n".join(lines) + "\n"
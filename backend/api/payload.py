@@ -0,0 +1,39 @@
+# backend-python/api/payload.py
+"""
+The /simulation/{name} payload of a run_simulation() result.
+
+Kept apart from api/controllers.py so processes that run one simulation
+module (the warmer's pool workers, api/warm_worker.py) can build it without
+importing api/registry.py, which imports every simulation module.
+"""
+from solvers import precision as fp
+
+
+def normalize_result(result):
+    """
+    Ensures the simulation output format is always standardized.
+    Acceptable formats:
+       (x, times, a, q)
+       (x, times, a_arr, q_arr)
+    """
+    if len(result) != 4:
+        raise RuntimeError("Simulation must return 4 values")
+
+    x, times, a, q = result
+    return x, times, a, q
+
+
+def simulation_payload(result):
+    """{x, times, a, q} as lists, from an (x, times, a, q) result."""
+    x, times, a, q = normalize_result(result)
+
+    def to_list(v):
+        # float32 arrays (reduced precision runs) as their shortest decimals
+        return fp.to_list(v) if hasattr(v, "tolist") else v
+
+    return {
+        "x": to_list(x),
+        "times": to_list(times),
+        "a": to_list(a),
+        "q": to_list(q),
+    }
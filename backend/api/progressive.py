@@ -0,0 +1,93 @@
+# backend-python/api/progressive.py
+"""
+Progressive refinement (GET /simulation-progressive/{name}).
+
+A request is answered in levels, streamed as NDJSON lines as they finish:
+
+    preview   the request on a coarse grid with a large time step
+              (controllers.preview_params, within PREVIEW_WALL_TIME_S)
+    full      the request itself
+
+so a client plots the preview within a few hundred milliseconds and
+replaces it when the full result arrives. Simulations that do not declare
+dt and dz adjustable, and requests that are already that fast, only have
+the full level. Each level is a request of its own for the result cache
+(api/cache.py), stored and evicted independently; the full level is the
+same entry as /simulation/{name} (or /simulation-raw/{name} with raw=1).
+
+With warm_start (raw artery_sim_full only), the full run starts from the
+preview's final state interpolated to the fine grid (refine_state) rather
+than from rest, so it begins close to the periodic steady state. Its result
+then differs from a cold start and is cached under its own key; the
+preview's final state is kept next to the preview result in the cache
+(for every raw artery_sim_full preview, so a later warm start can use it).
+Without that state (evicted) the full run starts cold.
+"""
+import time
+
+from .cache import RESULTS
+from .controllers import (
+    _resolve_simulation_name,
+    cached_run,
+    preview_params,
+    run_simulation_by_name,
+    run_simulation_raw,
+)
+
+SEEDABLE = ("artery_sim_full",)     # run_simulation takes initial_state / state_out
+
+
+def plan(name, params, estimate, raw=False, warm_start=False):
+    """[(level, params, estimate)] of a pre-flighted request, coarse first."""
+    resolved_name = _resolve_simulation_name(name)
+    if warm_start and not (raw and resolved_name in SEEDABLE):
+        raise ValueError(f"Simulation '{name}' cannot start from its preview (raw artery_sim_full only)")
+    preview = preview_params(resolved_name, params)
+    levels = [] if preview is None else [("preview", *preview)]
+    return levels + [("full", params, estimate)]
+
+
+def _key(estimate, *options):
+    key = estimate.get("cache_key") if estimate else None
+    return key and (key, *options)
+
+
+def run(name, levels, raw=False, warm_start=False, progress=None, schedule=None):
+    """
+    Yields {level, params, cache, elapsed_s, result} per level as it
+    finishes. schedule(estimate, run) wraps a solver call in admission
+    control (api/scheduler.py); None runs it directly.
+    """
+    options = ("raw", False, None, None) if raw else ("simulation", None)
+    seedable = raw and _resolve_simulation_name(name) in SEEDABLE
+    seed = None
+    for level, params, estimate in levels:
+        level_options, extra = options, {}
+        if level == "preview" and seedable:
+            extra["state_out"] = {}
+        elif level == "full" and warm_start and seed is not None:
+            from simulations.artery_sim_full import refine_state
+
+            preview, preview_estimate, state = seed
+            extra["initial_state"] = refine_state(state, preview["dt"], **params)
+            level_options = ("refined", preview_estimate["cache_key"])
+
+        def solve(params=params, extra=extra):
+            if raw:
+                return run_simulation_raw(name, progress=progress, **extra, **params)
+            return run_simulation_by_name(name, progress=progress, **params)
+
+        start = time.perf_counter()
+        result, hit = cached_run(estimate, level_options,
+                                 solve if schedule is None else schedule(estimate, solve), progress)
+        if "state_out" in extra:
+            state_key = _key(estimate, "state")
+            state = extra["state_out"].get("state")
+            if state is not None:
+                RESULTS.put(state_key, tuple(v.tolist() for v in state))
+            else:                   # preview from the cache
+                state = RESULTS.get(state_key)
+            if state is not None:
+                seed = (params, estimate, state)
+        yield {"level": level, "params": params, "cache": "hit" if hit else "miss",
+               "elapsed_s": time.perf_counter() - start, "result": result}
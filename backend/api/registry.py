@@ -3,6 +3,9 @@ import os
 import simulations
 
 SIMULATION_REGISTRY = {}
+STATE_SPACE_REGISTRY = {}   # linear schemes exposing state_space()
+MANIFEST_REGISTRY = {}      # declared parameters/outputs/cost (solvers/manifest.py)
+BATCH_REGISTRY = {}         # vectorized run_batch(params_list) and the BATCH_PARAMS its sets may differ in
 
 sim_dir = os.path.dirname(simulations.__file__)
 
@@ -14,5 +17,11 @@ for file in os.listdir(sim_dir):
 
         if hasattr(module, "run_simulation"):
             SIMULATION_REGISTRY[file[:-3]] = module.run_simulation
+        if hasattr(module, "MANIFEST"):
+            MANIFEST_REGISTRY[file[:-3]] = module.MANIFEST
+        if hasattr(module, "state_space"):
+            STATE_SPACE_REGISTRY[file[:-3]] = module.state_space
+        if hasattr(module, "run_batch"):
+            BATCH_REGISTRY[file[:-3]] = (module.run_batch, module.BATCH_PARAMS)
 
 print("Loaded simulations:", SIMULATION_REGISTRY.keys())
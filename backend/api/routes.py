@@ -1,5 +1,30 @@
-from fastapi import APIRouter, HTTPException
-from .controllers import run_simulation_by_name, list_simulations, run_simulation_raw
+import asyncio
+import json
+import time
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from solvers.progress import BudgetExceeded, Cancelled
+from utils.encoder import pack
+from . import batch, metrics, progressive, runs
+from .scheduler import SCHEDULER, Saturated
+from .controllers import (
+    run_simulation_by_name,
+    list_simulations,
+    run_simulation_raw,
+    preflight,
+    preflight_headers,
+    PreflightRejected,
+    run_surrogate,
+    kernel_backends,
+    simulation_manifest,
+    state_space_summary,
+    server_timing,
+    cached_run,
+    profiling_enabled,
+    profile_simulation,
+)
 
 router = APIRouter()
 
@@ -7,31 +32,347 @@ router = APIRouter()
 def get_simulation_list():
     return list_simulations()
 
+
+@router.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@router.get("/backends")
+def get_backends():
+    return kernel_backends()
+
+def _cancelled():
+    return HTTPException(status_code=409, detail="Run cancelled")
+
+
+def _saturated(e):
+    return HTTPException(
+        status_code=429, detail={"message": str(e), "retry_after_s": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _client(request):
+    # the client for fair scheduling: its X-Client-Id header, or else its address
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "")
+
+
+def _scheduled(request, estimate, progress, run):
+    """run() through the admission control of api/scheduler.py, at the pre-flight cost."""
+    cost = estimate["wall_time_s"] if estimate else None
+    return lambda: SCHEDULER.run(_client(request), cost, run, progress)
+
+
+def _rejected(e):
+    return HTTPException(
+        status_code=422, detail=str(e), headers=preflight_headers(e.estimate)
+    )
+
+
 @router.get("/simulation/{name}")
 def get_simulation(
-    name: str,
-    T_FINAL: float | None = None,
-    A0: float | None = None,
-    Q0: float | None = None,
+    name: str, request: Request, response: Response, precision: str | None = None
 ):
+    # any other query parameter is a simulation parameter, validated by its manifest;
+    # `run` names the run for /progress (api/runs.py)
+    params = {k: v for k, v in request.query_params.items() if k not in ("precision", "run")}
+    progress = getattr(request.state, "progress", None)
     try:
-        return run_simulation_by_name(
-            name,
-            T_FINAL=T_FINAL,
-            A0=A0,
-            Q0=Q0,
+        start = time.perf_counter()
+        params, estimate = preflight(name, **params)
+        checked = time.perf_counter()
+        response.headers.update(preflight_headers(estimate))
+        result, hit = cached_run(
+            estimate, ("simulation", precision),
+            _scheduled(request, estimate, progress,
+                       lambda: run_simulation_by_name(name, precision=precision, progress=progress, **params)),
+            progress,
+        )
+        response.headers["X-Cache"] = "hit" if hit else "miss"
+        response.headers["Server-Timing"] = server_timing(
+            {"preflight": checked - start, "solve": time.perf_counter() - checked}
         )
+        return result
     except KeyError:
         raise HTTPException(status_code=404, detail="Simulation not found")
+    except PreflightRejected as e:
+        raise _rejected(e)
+    except Saturated as e:
+        raise _saturated(e)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Cancelled:
+        raise _cancelled()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/simulation-raw/{name}")
-def get_simulation_raw(name: str):
+def get_simulation_raw(
+    name: str,
+    request: Request,
+    response: Response,
+    fidelity: str = "1d",
+    warm_start: bool = False,
+    backend: str | None = None,
+    precision: str | None = None,
+    timings: bool = False,
+):
+    params = {
+        k: v for k, v in request.query_params.items()
+        if k not in ("fidelity", "warm_start", "backend", "precision", "timings", "run")
+    }
+    progress = getattr(request.state, "progress", None)
     try:
-        return run_simulation_raw(name)
+        start = checked = time.perf_counter()
+        if fidelity != "0d":
+            params, estimate = preflight(name, **params)
+            checked = time.perf_counter()
+            response.headers.update(preflight_headers(estimate))
+        else:
+            estimate = None
+        result, hit = cached_run(
+            None if timings else estimate, ("raw", warm_start, backend, precision),
+            _scheduled(request, estimate, progress, lambda: run_simulation_raw(
+                name, fidelity=fidelity, warm_start=warm_start, backend=backend,
+                precision=precision, timings=timings, progress=progress, **params
+            )),
+            progress,
+        )
+        response.headers["X-Cache"] = "hit" if hit else "miss"
+        response.headers["Server-Timing"] = server_timing(
+            {"preflight": checked - start, "solve": time.perf_counter() - checked}
+        )
+        return result
     except KeyError:
         raise HTTPException(status_code=404, detail="Simulation not found")
+    except PreflightRejected as e:
+        raise _rejected(e)
+    except Saturated as e:
+        raise _saturated(e)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Cancelled:
+        raise _cancelled()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/simulation-progressive/{name}")
+def get_simulation_progressive(name: str, request: Request, raw: bool = False, warm_start: bool = False):
+    # NDJSON: a coarse preview line (when the simulation can be coarsened), then the full result;
+    # raw=1 answers as /simulation-raw, warm_start=1 starts the full run from the preview.
+    # Errors of later levels are an {"error": ...} line
+    params = {k: v for k, v in request.query_params.items() if k not in ("raw", "warm_start", "run")}
+    progress = getattr(request.state, "progress", None)
+    try:
+        params, estimate = preflight(name, **params)
+        levels = progressive.plan(name, params, estimate, raw=raw, warm_start=warm_start)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    except PreflightRejected as e:
+        raise _rejected(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    answers = progressive.run(
+        name, levels, raw=raw, warm_start=warm_start, progress=progress,
+        schedule=lambda estimate, run: _scheduled(request, estimate, progress, run),
+    )
+    # the first level before the response starts, so its errors keep their status codes
+    try:
+        first = next(answers)
+    except Saturated as e:
+        raise _saturated(e)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Cancelled:
+        raise _cancelled()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def lines():
+        yield json.dumps(first) + "\n"
+        try:
+            for answer in answers:
+                yield json.dumps(answer) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers=preflight_headers(estimate))
+
+
+class BatchItem(BaseModel):
+    name: str
+    params: dict[str, float | int | str] = {}
+
+
+BATCH_FORMATS = ("binary", "json", "ndjson")
+
+
+@router.post("/simulations/batch")
+def post_simulation_batch(items: list[BatchItem], request: Request, format: str = "binary"):
+    # binary: one packed payload (utils/encoder.py); json: the same as JSON;
+    # ndjson: streamed, one line per request as its group finishes
+    if format not in BATCH_FORMATS:
+        raise HTTPException(status_code=422, detail=f"Unknown format '{format}' (expected one of {BATCH_FORMATS})")
+    progress = getattr(request.state, "progress", None)
+    try:
+        planned, groups = batch.plan([(item.name, item.params) for item in items])
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except PreflightRejected as e:
+        raise _rejected(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    answers = batch.execute(planned, groups, _client(request), progress)
+
+    if format == "ndjson":
+        def lines():
+            try:
+                for answer in answers:
+                    yield json.dumps(answer) + "\n"
+            except Exception as e:
+                yield json.dumps({"error": str(e)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    try:
+        payload = {"items": sorted(answers, key=lambda answer: answer["index"])}
+    except Saturated as e:
+        raise _saturated(e)
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Cancelled:
+        raise _cancelled()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if format == "json":
+        return payload
+    return Response(pack(payload), media_type="application/octet-stream")
+
+
+@router.get("/progress/{run}")
+def get_progress(run: str):
+    try:
+        return {"run": run, **runs.get(run).snapshot()}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+
+@router.delete("/progress/{run}")
+def cancel_run(run: str):
+    try:
+        return {"run": run, "cancelled": runs.cancel(run)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+
+@router.get("/progress/{run}/stream")
+async def stream_progress(run: str, interval: float = 0.5):
+    # server-sent events: one progress snapshot per interval until the run ends
+    try:
+        progress = runs.get(run)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    async def events():
+        while True:
+            snapshot = {"run": run, **progress.snapshot()}
+            yield f"data: {json.dumps(snapshot)}\n\n"
+            if snapshot["state"] not in ("pending", "running"):
+                return
+            await asyncio.sleep(max(interval, 0.05))
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@router.get("/preflight/{name}")
+def get_preflight(name: str, request: Request):
+    try:
+        params, estimate = preflight(name, **request.query_params)
+        return {"params": params, "estimate": estimate, "accepted": True}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    except PreflightRejected as e:
+        return {"detail": str(e), "estimate": e.estimate, "accepted": False}
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.get("/manifest/{name}")
+def get_manifest(name: str):
+    try:
+        return simulation_manifest(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Manifest not found")
+
+
+@router.get("/surrogate/{name}")
+def get_surrogate(
+    name: str,
+    E: float | None = None,
+    Rp: float | None = None,
+    Rd: float | None = None,
+):
+    try:
+        return run_surrogate(name, E=E, Rp=Rp, Rd=Rd)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Surrogate not found")
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=503,
+            detail="Surrogate not trained (run `python -m analysis.rom`)",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/state-space/{name}")
+def get_state_space(name: str):
+    try:
+        return state_space_summary(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="No state-space form for this simulation")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/debug/profile/{name}")
+def get_profile(
+    name: str,
+    request: Request,
+    mode: str = "sample",
+    interval_ms: float = 1.0,
+    format: str = "json",
+):
+    # opt-in (SIM_DEBUG_PROFILE=1): profiling runs the full simulation
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    params = {
+        k: v for k, v in request.query_params.items()
+        if k not in ("mode", "interval_ms", "format")
+    }
+    try:
+        params, _ = preflight(name, **params)
+        profile = profile_simulation(name, mode=mode, interval_ms=interval_ms, **params)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    except PreflightRejected as e:
+        raise _rejected(e)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if format == "folded" and mode == "sample":
+        return PlainTextResponse(profile["folded"])
+    return profile
@@ -0,0 +1,109 @@
+# backend-python/api/runs.py
+"""
+Progress and cancellation of simulation requests.
+
+Every /simulation/{name}, /simulation-raw/{name},
+/simulation-progressive/{name} and /simulations/batch request is a run
+with a solvers/progress.py Progress, registered under a run id: the
+client's `run` query parameter (letters, digits, - and _, at most 64), or
+a new id otherwise. The id is returned in the X-Run-Id header, so a client
+that wants to follow a run picks its id up front and polls
+GET /progress/{run} (or streams GET /progress/{run}/stream) while the
+request is pending. A progressive request counts the steps of one level
+at a time, a batch those of the group (api/batch.py) that started last.
+
+A run stops within one time step when
+    DELETE /progress/{run} is called, or
+    the client disconnects before the response is sent.
+CancelOnDisconnect is the ASGI middleware doing both the registration and
+the disconnect watch; finished runs are kept for polling, the last
+MAX_FINISHED of them.
+"""
+import asyncio
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from solvers.progress import Progress
+
+RUN_PATHS = ("/simulation/", "/simulation-raw/", "/simulation-progressive/", "/simulations/batch")
+MAX_FINISHED = 256
+_RUN_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+_runs = OrderedDict()       # run id: Progress, oldest first
+_lock = threading.Lock()
+
+
+def start(run_id=None, label=None):
+    """(run id, Progress) of a new run; a missing, invalid or live id is replaced by a new one."""
+    with _lock:
+        live = run_id in _runs and _runs[run_id].state in ("pending", "running")
+        if run_id is None or not _RUN_ID.fullmatch(run_id) or live:
+            run_id = uuid.uuid4().hex
+        progress = _runs[run_id] = Progress(label)
+        _runs.move_to_end(run_id)
+        finished = [k for k, p in _runs.items() if p.state not in ("pending", "running")]
+        for key in finished[:max(len(finished) - MAX_FINISHED, 0)]:
+            del _runs[key]
+    return run_id, progress
+
+
+def get(run_id):
+    """The run's Progress; KeyError for unknown ids."""
+    with _lock:
+        return _runs[run_id]
+
+
+def cancel(run_id):
+    """Request cancellation; False when the run has already ended. KeyError for unknown ids."""
+    return get(run_id).cancel()
+
+
+class CancelOnDisconnect:
+    """
+    ASGI middleware: registers a run for each simulation request (available
+    to the route as request.state.run / request.state.progress), adds the
+    X-Run-Id header, and cancels the run when the client disconnects while
+    the solver is still working.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(RUN_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        run_id, progress = start(query.get("run", [None])[0], label=scope["path"])
+        scope.setdefault("state", {}).update(run=run_id, progress=progress)
+
+        # one reader of the client's messages: they are handed on to the
+        # app, and a disconnect cancels the run
+        messages = asyncio.Queue()
+
+        async def watch():
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    progress.cancel()
+                    return
+
+        status = []
+
+        async def send_with_run_id(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+                message["headers"] = list(message.get("headers", [])) + [(b"x-run-id", run_id.encode())]
+            await send(message)
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await self.app(scope, messages.get, send_with_run_id)
+        finally:
+            watcher.cancel()
+            progress.finish("done" if status and status[0] < 400 else "failed")
@@ -0,0 +1,148 @@
+# backend-python/api/scheduler.py
+"""
+Admission control and fair scheduling of solver runs.
+
+Each run has a cost, the pre-flight wall-time estimate (grid and step
+counts times the measured cost per step, see api/controllers.py). Runs
+costing at most FAST_LANE_S take the fast lane, FAST_SLOTS at a time, so
+interactive requests are not stuck behind long ones. Longer runs take the
+slow lane, SLOW_SLOTS at a time; waiting runs are queued per client and
+started round-robin over the clients, so one client's batch of expensive
+runs does not starve the others. A client is identified by its X-Client-Id
+header, or else its address.
+
+A run is rejected with Saturated (HTTP 429 with Retry-After) when its lane
+already has MAX_QUEUED runs waiting, or its client MAX_QUEUED_PER_CLIENT;
+the retry hint is the estimated time until the lane's queue has drained.
+Admitted runs get CPU_BUDGET_S of CPU time (solvers/progress.py stops them
+with BudgetExceeded). A run waiting in the queue can still be cancelled
+(api/runs.py).
+
+All limits can be set through SIM_<NAME> environment variables.
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from solvers.progress import Cancelled
+from . import metrics
+
+FAST_SLOTS = int(os.environ.get("SIM_FAST_SLOTS", "2"))
+SLOW_SLOTS = int(os.environ.get("SIM_SLOW_SLOTS", "1"))
+FAST_LANE_S = float(os.environ.get("SIM_FAST_LANE_S", "2.0"))
+MAX_QUEUED = int(os.environ.get("SIM_MAX_QUEUED", "8"))
+MAX_QUEUED_PER_CLIENT = int(os.environ.get("SIM_MAX_QUEUED_PER_CLIENT", "2"))
+CPU_BUDGET_S = float(os.environ.get("SIM_CPU_BUDGET_S", "90"))
+
+QUEUE_DEPTH = metrics.Gauge("scheduler_queued_runs", "Runs waiting for a slot", ("lane",))
+RUNNING = metrics.Gauge("scheduler_running_runs", "Runs holding a slot", ("lane",))
+REJECTED = metrics.Counter("scheduler_rejected_total", "Runs rejected with 429", ("lane",))
+for _lane in ("fast", "slow"):
+    QUEUE_DEPTH.set(0, lane=_lane)
+    RUNNING.set(0, lane=_lane)
+    REJECTED.inc(0, lane=_lane)
+
+
+class Saturated(Exception):
+    """No room in the run's lane; retry_after is a hint in seconds."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    def __init__(self, client, cost):
+        self.client, self.cost = client, cost
+        self.ready = threading.Event()
+
+
+class Lane:
+    """Slots plus a per-client round-robin queue."""
+
+    def __init__(self, name, slots):
+        self.name, self.slots = name, slots
+        self.running = {}               # ticket: start time
+        self.queues = OrderedDict()     # client: deque of tickets, in round-robin order
+        self._lock = threading.Lock()
+
+    def _queued(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def _retry_after(self, cost):
+        """Seconds until the queue ahead of a new run (and the running runs) is done."""
+        now = time.monotonic()
+        remaining = sum(max(t.cost - (now - start), 0.0) for t, start in self.running.items())
+        waiting = sum(t.cost for q in self.queues.values() for t in q)
+        return max(1, math.ceil((remaining + waiting + cost) / max(self.slots, 1)))
+
+    def _dispatch(self):
+        # with the lock held: hand free slots to the next clients in turn
+        while len(self.running) < self.slots and self.queues:
+            client, queue = next(iter(self.queues.items()))
+            ticket = queue.popleft()
+            del self.queues[client]
+            if queue:
+                self.queues[client] = queue         # back of the rotation
+            self.running[ticket] = time.monotonic()
+            ticket.ready.set()
+        self._publish()
+
+    def _publish(self):
+        QUEUE_DEPTH.set(self._queued(), lane=self.name)
+        RUNNING.set(len(self.running), lane=self.name)
+
+    def enter(self, client, cost, progress=None):
+        """Wait for a slot; Saturated when the queue is full, Cancelled when the run is cancelled meanwhile."""
+        ticket = _Ticket(client, cost)
+        with self._lock:
+            if self._queued() >= MAX_QUEUED or len(self.queues.get(client, ())) >= MAX_QUEUED_PER_CLIENT:
+                REJECTED.inc(lane=self.name)
+                raise Saturated(f"The {self.name} lane is full, retry later", self._retry_after(cost))
+            self.queues.setdefault(client, deque()).append(ticket)
+            self._dispatch()
+        while not ticket.ready.wait(0.1):
+            if progress is not None and progress.cancelled:
+                with self._lock:
+                    if not ticket.ready.is_set():
+                        queue = self.queues[client]
+                        queue.remove(ticket)
+                        if not queue:
+                            del self.queues[client]
+                        self._publish()
+                        raise Cancelled(progress.label)
+        return ticket
+
+    def leave(self, ticket):
+        with self._lock:
+            self.running.pop(ticket, None)
+            self._dispatch()
+
+
+class Scheduler:
+    def __init__(self, fast_slots=FAST_SLOTS, slow_slots=SLOW_SLOTS, fast_lane_s=FAST_LANE_S,
+                 cpu_budget_s=CPU_BUDGET_S):
+        self.fast, self.slow = Lane("fast", fast_slots), Lane("slow", slow_slots)
+        self.fast_lane_s, self.cpu_budget_s = fast_lane_s, cpu_budget_s
+
+    def lane(self, cost):
+        return self.fast if cost <= self.fast_lane_s else self.slow
+
+    def run(self, client, cost, run, progress=None):
+        """
+        run() once admitted to the lane of its cost (seconds; None counts as
+        fast), within the CPU budget when a progress is given.
+        """
+        lane = self.lane(cost or 0.0)
+        ticket = lane.enter(client, cost or 0.0, progress)
+        try:
+            if progress is not None:
+                progress.cpu_budget_s = self.cpu_budget_s
+            return run()
+        finally:
+            lane.leave(ticket)
+
+
+SCHEDULER = Scheduler()
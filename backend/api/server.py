@@ -1,8 +1,22 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from . import metrics
 from .routes import router
+from .runs import RUN_PATHS, CancelOnDisconnect
+from .warm import WARMER
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # nothing here may delay readiness: kernels and default results warm up in the background
+    WARMER.start()
+    yield
+    WARMER.stop()
+
 
-app = FastAPI(title="Blood Flow Simulation API")
+app = FastAPI(title="Blood Flow Simulation API", lifespan=lifespan)
 
 # Local + Render frontends
 ALLOWED_ORIGINS = [
@@ -17,13 +31,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Preflight-CFL",
+        "X-Preflight-Amplification",
+        "X-Preflight-Steps",
+        "X-Preflight-Wall-Time-S",
+        "X-Preflight-Peak-Memory-MB",
+        "X-Preflight-Adjusted",
+        "X-Cache-Key",
+        "Server-Timing",
+        "X-Cache",
+        "X-Run-Id",
+        "Retry-After",
+    ],
 )
+app.add_middleware(CancelOnDisconnect)
+
+
+@app.middleware("http")
+async def track_responses(request: Request, call_next):
+    # in-flight simulation requests and response sizes for /metrics
+    simulation = request.url.path.startswith(RUN_PATHS)
+    if simulation:
+        metrics.IN_FLIGHT.inc()
+        WARMER.popularity.note_path(request.url.path)
+    try:
+        response = await call_next(request)
+    finally:
+        if simulation:
+            metrics.IN_FLIGHT.dec()
+    route = request.scope.get("route")
+    size = response.headers.get("content-length")
+    if route is not None and size is not None:
+        metrics.RESPONSE_SIZE.observe(int(size), route=route.path)
+    return response
 
 app.include_router(router)
 
+
+@app.get("/health")
+def health():
+    # ready as soon as the app serves; the warmer's state is informational
+    return {"status": "ok", "warm": WARMER.status()}
+
 @app.get("/")
 def root():
     return {
         "status": "backend OK",
-        "endpoints": ["/simulations", "/simulation/{name}"]
+        "endpoints": [
+            "/simulations",
+            "/backends",
+            "/simulation/{name}",
+            "/simulation-progressive/{name}",
+            "/simulations/batch",
+            "/surrogate/{name}",
+            "/state-space/{name}",
+            "/preflight/{name}",
+            "/manifest/{name}",
+            "/debug/profile/{name}",
+            "/metrics",
+            "/health",
+            "/progress/{run}",
+        ]
     }
@@ -0,0 +1,183 @@
+# backend-python/api/shared_cache.py
+"""
+Result cache shared by the worker processes of one host.
+
+With several uvicorn/gunicorn workers each keeps its own in-process cache
+(api/cache.py), so without this every worker computes and holds its own
+copy of a popular result. SharedCache is a directory of results in the
+packed binary format of utils/encoder.py (JSON header, aligned raw
+arrays), one file per result cache key:
+
+    reads     map the file (mmap) and view its arrays in place, so the
+              data is held once in the page cache, for all workers
+    writes    one writer at a time, under an exclusive lock on the
+              directory's lock file; files are written to a temporary
+              name and renamed, so readers never see a partial result
+    misses    the first worker to miss a key holds the key's own lock file
+              while computing; the others poll it every LOCK_POLL_S (so a
+              cancelled request stops waiting) and read the result instead
+              of computing it again. Misses of other keys never wait.
+    eviction  least recently read first (file modification times, touched
+              on every hit) once the directory exceeds max_mb
+
+Set SIM_SHARED_CACHE_DIR to enable it (SIM_SHARED_CACHE_MB, default 1024).
+Without fcntl (Windows) there is no locking: writes stay atomic, but
+workers may compute the same result concurrently.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from solvers.progress import Cancelled
+from utils.encoder import pack, unpack
+from . import metrics
+
+SUFFIX = ".bfs"
+LOCK_POLL_S = 0.1           # how often a miss waiting for another worker's run checks its progress
+
+REQUESTS = metrics.Counter("shared_cache_requests_total", "Shared result cache lookups", ("result",))
+WAITS = metrics.Counter("shared_cache_waits_total", "Misses answered by another worker's run")
+EVICTIONS = metrics.Counter("shared_cache_evictions_total", "Results evicted from the shared cache")
+for _result in ("hit", "miss"):
+    REQUESTS.inc(0, result=_result)
+WAITS.inc(0)
+EVICTIONS.inc(0)
+
+
+@contextmanager
+def _locked(path, progress=None):
+    # exclusive lock on path for the duration of the block (flock: also
+    # between threads of one process, since each open is its own lock holder);
+    # with a progress, polled so that cancelling it stops the wait
+    with open(path, "a") as f:
+        if fcntl is not None and progress is None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        elif fcntl is not None:
+            while True:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if progress.cancelled:
+                        raise Cancelled(progress.label)
+                    time.sleep(LOCK_POLL_S)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SharedCache:
+    """Results by result cache key in a directory shared by worker processes."""
+
+    def __init__(self, directory, max_mb=1024.0):
+        self.directory = directory
+        self.max_bytes = max_mb * 2**20
+        os.makedirs(directory, exist_ok=True)
+
+    def _digest(self, key):
+        return hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.directory, self._digest(key) + SUFFIX)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            entry = unpack(data)
+        except (OSError, ValueError):
+            return None
+        if entry["key"] != repr(key):
+            return None
+        try:
+            os.utime(path)              # recently used
+        except OSError:
+            pass
+        return entry["result"]
+
+    def get(self, key):
+        """The cached result with read-only arrays mapped from its file, or None."""
+        result = self._read(key)
+        REQUESTS.inc(result="miss" if result is None else "hit")
+        return result
+
+    def put(self, key, result):
+        data = pack({"key": repr(key), "result": result})
+        if len(data) > self.max_bytes:
+            return
+        with _locked(os.path.join(self.directory, "cache.lock")):
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+            self._evict()
+
+    def _evict(self):
+        # with the write lock held
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))    # mapped readers keep their view
+            except OSError:
+                continue
+            total -= size
+            EVICTIONS.inc()
+
+    def get_or_run(self, key, run, progress=None):
+        """
+        (result, hit): the cached result for key, or run() stored under it.
+        Concurrent misses of one key run it once, in one worker; the others
+        wait for it until their progress (solvers/progress.py), if given, is
+        cancelled.
+        """
+        if key is None or self.max_bytes <= 0:
+            return run(), False
+        result = self.get(key)
+        if result is not None:
+            return result, True
+        lock = os.path.join(self.directory, self._digest(key) + ".lock")
+        with _locked(lock, progress):
+            result = self._read(key)        # computed by whoever held the lock
+            if result is not None:
+                WAITS.inc()
+                return result, True
+            result = run()
+            self.put(key, result)
+            try:
+                # late waiters lock the unlinked file and read the result too
+                os.remove(lock)
+            except OSError:
+                pass
+        return result, False
+
+
+def from_env():
+    """The SharedCache of SIM_SHARED_CACHE_DIR, or None when it is not set."""
+    directory = os.environ.get("SIM_SHARED_CACHE_DIR")
+    if not directory:
+        return None
+    return SharedCache(directory, float(os.environ.get("SIM_SHARED_CACHE_MB", "1024")))
+
+
+SHARED = from_env()
@@ -0,0 +1,203 @@
+# backend-python/api/warm.py
+"""
+Background pre-warming of default results.
+
+Once the server is up (the FastAPI lifespan in api/server.py), the Warmer
+computes the default-parameter result of every registered simulation, as
+its route returns it (/simulation/{name}, or /simulation-raw/{name} for
+custom payloads), in a background process pool. Start-up does not wait for
+it: the server answers at once (GET /health reports the warmer's state),
+the JIT kernels compile in the warmer's thread, and the pool's workers run
+at a lower CPU priority than the server.
+
+Results go to the WarmStore, a directory of pickles, one per result cache
+key, written atomically by the worker that computed them (api/warm_worker.py,
+which keeps the workers from importing every simulation module). They
+outlive the process, so a restart only computes what is missing; a new
+manifest version changes the keys. The routes consult the store before running anything
+(controllers.cached_run), and a result loaded from it enters the in-memory
+result cache (api/cache.py).
+
+Simulations are warmed most requested first: the server middleware counts
+requests per simulation (Popularity), saved next to the results so the
+order carries over between starts. With several server processes sharing
+the directory, the one holding its lock file warms it.
+
+    SIM_WARM            0 disables the warmer (default 1)
+    SIM_WARM_DIR        store directory (default output/warm)
+    SIM_WARM_WORKERS    pool processes (default 1)
+    SIM_WARM_DELAY_S    pause after start-up before warming (default 1)
+"""
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:         # Windows: no lock, every process warms
+    fcntl = None
+
+from solvers.backends import warm as warm_kernels
+from . import metrics
+from .registry import MANIFEST_REGISTRY, SIMULATION_REGISTRY
+from .warm_worker import WarmStore, compute, lower_priority
+
+ENABLED = os.environ.get("SIM_WARM", "1") != "0"
+WARM_DIR = os.environ.get("SIM_WARM_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "output", "warm",
+)
+WORKERS = int(os.environ.get("SIM_WARM_WORKERS", "1"))
+DELAY_S = float(os.environ.get("SIM_WARM_DELAY_S", "1"))
+
+SIMULATION_PATHS = ("/simulation/", "/simulation-raw/", "/simulation-progressive/")
+TUPLE_OUTPUTS = ("x", "times", "a", "q")        # what /simulation/{name} returns
+
+WARMED = metrics.Gauge("warm_store_results", "Default results in the warm store")
+WARMED.set(0)
+
+
+class Popularity:
+    """Requests per simulation (lower-case name), kept in a JSON file between starts."""
+
+    def __init__(self, path):
+        self.path = path
+        self._names = {name.lower() for name in SIMULATION_REGISTRY}
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.counts = {k: int(v) for k, v in json.load(f).items() if k in self._names}
+        except (OSError, ValueError, AttributeError):
+            self.counts = {}
+
+    def note_path(self, path):
+        """Count a request to one of SIMULATION_PATHS."""
+        for prefix in SIMULATION_PATHS:
+            if path.startswith(prefix):
+                name = path[len(prefix):].split("/")[0].lower()
+                if name in self._names:
+                    with self._lock:
+                        self.counts[name] = self.counts.get(name, 0) + 1
+                return
+
+    def order(self, names):
+        """names, most requested first (ties in the given order)."""
+        with self._lock:
+            return sorted(names, key=lambda name: -self.counts.get(name.lower(), 0))
+
+    def save(self):
+        with self._lock:
+            counts = dict(self.counts)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(counts, f)
+        os.replace(tmp, self.path)
+
+
+def default_job(name):
+    """(params, result cache key, raw) of a simulation's default request; key None when it has none."""
+    from .controllers import preflight
+
+    params, estimate = preflight(name)
+    manifest = MANIFEST_REGISTRY.get(name)
+    raw = manifest is not None and tuple(o.name for o in manifest.outputs) != TUPLE_OUTPUTS
+    if estimate is None or not estimate.get("cache_key"):
+        return params, None, raw
+    options = ("raw", False, None, None) if raw else ("simulation", None)
+    return params, (estimate["cache_key"], *options), raw
+
+
+class Warmer:
+    def __init__(self, directory=WARM_DIR, workers=WORKERS, delay_s=DELAY_S):
+        self.store = WarmStore(directory)
+        self.popularity = Popularity(os.path.join(directory, "popularity.json"))
+        self.workers, self.delay_s = workers, delay_s
+        self.state = "idle"
+        self.simulations = {}       # name: pending, stored, warmed, failed or no cache key
+        self._stop = threading.Event()
+        self._pool = None
+        self._thread = None
+
+    def start(self):
+        """Warm in a background thread; returns at once."""
+        if not ENABLED or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.popularity.save()
+        except OSError:
+            pass
+
+    def status(self):
+        return {"state": self.state, "simulations": dict(self.simulations)}
+
+    def _run(self):
+        if self._stop.wait(self.delay_s):
+            return
+        self.state = "kernels"
+        # compile the JIT kernels (or load them from Numba's cache)
+        timings = warm_kernels()
+        if timings:
+            print("Warmed kernels:", ", ".join(f"{k} {v:.2f} s" for k, v in timings.items()))
+
+        os.makedirs(self.store.directory, exist_ok=True)
+        lock = open(os.path.join(self.store.directory, "warm.lock"), "w")
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    self.state = "warmed by another process"
+                    return
+            self._warm()
+        finally:
+            lock.close()        # releases the lock
+
+    def _warm(self):
+        self.state = "warming"
+        jobs = []
+        for name in self.popularity.order(list(SIMULATION_REGISTRY)):
+            try:
+                params, key, raw = default_job(name)
+            except Exception as e:
+                self.simulations[name] = f"failed: {e}"
+                continue
+            if key is None:
+                self.simulations[name] = "no cache key"
+            elif key in self.store:
+                self.simulations[name] = "stored"
+            else:
+                self.simulations[name] = "pending"
+                jobs.append((name, params, key, raw))
+        WARMED.set(sum(state == "stored" for state in self.simulations.values()))
+
+        if jobs and not self._stop.is_set():
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=lower_priority,
+            )
+            futures = {name: self._pool.submit(compute, self.store.directory, name, params, key, raw)
+                       for name, params, key, raw in jobs}
+            for name, future in futures.items():
+                try:
+                    seconds = future.result()
+                    self.simulations[name] = f"warmed in {seconds:.1f} s"
+                    WARMED.inc()
+                except Exception as e:
+                    if self._stop.is_set():
+                        break
+                    self.simulations[name] = f"failed: {e}"
+            self._pool.shutdown(wait=False)
+        self.state = "stopped" if self._stop.is_set() else "done"
+
+
+WARMER = Warmer()
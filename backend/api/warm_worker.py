@@ -0,0 +1,80 @@
+# backend-python/api/warm_worker.py
+"""
+The pool-worker side of api/warm.py: the WarmStore and compute(), the job
+of one worker.
+
+The pool's processes are spawned, so they import whatever they unpickle
+afresh. This module therefore imports only the simulation module a job
+runs (simulations.<name>), not api/registry.py, which imports every
+simulation module, some of which run a whole script at import. Jobs come
+from warm.default_job, with validated parameters.
+"""
+import hashlib
+import importlib
+import os
+import pickle
+import tempfile
+import time
+
+from . import metrics
+from .payload import simulation_payload
+
+NICE = 10                   # CPU priority of the pool's workers, below the server's
+
+LOOKUPS = metrics.Counter("warm_store_requests_total", "Warm result store lookups", ("result",))
+for _result in ("hit", "miss"):
+    LOOKUPS.inc(0, result=_result)
+
+
+class WarmStore:
+    """Results by result cache key, one pickle per key in a directory."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest()[:32] + ".pkl")
+
+    def __contains__(self, key):
+        return key is not None and os.path.exists(self._path(key))
+
+    def get(self, key):
+        """The stored result, or None."""
+        if key is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                stored_key, result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            stored_key = result = None
+        if stored_key != key:
+            result = None
+        LOOKUPS.inc(result="miss" if result is None else "hit")
+        return result
+
+    def put(self, key, result):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+
+def lower_priority():
+    """Pool initializer: run below the server's CPU priority."""
+    if hasattr(os, "nice"):
+        os.nice(NICE)
+
+
+def compute(directory, name, params, key, raw):
+    """
+    Run one default request (as /simulation-raw/{name} answers it when raw,
+    else as /simulation/{name}) and store it; returns the seconds taken.
+    """
+    run_simulation = importlib.import_module(f"simulations.{name}").run_simulation
+    start = time.perf_counter()
+    result = run_simulation(**params)
+    if not raw:
+        result = simulation_payload(result)
+    WarmStore(directory).put(key, result)
+    return time.perf_counter() - start
@@ -1,3 +1,5 @@
+import threading
+
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from .simulation.healthy import simulate_t, simulate_z, simulate_wk
@@ -7,6 +9,7 @@ from .simulation.healthy import simulate_t, simulate_z, simulate_wk
 app = Flask(__name__)
 CORS(app)
 
+SIMULATION_NAMES = ("t", "z", "wk")
 SIMULATIONS = {}
 
 
@@ -15,21 +18,22 @@ def _init_simulations():
     Precompute all simulations once at startup
     for fast API responses.
     """
-    global SIMULATIONS
     SIMULATIONS["t"] = simulate_t()
     SIMULATIONS["z"] = simulate_z()
     SIMULATIONS["wk"] = simulate_wk()
 
 
-# Load simulation data once
-_init_simulations()
+# Load simulation data once, in the background so start-up is not blocked;
+# /data answers 503 for a simulation that is not ready yet
+threading.Thread(target=_init_simulations, daemon=True).start()
 
 
 @app.route("/")
 def home():
     return {
         "status": "backend ok",
-        "simulations": list(SIMULATIONS.keys())
+        "simulations": list(SIMULATIONS.keys()),
+        "warming": [name for name in SIMULATION_NAMES if name not in SIMULATIONS],
     }
 
 
@@ -43,14 +47,20 @@ def data():
     """
     sim_name = request.args.get("name", "t")
 
-    if sim_name not in SIMULATIONS:
+    if sim_name not in SIMULATION_NAMES:
         return (
             jsonify({
                 "error": f"Simulation '{sim_name}' not found.",
-                "available": list(SIMULATIONS.keys())
+                "available": list(SIMULATION_NAMES)
             }),
             400,
         )
+    if sim_name not in SIMULATIONS:
+        return (
+            jsonify({"error": f"Simulation '{sim_name}' is still being computed."}),
+            503,
+            {"Retry-After": "1"},
+        )
 
     z, t, P = SIMULATIONS[sim_name]
 
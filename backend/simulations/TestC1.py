@@ -1,80 +1,315 @@
 import numpy as np
 
-def run_simulation():
+from solvers import precision as fp
+from solvers.boundaries import BOUNDARIES, Ends
+from solvers.characteristics import CharacteristicSolver, end_for
+from solvers.highorder import CompactRK4, at_boundary
+from solvers.manifest import Manifest, Output, Parameter
+from solvers.workspace import Workspace
+
+# PHYSICAL PARAMETERS with SI units
+D_ref = 3.0e-3
+R_ref = D_ref / 2.0
+A_ref = np.pi * R_ref**2
+c = 1.0
+
+# NUMERICAL DOMAIN
+L = 1.0
+Nx = 400
+dz = L / Nx
+z = np.linspace(0.0, L, Nx+1)
+
+Tfinal = 2.6
+CFL = 0.4
+
+
+def time_step(dt=None):
+    """dt (default CFL dz / c) and number of steps, with dt adjusted so Tfinal is hit exactly."""
+    if dt is None:
+        dt = CFL * dz / c
+        Nt = int(Tfinal / dt) + 1
+    else:
+        Nt = max(int(round(Tfinal / dt)), 1)
+    return Tfinal / Nt, Nt
+
+
+DT = time_step()[0]     # default time step
+
+
+def grid(dz=dz):
+    """Cells and nodes of [0, L] at about the spacing dz, and that spacing."""
+    n = int(round(L / dz))
+    return n, np.linspace(0.0, L, n + 1), L / n
+
+
+def bump(z, center, eps, amp=1.0):
+    s = (z - center) / eps
+    out = np.zeros_like(z)
+    mask = np.abs(s) < 1
+    out[mask] = amp * 0.5 * (1 + np.cos(np.pi * s[mask]))
+    return out
+
+
+def initial_condition(epsilon=0.02, z=z):
+    """Perturbations (Q, A) at t = 0."""
+    amp_A = 1 * A_ref
+    amp_Q = 1 * 1e-6
+    return amp_Q * bump(z, 0.4, epsilon), amp_A * bump(z, 0.7, epsilon)
+
+
+def apply_BC(Q, A):
+    A[0]  = A[1]
+    Q[0]  = Q[1]
+    A[-1] = A[-2]
+    Q[-1] = Q[-2]
+
+
+# zero gradient at both ends (solvers/boundaries.py), the same as apply_BC
+NEUMANN = Ends("neumann", "neumann", c, dz)
+
+MACCORMACK_SCRATCH = ("Q_pred", "A_pred", "diff")
+
+
+def maccormack_step_into(ws, dt, dz=dz, ends=NEUMANN, clock=None):
+    """
+    One MacCormack step (boundary conditions included) on the workspace
+    (solvers/workspace.py): reads ws.cur, writes ws.nxt in place, swaps.
+    Space runs along axis 0, so a batch of states can be advanced as columns.
+    dz defaults to the module grid; other grids serve convergence studies.
+    ends: solvers/boundaries.py Ends, zero gradient by default
+    clock: optional solvers/instrument.py PhaseTimer; the step is booked
+    as predictor, corrector and boundary laps
+    """
+    Q, A = ws.cur["Q"], ws.cur["A"]
+    Q_new, A_new = ws.nxt["Q"], ws.nxt["A"]
+    Qp, Ap, d = ws.tmp["Q_pred"], ws.tmp["A_pred"], ws.tmp["diff"]
+    r = dt/dz
+    k = dt/5
+
+    ends.apply(A, Q)
+    if clock is not None:
+        clock.lap("boundary")
+    # predictor: FQ = A, FA = Q (forward differences)
+    Qp[-1] = Q[-1]
+    Ap[-1] = A[-1]
+    np.subtract(A[1:], A[:-1], out=d[:-1])
+    np.multiply(d[:-1], r, out=d[:-1])
+    np.subtract(Q[:-1], d[:-1], out=Qp[:-1])
+    np.multiply(Q[:-1], k, out=d[:-1])
+    np.subtract(Qp[:-1], d[:-1], out=Qp[:-1])
+    np.subtract(Q[1:], Q[:-1], out=d[:-1])
+    np.multiply(d[:-1], r, out=d[:-1])
+    np.subtract(A[:-1], d[:-1], out=Ap[:-1])
+    if clock is not None:
+        clock.lap("predictor")
+    ends.apply(Ap, Qp)
+    if clock is not None:
+        clock.lap("boundary")
+
+    # corrector: FQp = Ap, FAp = Qp (backward differences, periodic wrap at
+    # index 0 as np.roll does; the boundary condition overwrites it)
+    np.subtract(Ap[1:], Ap[:-1], out=d[1:])
+    np.subtract(Ap[:1], Ap[-1:], out=d[:1])
+    np.multiply(d, r, out=d)
+    np.add(Q, Qp, out=Q_new)
+    np.subtract(Q_new, d, out=Q_new)
+    np.multiply(Qp, k, out=d)
+    np.subtract(Q_new, d, out=Q_new)
+    np.multiply(Q_new, 0.5, out=Q_new)
+
+    np.subtract(Qp[1:], Qp[:-1], out=d[1:])
+    np.subtract(Qp[:1], Qp[-1:], out=d[:1])
+    np.multiply(d, r, out=d)
+    np.add(A, Ap, out=A_new)
+    np.subtract(A_new, d, out=A_new)
+    np.multiply(A_new, 0.5, out=A_new)
+    if clock is not None:
+        clock.lap("corrector")
+
+    ends.apply(A_new, Q_new)
+    ends.end_step(A_new, Q_new, dt)
+    ws.swap()
+    if clock is not None:
+        clock.lap("boundary")
+
+
+def maccormack_step(Q, A, dt):
+    """Allocating form of maccormack_step_into; returns the new (Q, A)."""
+    ws = Workspace.for_state(("Q", "A"), MACCORMACK_SCRATCH, Q=Q, A=A)
+    maccormack_step_into(ws, dt)
+    return ws.state()
+
+
+def state_space():
+    """
+    Linear step x_{n+1} = M x_n of this scheme on x = [A, Q], for
+    analysis/linear_operator.py.
+    """
+    dt, Nt = time_step()
+    n = Nx + 1
+
+    def step(x, u=None):
+        Q, A = maccormack_step(x[n:].copy(), x[:n].copy(), dt)
+        return np.concatenate([A, Q])
+
+    Q0, A0 = initial_condition()
+    return {
+        "step": step,
+        "n_state": 2 * n,
+        "n_input": 0,
+        "dt": dt,
+        "Nt": Nt,
+        "x0": np.concatenate([A0, Q0]),
+        "fields": {"A": slice(0, n), "Q": slice(n, 2 * n)},
+    }
+
+
+# spatial order -> scheme (solvers/stability.py)
+SPATIAL_ORDERS = {2: "maccormack", 4: "compact_rk4"}
+
+
+def numerics(order=2, characteristics=0, boundary=0, dt=DT, dz=dz):
+    """Discretization summary for the pre-flight check (solvers/stability.py)."""
+    dt, Nt = time_step(dt)
+    Nx, _, dz = grid(dz)
+    if order not in SPATIAL_ORDERS:
+        raise ValueError(f"order must be one of {sorted(SPATIAL_ORDERS)}, got {order!r}")
+    if characteristics and order != 2:
+        raise ValueError("characteristics=1 replaces the finite-difference scheme; leave order at 2")
+    if characteristics:
+        end_for(boundary)
+    return {
+        "scheme": "characteristics" if characteristics else SPATIAL_ORDERS[order],
+        "c": c,
+        "dt": dt,
+        "dz": dz,
+        "delta": 1.0 / 5.0,
+        "Nt": Nt,
+        "Nx": Nx + 1,
+        "n_fields": 2,
+        "n_output_values": (Nt + 1) * (2 * (Nx + 1) + 1) + (Nx + 1),
+        "resolution": {"dt": "dt", "dz": "dz"},
+    }
+
+
+def run_simulation(order=2, characteristics=0, boundary=0, dt=DT, dz=dz, precision="float64",
+                   progress=None, clock=None):
     """
     Run the TestC1 MacCormack solver and return
     (x, times, a_arr, q_arr) for the web frontend.
+    order: 2 (MacCormack) or 4 (compact finite differences + RK4,
+    solvers/highorder.py, with transmissive characteristic boundaries)
+    characteristics: 1 for the method of characteristics
+    (solvers/characteristics.py)
+    boundary: condition at both ends of the MacCormack and characteristics
+    runs, a solvers/boundaries.py BOUNDARIES code (0 zero gradient,
+    1 characteristic, 2 damping layer, 3 matched Windkessel; the
+    characteristics run takes 0 or 1); order 4 always has characteristic ends
+    dt, dz: time step (adjusted so Tfinal is hit exactly) and grid spacing
+    (the grid has the nearest cell count), e.g. coarser for a quick preview
+    precision: "float64", or "mixed"/"float32" for a float32 state and
+    output (solvers/precision.py); order 4 and characteristics run in float64
+    progress: optional solvers/progress.py Progress, updated every step
+    (raises Cancelled when the run is cancelled)
+    clock: optional solvers/instrument.py PhaseTimer, booked with the wall
+    time of each phase of the run (setup, predictor, corrector, boundary,
+    record, output)
 
     x: positions array (length Nx+1)
     times: list of time points (length Nt+1)
     a_arr: list of arrays for A at each time (length Nt+1, each length Nx+1)
     q_arr: list of arrays for Q at each time (length Nt+1, each length Nx+1)
     """
+    numerics(order, characteristics, boundary)      # validates the scheme choice
+    dt, Nt = time_step(dt)
+    Nx, z, dz = grid(dz)
+    Q, A = initial_condition(z=z)
+    dtype = fp.state_dtype(precision)
+    if (order == 4 or characteristics) and dtype != np.float64:
+        raise ValueError("The compact scheme and characteristics run in float64 only")
 
-    # PHYSICAL PARAMETERS with SI units
-    D_ref = 3.0e-3
-    R_ref = D_ref / 2.0
-    A_ref = np.pi * R_ref**2
-    c = 1.0
-
-    # NUMERICAL DOMAIN
-    L = 1.0
-    Nx = 400
-    dz = L / Nx
-    z = np.linspace(0.0, L, Nx+1)
-
-    Tfinal = 2.6
-    CFL = 0.4
-    dt = CFL * dz / c
-    Nt = int(Tfinal / dt) + 1
-    dt = Tfinal / Nt
-
-    epsilon = 0.02
-
-    def bump(z, center, eps, amp=1.0):
-        s = (z - center) / eps
-        out = np.zeros_like(z)
-        mask = np.abs(s) < 1
-        out[mask] = amp * 0.5 * (1 + np.cos(np.pi * s[mask]))
-        return out
+    Q_store = np.zeros((Nt+1, Nx+1), dtype)
+    A_store = np.zeros((Nt+1, Nx+1), dtype)
+    Q_store[0,:] = Q
+    A_store[0,:] = A
+    if clock is not None:
+        clock.lap("setup")
+    if progress is not None:
+        progress.start(Nt)
 
-    amp_A = 1 * A_ref
-    amp_Q = 1 * 1e-6
+    if characteristics:
+        end = end_for(boundary)
+        solver = CharacteristicSolver(Nx+1, dz, c, 1.0/5.0, inlet=end, outlet=end).load(A, Q)
+        for n in range(1, Nt + 1):
+            solver.step(dt)
+            if clock is not None:
+                clock.lap("characteristics")
+            solver.fields(A_store[n], Q_store[n])
+            if clock is not None:
+                clock.lap("record")
+            if progress is not None:
+                progress.update(n)
+    elif order == 4:
+        solver = CompactRK4(Nx+1, dz, c, 1.0/5.0)
+        solver.state[0], solver.state[1] = A, Q
+
+        def open_ends(w, t):
+            at_boundary(w, 0, c)
+            at_boundary(w, -1, c)
 
-    Q = amp_Q * bump(z, 0.4, epsilon)
-    A = amp_A * bump(z, 0.7, epsilon)
-
-    Q_store = np.zeros((Nt+1, Nx+1))
-    A_store = np.zeros((Nt+1, Nx+1))
-    Q_store[0,:] = Q.copy()
-    A_store[0,:] = A.copy()
-
-    def apply_BC(Q, A):
-        A[0]  = A[1]
-        Q[0]  = Q[1]
-        A[-1] = A[-2]
-        Q[-1] = Q[-2]
-
-    for n in range(1, Nt + 1):
-        apply_BC(Q, A)
-        FQ = A
-        FA = Q
-        Qp = Q.copy()
-        Ap = A.copy()
-        Qp[:-1] = Q[:-1] - dt/dz*(FQ[1:] - FQ[:-1]) - (dt/5)*Q[:-1]
-        Ap[:-1] = A[:-1] - dt/dz*(FA[1:] - FA[:-1])
-        apply_BC(Qp, Ap)
-        FQp = Ap
-        FAp = Qp
-        Q = 0.5*(Q + Qp - dt/dz*(FQp - np.roll(FQp,1)) - (dt/5)*Qp)
-        A = 0.5*(A + Ap - dt/dz*(FAp - np.roll(FAp,1)))
-        apply_BC(Q, A)
-        Q_store[n,:] = Q
-        A_store[n,:] = A
+        for n in range(1, Nt + 1):
+            solver.step((n - 1)*dt, dt, open_ends)
+            if clock is not None:
+                clock.lap("compact_rk4")
+            A_store[n,:], Q_store[n,:] = solver.state
+            if clock is not None:
+                clock.lap("record")
+            if progress is not None:
+                progress.update(n)
+    else:
+        ends = NEUMANN if boundary == 0 else Ends(boundary, boundary, c, dz)
+        ws = Workspace((Nx+1,), ("Q", "A"), MACCORMACK_SCRATCH, dtype).load(Q=Q, A=A)
+        for n in range(1, Nt + 1):
+            maccormack_step_into(ws, dt, dz=dz, ends=ends, clock=clock)
+            Q_store[n,:] = ws.cur["Q"]
+            A_store[n,:] = ws.cur["A"]
+            if clock is not None:
+                clock.lap("record")
+            if progress is not None:
+                progress.update(n)
 
     # Build outputs for web: add A_ref to area to make absolute area
     x = z
     times = [i*dt for i in range(Nt+1)]
-    a_arr = [A_ref + A_store[n,:] for n in range(Nt+1)]
+    a_arr = [(A_ref + A_store[n,:]).astype(dtype) for n in range(Nt+1)]
     q_arr = [Q_store[n,:] for n in range(Nt+1)]
-    return x.tolist(), times, [a.tolist() for a in a_arr], [q.tolist() for q in q_arr]
+    result = x.tolist(), times, [fp.to_list(a) for a in a_arr], [fp.to_list(q) for q in q_arr]
+    if clock is not None:
+        clock.lap("output")
+    return result
+
+
+MANIFEST = Manifest(
+    name="TestC1",
+    description="Damped linear wave test (c = 1), MacCormack or characteristics with selectable "
+                "boundaries, or compact fourth order with open boundaries",
+    parameters=(
+        Parameter("order", 2, 2, 4, kind=int, choices=(2, 4),
+                  description="spatial order: 2 MacCormack, 4 compact finite differences + RK4"),
+        Parameter("characteristics", 0, 0, 1, kind=int,
+                  description="1: method of characteristics instead of finite differences"),
+        Parameter("boundary", 0, 0, max(BOUNDARIES), kind=int,
+                  description="both ends: 0 zero gradient, 1 characteristic, 2 damping layer, 3 matched Windkessel"),
+        Parameter("dt", DT, 1.0e-4, 0.05, "s", description="time step"),
+        Parameter("dz", dz, 1.0e-4, 0.05, "m", description="grid spacing"),
+    ),
+    outputs=(
+        Output("x", ("nx",), "m"),
+        Output("times", ("frames",), "s"),
+        Output("a", ("frames", "nx"), "m^2", "absolute area"),
+        Output("q", ("frames", "nx"), "m^3/s"),
+    ),
+    dims=lambda order=2, characteristics=0, boundary=0, dt=DT, dz=dz: {"frames": time_step(dt)[1] + 1,
+                                                                       "nx": grid(dz)[0] + 1},
+    numerics=numerics,
+)
@@ -1,6 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.widgets import Slider
+
+from solvers import precision as fp
+from solvers.boundaries import BOUNDARIES, Ends
+from solvers.characteristics import CharacteristicSolver, end_for
+from solvers.manifest import Manifest, Output, Parameter
+from solvers.workspace import Workspace
 
 # TEST MODEL: DAMPED LINEAR WAVE SYSTEM
 #   Q_t + c^2 A_z + delta Q = 0
@@ -20,167 +24,326 @@ z = np.linspace(0, L, N)
 # TIME DISCRETIZATION
 T_FINAL = 5
 dt = 5e-4
-Nt = int(T_FINAL / dt) + 1   
 
 CFL = c * dt / dz
-print(f"CFL = {CFL:.3f} (must be <= 1)")
-
-# INITIAL CONDITIONS (SMOOTH GAUSSIANS)
-sigma = 4.0 * dz
-A = np.exp(-((z - 0.7) ** 2) / sigma**2)
-Q = np.exp(-((z - 0.4) ** 2) / sigma**2)
-
-
-  # option 1: Characteristic-based BCs
-def inlet_bc(A, Q):
-    # Characteristic-based inlet BC (non-reflecting)
-    Wm = Q[1] - c * A[1]          # incoming characteristic
-    A[0] = -Wm / (2 * c)
-    Q[0] = Wm / 2
-    return A, Q
-
-def outlet_bc(A, Q):
-    # Characteristic-based outlet BC (non-reflecting)
-    Wp = Q[-2] + c * A[-2]        # incoming characteristic
-    A[-1] = Wp / (2 * c)
-    Q[-1] = Wp / 2
-    return A, Q
-
-
-"""
-# option 2: Approximate Neumann BCs
-def inlet_bc(A, Q):
-#     # Q1 + A1 = Q0 + A0
-        # Apply approximate Neumann BCs
-    Q[0]  = Q[1]
-    A[0]  = A[1]
-
-    return A, Q
-
-def outlet_bc(A, Q):
-#     # QN - AN = QN-1 - AN-1
-     Q[-1] = Q[-2]
-     A[-1] = A[-2]
-
-     return A, Q
-
-"""
-"""
-# option 3: Mixed BCs
-
-def inlet_bc(A, Q):
-#     # Q1 + A1 = Q0 + A0
-        # Apply approximate Neumann BCs
-    
-    Q[0] = Q[1] + A[1] - A[0]   # Q1 + A1 = Q0 + A0
-    A[0] = A[1] + Q[1] - Q[0]   # Equivalent form of the above
-
-    return A, Q
-
-def outlet_bc(A, Q):
-#     # QN - AN = QN-1 - AN-1
-     
-     Q[-1] = Q[-2] + A[-2] - A[-1]  # QN - AN = Q_{N-1} - A_{N-1}
-     A[-1] = A[-2] + Q[-2] - Q[-1]
-     return A, Q
-"""
-
 
 # STORAGE
 snap_every = 10
-A_snap = []
-Q_snap = []
-times = []
-
-# TIME INTEGRATION (LAX–WENDROFF)
-for n in range(Nt):
-
-    A, Q = inlet_bc(A, Q)
-    A, Q = outlet_bc(A, Q)
-
-    A_half = np.zeros(N - 1)
-    Q_half = np.zeros(N - 1)
-
-    for i in range(N - 1):
-        A_half[i] = 0.5 * (A[i] + A[i + 1]) \
-                    - 0.5 * dt * (Q[i + 1] - Q[i]) / dz
-
-        Q_half[i] = 0.5 * (Q[i] + Q[i + 1]) \
-                    - 0.5 * dt * (
-                        c**2 * (A[i + 1] - A[i]) / dz
-                        + delta * 0.5 * (Q[i] + Q[i + 1])
-                    )
-
-    A_new = A.copy()
-    Q_new = Q.copy()
-
-    for i in range(1, N - 1):
-        A_new[i] = A[i] - dt * (Q_half[i] - Q_half[i - 1]) / dz
-        Q_new[i] = Q[i] - dt * (
-            c**2 * (A_half[i] - A_half[i - 1]) / dz
-            + delta * 0.5 * (Q_half[i] + Q_half[i - 1])
-        )
-
-    # arrays using returned values
-    A_new, Q_new = inlet_bc(A_new, Q_new)
-    A_new, Q_new = outlet_bc(A_new, Q_new)
-
-    A, Q = A_new, Q_new
-
-    if n % snap_every == 0:
-        A_snap.append(A.copy())
-        Q_snap.append(Q.copy())
-        times.append(n * dt)
-
-A_snap = np.array(A_snap)
-Q_snap = np.array(Q_snap)
-times = np.array(times)
-
-# VISUALIZATION: A(z,t) AND Q(z,t) WITH SLIDER
-fig, ax = plt.subplots(figsize=(9, 4))
-plt.subplots_adjust(bottom=0.25)
-
-line_A, = ax.plot(
-    z, A_snap[0],
-    lw=2, color="tab:blue",
-    label="Area perturbation A"
-)
 
-line_Q, = ax.plot(
-    z, Q_snap[0],
-    lw=2, color="tab:orange",
-    label="Flow perturbation Q"
-)
 
-ax.set_xlabel("z [m]")
-ax.set_ylabel("Perturbation amplitude")
-ax.set_title("Evolution of A(z,t) and Q(z,t)")
-ax.grid(True)
-ax.legend()
+# BOUNDARY CONDITIONS (solvers/boundaries.py): characteristic, non-reflecting
+# by default; zero gradient, damping layer and matched Windkessel selectable
+CHARACTERISTIC = Ends("characteristic", "characteristic", c, dz)
+
+
+# TIME INTEGRATION (LAX–WENDROFF, TWO-STEP)
+LAXW_SCRATCH = ("A_half", "Q_half", "diff", "sum", "damp")
+
+
+def lax_wendroff_step_into(ws, ends=CHARACTERISTIC, dt=dt, dz=dz, clock=None):
+    """
+    One Richtmyer half-step Lax–Wendroff step including the boundary
+    conditions (ends, solvers/boundaries.py), on the workspace
+    (solvers/workspace.py): reads ws.cur, writes ws.nxt in place, swaps.
+    Half-step values live in the first N-1 entries of their scratch arrays.
+    dt and dz default to the module grid; other grids serve convergence studies.
+    clock: optional solvers/instrument.py PhaseTimer; the half step is booked
+    as "predictor", the full step as "corrector", the ends as "boundary".
+    """
+    A, Q = ws.cur["A"], ws.cur["Q"]
+    A_new, Q_new = ws.nxt["A"], ws.nxt["Q"]
+    A_half, Q_half = ws.tmp["A_half"][:-1], ws.tmp["Q_half"][:-1]
+    d, s, e = ws.tmp["diff"][:-1], ws.tmp["sum"][:-1], ws.tmp["damp"][:-1]
+    h = 0.5 * dt
+    c2 = c**2
+    k = delta * 0.5
+
+    ends.apply(A, Q)
+    if clock is not None:
+        clock.lap("boundary")
+
+    # half step
+    np.subtract(Q[1:], Q[:-1], out=d)
+    np.multiply(d, h, out=d)
+    np.divide(d, dz, out=d)
+    np.add(A[:-1], A[1:], out=A_half)
+    np.multiply(A_half, 0.5, out=A_half)
+    np.subtract(A_half, d, out=A_half)
+
+    np.add(Q[:-1], Q[1:], out=s)
+    np.subtract(A[1:], A[:-1], out=d)
+    np.multiply(d, c2, out=d)
+    np.divide(d, dz, out=d)
+    np.multiply(s, k, out=e)
+    np.add(d, e, out=d)
+    np.multiply(d, h, out=d)
+    np.multiply(s, 0.5, out=Q_half)
+    np.subtract(Q_half, d, out=Q_half)
+    if clock is not None:
+        clock.lap("predictor")
+
+    # full step on interior nodes
+    d, e = d[:-1], e[:-1]
+    np.subtract(Q_half[1:], Q_half[:-1], out=d)
+    np.multiply(d, dt, out=d)
+    np.divide(d, dz, out=d)
+    np.subtract(A[1:-1], d, out=A_new[1:-1])
+
+    np.subtract(A_half[1:], A_half[:-1], out=d)
+    np.multiply(d, c2, out=d)
+    np.divide(d, dz, out=d)
+    np.add(Q_half[1:], Q_half[:-1], out=e)
+    np.multiply(e, k, out=e)
+    np.add(d, e, out=d)
+    np.multiply(d, dt, out=d)
+    np.subtract(Q[1:-1], d, out=Q_new[1:-1])
+    if clock is not None:
+        clock.lap("corrector")
+
+    # boundary nodes
+    ends.apply(A_new, Q_new)
+    ends.end_step(A_new, Q_new, dt)
+    ws.swap()
+    if clock is not None:
+        clock.lap("boundary")
+
+
+def lax_wendroff_step(A, Q):
+    """Allocating form of lax_wendroff_step_into; returns the new (A, Q)."""
+    ws = Workspace.for_state(("A", "Q"), LAXW_SCRATCH, A=A, Q=Q)
+    lax_wendroff_step_into(ws)
+    return ws.state()
+
+
+def state_space():
+    """
+    Linear step x_{n+1} = M x_n of this scheme (characteristic ends) on
+    x = [A, Q], for analysis/linear_operator.py.
+    """
+    def step(x, u=None):
+        A, Q = lax_wendroff_step(x[:N].copy(), x[N:].copy())
+        return np.concatenate([A, Q])
+
+    return {
+        "step": step,
+        "n_state": 2 * N,
+        "n_input": 0,
+        "dt": dt,
+        "Nt": int(T_FINAL / dt) + 1,
+        "x0": np.concatenate(initial_condition()),
+        "fields": {"A": slice(0, N), "Q": slice(N, 2 * N)},
+    }
+
+
+def grid(dz=dz):
+    """Nodes N and positions of [0, L] at about the spacing dz, and that spacing."""
+    n = int(round(L / dz)) + 1
+    return n, np.linspace(0, L, n), L / (n - 1)
+
+
+def initial_condition(A0=1.0, Q0=1.0, z=z):
+    """Smooth Gaussian perturbations with amplitudes A0, Q0 (width set by the module grid)."""
+    sigma = 4.0 * dz
+    A = A0 * np.exp(-((z - 0.7) ** 2) / sigma**2)
+    Q = Q0 * np.exp(-((z - 0.4) ** 2) / sigma**2)
+    return A, Q
 
-ax.set_ylim(
-    1.1 * min(np.min(A_snap), np.min(Q_snap)),
-    1.1 * max(np.max(A_snap), np.max(Q_snap))
-)
 
-# Time slider
-ax_time = plt.axes([0.15, 0.08, 0.7, 0.04])
-time_slider = Slider(
-    ax=ax_time,
-    label="Time [s]",
-    valmin=times[0],
-    valmax=times[-1],
-    valinit=times[0]
+def run_characteristics(A0_arr, Q0_arr, n_snap, A_snap, Q_snap, boundary=1, progress=None,
+                        dt=dt, dz=dz, clock=None):
+    """
+    Same snapshots by the method of characteristics (solvers/characteristics.py):
+    one step to the first snapshot, then one step of snap_every * dt per
+    snapshot.
+    """
+    if progress is not None:
+        progress.start(n_snap)
+    end = end_for(boundary)
+    solver = CharacteristicSolver(len(A0_arr), dz, c, delta, inlet=end, outlet=end).load(A0_arr, Q0_arr)
+    solver.step(dt)
+    solver.fields(A_snap[0], Q_snap[0])
+    for k in range(1, n_snap):
+        solver.step(snap_every * dt)
+        if clock is not None:
+            clock.lap("characteristics")
+        solver.fields(A_snap[k], Q_snap[k])
+        if clock is not None:
+            clock.lap("record")
+        if progress is not None:
+            progress.update(k)
+
+
+def run_simulation(T_FINAL=T_FINAL, A0=1.0, Q0=1.0, characteristics=0, boundary=1, dt=dt, dz=dz,
+                   precision="float64", progress=None, clock=None):
+    """
+    Runs the damped linear wave test model and returns
+    (z, times, A_snap, Q_snap), one snapshot every snap_every steps.
+
+    T_FINAL   : simulated time [s]
+    A0, Q0    : amplitudes of the initial area / flow Gaussians
+    characteristics : 1 for the method of characteristics (float64 only)
+    boundary  : condition at both ends, a solvers/boundaries.py BOUNDARIES
+                code (0 zero gradient, 1 characteristic, 2 damping layer,
+                3 matched Windkessel; characteristics take 0 or 1)
+    dt, dz    : time step and grid spacing (the grid has the nearest
+                node count), e.g. coarser for a quick preview
+    precision : "mixed"/"float32" for a float32 state and snapshots
+                (solvers/precision.py)
+    progress  : optional solvers/progress.py Progress, updated every step
+                (raises Cancelled when the run is cancelled)
+    clock     : optional solvers/instrument.py PhaseTimer, booked with the
+                wall time of each phase of the run (setup, predictor,
+                corrector, boundary, record)
+    """
+    Nt = int(T_FINAL / dt) + 1
+    n_snap = (Nt - 1) // snap_every + 1
+    n_z, z_grid, dz = grid(dz)
+
+    A0_arr, Q0_arr = initial_condition(A0, Q0, z_grid)
+    dtype = fp.state_dtype(precision)
+    A_snap = np.empty((n_snap, n_z), dtype)
+    Q_snap = np.empty((n_snap, n_z), dtype)
+    times = snap_every * dt * np.arange(n_snap)
+
+    if characteristics:
+        if dtype != np.float64:
+            raise ValueError("characteristics run in float64 only")
+        if clock is not None:
+            clock.lap("setup")
+        run_characteristics(A0_arr, Q0_arr, n_snap, A_snap, Q_snap, boundary, progress, dt, dz,
+                            clock)
+        return z_grid, times, A_snap, Q_snap
+
+    if boundary == 1 and n_z == N:
+        ends = CHARACTERISTIC
+    else:
+        ends = Ends(boundary, boundary, c, dz)
+    ws = Workspace((n_z,), ("A", "Q"), LAXW_SCRATCH, dtype).load(A=A0_arr, Q=Q0_arr)
+    if clock is not None:
+        clock.lap("setup")
+    if progress is not None:
+        progress.start(Nt)
+
+    for n in range(Nt):
+        lax_wendroff_step_into(ws, ends, dt, dz, clock)
+
+        if n % snap_every == 0:
+            A_snap[n // snap_every] = ws.cur["A"]
+            Q_snap[n // snap_every] = ws.cur["Q"]
+            if clock is not None:
+                clock.lap("record")
+        if progress is not None:
+            progress.update(n + 1)
+
+    return z_grid, times, A_snap, Q_snap
+
+
+
+def _dims(T_FINAL=T_FINAL, A0=1.0, Q0=1.0, characteristics=0, boundary=1, dt=dt, dz=dz):
+    Nt = int(T_FINAL / dt) + 1
+    return {"frames": (Nt - 1) // snap_every + 1, "nx": grid(dz)[0]}
+
+
+def numerics(T_FINAL=T_FINAL, A0=1.0, Q0=1.0, characteristics=0, boundary=1, dt=dt, dz=dz):
+    """Discretization summary for the pre-flight check (solvers/stability.py)."""
+    dims = _dims(T_FINAL, dt=dt, dz=dz)
+    n_z, _, grid_dz = grid(dz)
+    if characteristics:
+        end_for(boundary)
+        # one step per snapshot
+        return {**numerics(T_FINAL, dt=dt, dz=dz), "scheme": "characteristics",
+                "dt": snap_every * dt, "Nt": dims["frames"], "resolution": {}}
+    return {
+        "scheme": "lax_wendroff",
+        "c": c,
+        "dt": dt,
+        "dz": grid_dz,
+        "delta": delta,
+        "Nt": int(T_FINAL / dt) + 1,
+        "Nx": n_z,
+        "n_fields": 2,
+        "n_output_values": dims["frames"] * (2 * n_z + 1) + n_z,
+        "resolution": {"dt": "dt", "dz": "dz"},
+    }
+
+
+MANIFEST = Manifest(
+    name="Test_model_laxw_half_step",
+    description="Damped linear wave test (c = 1), two-step Lax–Wendroff or method of "
+                "characteristics, characteristic boundaries by default",
+    parameters=(
+        Parameter("T_FINAL", T_FINAL, 0.01, 20.0, "s", description="simulated time"),
+        Parameter("A0", 1.0, -10.0, 10.0, description="initial area pulse amplitude"),
+        Parameter("Q0", 1.0, -10.0, 10.0, description="initial flow pulse amplitude"),
+        Parameter("characteristics", 0, 0, 1, kind=int,
+                  description="1: method of characteristics, one step per snapshot"),
+        Parameter("boundary", 1, 0, max(BOUNDARIES), kind=int,
+                  description="both ends: 0 zero gradient, 1 characteristic, 2 damping layer, 3 matched Windkessel"),
+        Parameter("dt", dt, 1.0e-5, 1.0e-2, "s", description="time step"),
+        Parameter("dz", dz, 1.0e-4, 0.05, "m", description="grid spacing"),
+    ),
+    outputs=(
+        Output("x", ("nx",), "m"),
+        Output("times", ("frames",), "s"),
+        Output("a", ("frames", "nx")),
+        Output("q", ("frames", "nx")),
+    ),
+    dims=_dims,
+    numerics=numerics,
 )
 
-def update(val):
-    idx = np.argmin(np.abs(times - val))
-    line_A.set_ydata(A_snap[idx])
-    line_Q.set_ydata(Q_snap[idx])
-    ax.set_title(f"A(z,t) and Q(z,t) at t = {times[idx]:.3f} s")
-    fig.canvas.draw_idle()
-
-time_slider.on_changed(update)
-
-plt.show()
 
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from matplotlib.widgets import Slider
+
+    print(f"CFL = {CFL:.3f} (must be <= 1)")
+    z, times, A_snap, Q_snap = run_simulation()
+
+    # VISUALIZATION: A(z,t) AND Q(z,t) WITH SLIDER
+    fig, ax = plt.subplots(figsize=(9, 4))
+    plt.subplots_adjust(bottom=0.25)
+
+    line_A, = ax.plot(
+        z, A_snap[0],
+        lw=2, color="tab:blue",
+        label="Area perturbation A"
+    )
+
+    line_Q, = ax.plot(
+        z, Q_snap[0],
+        lw=2, color="tab:orange",
+        label="Flow perturbation Q"
+    )
+
+    ax.set_xlabel("z [m]")
+    ax.set_ylabel("Perturbation amplitude")
+    ax.set_title("Evolution of A(z,t) and Q(z,t)")
+    ax.grid(True)
+    ax.legend()
+
+    ax.set_ylim(
+        1.1 * min(np.min(A_snap), np.min(Q_snap)),
+        1.1 * max(np.max(A_snap), np.max(Q_snap))
+    )
+
+    # Time slider
+    ax_time = plt.axes([0.15, 0.08, 0.7, 0.04])
+    time_slider = Slider(
+        ax=ax_time,
+        label="Time [s]",
+        valmin=times[0],
+        valmax=times[-1],
+        valinit=times[0]
+    )
+
+    def update(val):
+        idx = np.argmin(np.abs(times - val))
+        line_A.set_ydata(A_snap[idx])
+        line_Q.set_ydata(Q_snap[idx])
+        ax.set_title(f"A(z,t) and Q(z,t) at t = {times[idx]:.3f} s")
+        fig.canvas.draw_idle()
+
+    time_slider.on_changed(update)
+
+    plt.show()
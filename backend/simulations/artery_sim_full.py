@@ -1,276 +1,940 @@
 # backend-python/simulations/artery_sim_full.py
 import numpy as np
 
-def run_artery_simulation():
-    """
-    Runs the healthy artery model with Windkessel outlet
-    and returns time series for pressure, flow, and area
-    at inlet, midpoint, and outlet, plus outlet/Windkessel signals.
-
-    All pressures are returned in mmHg for convenience.
-    """
-
-    # -------------------------
-    # 1. Physical and Numerical Parameters
-    # -------------------------
-
+from solvers import backends, precision as fp
+from solvers.highorder import CompactRK4, at_boundary
+from solvers.instrument import PhaseTimer
+from solvers.manifest import Manifest, Output, Parameter
+from solvers.recorder import EveryN, Recorder
+from solvers.workspace import Workspace
+
+# -------------------------
+# 1. Physical and Numerical Parameters
+# -------------------------
+
+DEFAULT_PARAMS = {
     # Geometry
-    L = 0.15                 # artery length [m]
-    dz = 1.0e-3              # spatial step [m]
-    Nx = int(L/dz) + 1       # number of grid points
+    "L": 0.15,               # artery length [m]
+    "dz": 1.0e-3,            # spatial step [m]
 
     # Time (optimized for cloud deployment)
-    T_heart = 1.0            # heart period [s]
-    N_cycles = 1             # can change to run more cycles
-    T_final = N_cycles * T_heart
-    dt = 5.0e-5              # time step [s] (increased 5x for speed, stable)
-    Nt = int(T_final / dt)
-    save_every = 5           # save every Nth timestep for output
+    "T_heart": 1.0,          # heart period [s]
+    "N_cycles": 1,           # can change to run more cycles
+    "dt": 5.0e-5,            # time step [s] (increased 5x for speed, stable)
+    "save_every": 5,         # save every Nth timestep for output
+    "envelope": 0,           # 1: also return min/max of each saved interval
+    "order": 2,              # spatial order: 2 MacCormack, 4 compact + RK4
 
     # Material / fluid properties
-    rho = 1060.0             # density [kg/m³]
-    mu  = 3.5e-3             # viscosity [Pa·s]
+    "rho": 1060.0,           # density [kg/m³]
+    "mu": 3.5e-3,            # viscosity [Pa·s]
 
     # Reference geometry (ACA artery)
-    D_ref = 3.0e-3           # diameter [m]
-    r_ref = D_ref / 2.0
-    A_ref = np.pi * r_ref**2 # cross-sectional area [m²]
+    "D_ref": 3.0e-3,         # diameter [m]
 
     # Wall stiffness (tube law)
-    E = 1.5e6                # Young's modulus [Pa]
-    h = 3.0e-4               # wall thickness [m]
-    alpha = E * h / (2.0 * np.pi * r_ref**3)
-
-    # Wave speed and damping
-    c0 = np.sqrt(alpha * A_ref / rho)
-    delta = 8.0 * np.pi * mu / (rho * A_ref)
+    "E": 1.5e6,              # Young's modulus [Pa]
+    "h": 3.0e-4,             # wall thickness [m]
 
     # Windkessel (3-element) outlet parameters
-    Rp   = 6.7e8             # proximal resistance
-    Rd   = 1.0e10            # distal resistance
-    Cw   = 1.5e-11           # compliance
-    Lint = 1.0e4             # inertance
+    "Rp": 6.7e8,             # proximal resistance
+    "Rd": 1.0e10,            # distal resistance
+    "Cw": 1.5e-11,           # compliance
+    "Lint": 1.0e4,           # inertance
+}
 
-    # -------------------------
-    # Inlet Pressure (Blackman–Harris modulation)
-    # -------------------------
+# Amplitudes: mmHg → Pa
+mmHg_to_Pa = 133.322
 
-    # Timing parameters (Table 1)
-    LD = 0.60; LP = 0.55; LT = 0.55
-    tP = 0.38; tD = 0.05; tT = 0.20
-    betaD = 0.4; betaP = 1.0; betaT = 0.3
-    c_rel = 60.0/60.0        # 60 BPM normalization
-
-    # Amplitudes: mmHg → Pa
-    mmHg_to_Pa = 133.322
-    A_mmHg = 50.0
-    A_P = A_D = A_T = A_mmHg * mmHg_to_Pa
-
-    # Base diastolic pressure
-    P_dias = 87.0 * mmHg_to_Pa
-    P_ref = P_dias
-
-    # Blackman–Harris coefficients
-    a0, a1, a2, a3 = 0.35875, 0.48829, 0.14128, 0.01168
-
-    def bh_window(t_local):
-        """4-term Blackman-Harris window, normalized over [0, T_heart]."""
-        if t_local < 0 or t_local > T_heart:
-            return 0.0
-        tau = t_local / T_heart
-        return (a0
-                - a1 * np.cos(2*np.pi*tau)
-                + a2 * np.cos(4*np.pi*tau)
-                - a3 * np.cos(6*np.pi*tau))
-
-    # normalization constant
-    tau_grid = np.linspace(0, T_heart, 2001)
-    w_vals = np.array([bh_window(t) for t in tau_grid])
-    w_max = np.max(w_vals) if np.max(w_vals) != 0 else 1.0
-
-    def inlet_pressure(t):
-        """
-        Full inlet pressure waveform:
-        diastolic base + P, T, D pulses,
-        each modulated by a Blackman–Harris window.
-        """
-        t_mod = t % T_heart
-
-        def pulse(Ai, beta, Li, ti):
-            arg = (t_mod - ti) / (Li / c_rel)
-            return Ai * beta * bh_window(arg) / w_max
-
-        return (P_dias
-                + pulse(A_P, betaP, LP, tP)
-                + pulse(A_D, betaD, LD, tD)
-                + pulse(A_T, betaT, LT, tT))
 
-    # -------------------------
-    # 3. Spatial Grid and Monitoring Setup
-    # -------------------------
+# -------------------------
+# 2. Inlet Pressure (Blackman–Harris modulation)
+# -------------------------
 
-    z = np.linspace(0, L, Nx)
+# Timing parameters (Table 1)
+LD = 0.60; LP = 0.55; LT = 0.55
+tP = 0.38; tD = 0.05; tT = 0.20
+betaD = 0.4; betaP = 1.0; betaT = 0.3
+c_rel = 60.0/60.0        # 60 BPM normalization
 
-    A_tilde = np.zeros(Nx)   # area perturbation
-    Q_tilde = np.zeros(Nx)   # flow perturbation
+A_mmHg = 50.0
+A_P = A_D = A_T = A_mmHg * mmHg_to_Pa
 
-    # Monitor at inlet, midpoint, outlet
-    monitor_z = np.array([0.0, L/2, L])
-    monitor_idx = [np.argmin(np.abs(z - zz)) for zz in monitor_z]
+# Base diastolic pressure
+P_dias = 87.0 * mmHg_to_Pa
 
-    # histories for each location (decimated)
-    A_hist_multi = [[] for _ in monitor_z]
-    Q_hist_multi = [[] for _ in monitor_z]
-    P_hist_multi = [[] for _ in monitor_z]
+# Blackman–Harris coefficients
+a0, a1, a2, a3 = 0.35875, 0.48829, 0.14128, 0.01168
 
-    # outlet time derivative buffers for Windkessel
-    Q_out_hist = np.zeros(3)
 
-    # global time histories (decimated)
-    P_out_hist = []
-    Q_out_hist_rec = []
-    P_wk_hist = []
-    t_hist = []
-    
-    print(f"Starting artery simulation: {Nt} steps, saving every {save_every}")
+def bh_window(t_local, T_heart=1.0):
+    """4-term Blackman-Harris window, normalized over [0, T_heart]."""
+    t_local = np.asarray(t_local, dtype=float)
+    tau = t_local / T_heart
+    w = (a0
+         - a1 * np.cos(2*np.pi*tau)
+         + a2 * np.cos(4*np.pi*tau)
+         - a3 * np.cos(6*np.pi*tau))
+    return np.where((t_local < 0) | (t_local > T_heart), 0.0, w)
 
-    # -------------------------
-    # 4. Linearized Flux Function
-    # -------------------------
-    def flux(A_t, Q_t):
-        """Return the homogeneous flux components."""
-        F1 = Q_t
-        F2 = c0**2 * A_t
-        return F1, F2
 
-    # -------------------------
-    # 5. MacCormack Time Stepping
-    # -------------------------
-    for n in range(Nt):
-        t = n * dt
+# normalization constant
+_w_vals = bh_window(np.linspace(0, 1.0, 2001))
+w_max = np.max(_w_vals) if np.max(_w_vals) != 0 else 1.0
+
+
+def inlet_pressure(t, T_heart=1.0):
+    """
+    Full inlet pressure waveform:
+    diastolic base + P, T, D pulses,
+    each modulated by a Blackman–Harris window.
+
+    Accepts a scalar time or an array of times.
+    """
+    t_mod = np.asarray(t, dtype=float) % T_heart
 
-        # --- predictor ---
-        F1, F2 = flux(A_tilde, Q_tilde)
-        A_pred = A_tilde.copy()
-        Q_pred = Q_tilde.copy()
+    def pulse(Ai, beta, Li, ti):
+        arg = (t_mod - ti) / (Li / c_rel)
+        return Ai * beta * bh_window(arg, T_heart) / w_max
 
-        # forward differences on interior
-        for i in range(0, Nx-1):
-            A_pred[i] = A_tilde[i] - dt/dz * (F1[i+1] - F1[i])
-            Q_pred[i] = Q_tilde[i] - dt/dz * (F2[i+1] - F2[i]) - dt * delta * Q_tilde[i]
+    return (P_dias
+            + pulse(A_P, betaP, LP, tP)
+            + pulse(A_D, betaD, LD, tD)
+            + pulse(A_T, betaT, LT, tT))
 
-        # inlet predictor via tube law
-        P_in = inlet_pressure(t + dt)
-        A_pred[0] = (P_in - P_ref) / alpha
+
+# spatial order -> scheme (solvers/stability.py)
+SPATIAL_ORDERS = {2: "maccormack", 4: "compact_rk4"}
+
+
+def artery_parameters(**overrides):
+    """
+    Collects the model parameters (defaults + overrides) and the derived
+    coefficients used by the solver: grid sizes, reference area, tube-law
+    stiffness alpha, wave speed c0, damping delta and reference pressure.
+
+    Physical parameters may be given as arrays of equal length; the derived
+    coefficients then broadcast over a trailing batch axis of the state.
+    """
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown artery parameter(s): {sorted(unknown)}")
+
+    prm = dict(DEFAULT_PARAMS)
+    prm.update(overrides)
+    if prm["order"] not in SPATIAL_ORDERS:
+        raise ValueError(f"order must be one of {sorted(SPATIAL_ORDERS)}, got {prm['order']!r}")
+
+    prm["Nx"] = int(prm["L"] / prm["dz"]) + 1       # number of grid points
+    prm["T_final"] = prm["N_cycles"] * prm["T_heart"]
+    prm["Nt"] = int(prm["T_final"] / prm["dt"])
+
+    r_ref = np.asarray(prm["D_ref"]) / 2.0
+    prm["r_ref"] = r_ref
+    prm["A_ref"] = np.pi * r_ref**2                  # cross-sectional area [m²]
+    prm["alpha"] = np.asarray(prm["E"]) * prm["h"] / (2.0 * np.pi * r_ref**3)
+
+    # Wave speed and damping
+    prm["c0"] = np.sqrt(prm["alpha"] * prm["A_ref"] / prm["rho"])
+    prm["delta"] = 8.0 * np.pi * prm["mu"] / (prm["rho"] * prm["A_ref"])
+
+    prm["P_ref"] = P_dias
+    return prm
+
+
+# -------------------------
+# 3. Linearized Flux Function
+# -------------------------
+def flux(A_t, Q_t, c0):
+    """Return the homogeneous flux components."""
+    F1 = Q_t
+    F2 = c0**2 * A_t
+    return F1, F2
+
+
+# -------------------------
+# 4. MacCormack Step with tube-law inlet and Windkessel outlet
+# -------------------------
+MACCORMACK_SCRATCH = ("A_pred", "Q_pred", "flux", "diff", "sum")
+
+
+def step_coefficients(prm):
+    """Step constants (scalars, or per-column arrays for batched parameters), computed once per run."""
+    dt, dz, alpha = prm["dt"], prm["dz"], prm["alpha"]
+    Rp, Rd, Cw, Lint = prm["Rp"], prm["Rd"], prm["Cw"], prm["Lint"]
+    return {
+        "dt": dt,
+        "r": dt/dz,
+        "c0_sq": prm["c0"]**2,
+        "dt_delta": dt * prm["delta"],
+        # Windkessel ODE: dA/dt + lam A = q2 Q'' + q1 Q' + q0 Q
+        "wk_lam": 1.0/(Rd*Cw),
+        "wk_q2": Lint/alpha,
+        "wk_q1": (Rp + Lint/(Rd*Cw))/alpha,
+        "wk_q0": (1.0/Cw + Rp/(Rd*Cw))/alpha,
+    }
+
+
+def maccormack_step_into(ws, Q_out_hist, A_in, coef, wk_active=True, wk_state=None, clock=None):
+    """
+    Advances the perturbation state held in the workspace (solvers/workspace.py)
+    by one time step, without allocating field arrays: reads ws.cur, writes
+    ws.nxt through ufuncs with out=, then swaps.
+
+    A_in       : inlet area perturbation at the new time level,
+                 (P_in(t + dt) - P_ref) / alpha
+    Q_out_hist : outlet flow history [Q^n, Q^{n-1}, Q^{n-2}], shifted in place
+    coef       : step_coefficients(prm)
+    wk_active  : use the Windkessel flow derivatives (off for the first
+                 two steps, when the history is not yet filled)
+    wk_state   : optional outlet area perturbation (array of the shape of
+                 A[-1]), integrated in its own dtype instead of in the state,
+                 so a float32 state can keep a float64 Windkessel ODE
+    clock      : optional solvers/instrument.py PhaseTimer; the step is
+                 booked to predictor, inlet_bc, windkessel and corrector
+    """
+    A, Q = ws.cur["A"], ws.cur["Q"]
+    A_new, Q_new = ws.nxt["A"], ws.nxt["Q"]
+    A_pred, Q_pred, F = ws.tmp["A_pred"], ws.tmp["Q_pred"], ws.tmp["flux"]
+    d, s = ws.tmp["diff"][:-1], ws.tmp["sum"][:-1]
+    dt, r, c0_sq, dt_delta = coef["dt"], coef["r"], coef["c0_sq"], coef["dt_delta"]
+
+    # --- predictor: forward differences on interior, F1 = Q, F2 = c0^2 A ---
+    np.subtract(Q[1:], Q[:-1], out=d)
+    np.multiply(d, r, out=d)
+    np.subtract(A[:-1], d, out=A_pred[:-1])
+
+    np.multiply(A, c0_sq, out=F)
+    np.subtract(F[1:], F[:-1], out=d)
+    np.multiply(d, r, out=d)
+    np.subtract(Q[:-1], d, out=Q_pred[:-1])
+    np.multiply(Q[:-1], dt_delta, out=d)
+    np.subtract(Q_pred[:-1], d, out=Q_pred[:-1])
+    if clock is not None:
+        clock.lap("predictor")
+
+    # inlet predictor via tube law
+    A_pred[0] = A_in
+    Q_pred[0] = Q_pred[1]
+    if clock is not None:
+        clock.lap("inlet_bc")
+
+    # outlet predictor via Windkessel model (one value per column)
+    Q_out_hist[2] = Q_out_hist[1]
+    Q_out_hist[1] = Q_out_hist[0]
+    Q_out_hist[0] = Q[-1]
+
+    if wk_active:
+        dQdt   = (Q_out_hist[0] - Q_out_hist[1]) / dt
+        d2Qdt2 = (Q_out_hist[0] - 2*Q_out_hist[1] + Q_out_hist[2]) / dt**2
+    else:
+        dQdt = d2Qdt2 = 0.0
+
+    A_out = A[-1] if wk_state is None else wk_state[()]
+    RHS = coef["wk_q2"]*d2Qdt2 + coef["wk_q1"]*dQdt + coef["wk_q0"]*Q_out_hist[0]
+    dA_dt_out = - coef["wk_lam"]*A_out + RHS
+
+    A_pred[-1] = A_out + dt * dA_dt_out
+    if wk_state is not None:
+        wk_state[...] = A_out + dt * dA_dt_out
+    Q_pred[-1] = Q_pred[-2]
+    if clock is not None:
+        clock.lap("windkessel")
+
+    # --- corrector: backward differences ---
+    np.subtract(Q_pred[1:], Q_pred[:-1], out=d)
+    np.multiply(d, r, out=d)
+    np.add(A[1:], A_pred[1:], out=A_new[1:])
+    np.subtract(A_new[1:], d, out=A_new[1:])
+    np.multiply(A_new[1:], 0.5, out=A_new[1:])
+
+    np.multiply(A_pred, c0_sq, out=F)
+    np.subtract(F[1:], F[:-1], out=d)
+    np.multiply(d, r, out=d)
+    np.add(Q[1:], Q_pred[1:], out=s)
+    np.subtract(s, d, out=Q_new[1:])
+    np.multiply(s, dt_delta, out=d)
+    np.divide(d, 2, out=d)
+    np.subtract(Q_new[1:], d, out=Q_new[1:])
+    np.multiply(Q_new[1:], 0.5, out=Q_new[1:])
+    if clock is not None:
+        clock.lap("corrector")
+
+    # inlet corrector
+    A_new[0] = A_in
+    Q_new[0] = Q_new[1]
+    if clock is not None:
+        clock.lap("inlet_bc")
+
+    # outlet corrector
+    A_new[-1] = A_pred[-1]
+    Q_new[-1] = Q_new[-2]
+
+    ws.swap()
+    if clock is not None:
+        clock.lap("windkessel")
+
+
+def maccormack_step(A_tilde, Q_tilde, Q_out_hist, A_in, prm, wk_active=True):
+    """
+    Advances the perturbation state (A_tilde, Q_tilde) by one time step.
+    Allocating form of maccormack_step_into, for one-off steps and the
+    analysis tools; time loops should keep a Workspace instead.
+
+    The state may carry a trailing batch axis, shape (Nx, k); parameters in
+    prm then broadcast per column. Returns the new (A_tilde, Q_tilde).
+    """
+    coef = step_coefficients(prm)
+    dtype = np.result_type(A_tilde, Q_tilde, A_in, *coef.values())
+    ws = Workspace.for_state(("A", "Q"), MACCORMACK_SCRATCH, dtype, A=A_tilde, Q=Q_tilde)
+    maccormack_step_into(ws, Q_out_hist, A_in, coef, wk_active)
+    return ws.state()
+
+
+def maccormack_run_fused(A, Q, Q_out_hist, A_in, n_from, n_to, dt, r, c0_sq, dt_delta,
+                         wk_lam, wk_q2, wk_q1, wk_q0, wk_from,
+                         monitor_idx, save_every, envelope,
+                         t_rec, A_rec, Q_rec, A_lo, A_hi, Q_lo, Q_hi, running, frame):
+    """
+    Steps n_from .. n_to - 1 of the time loop of run_artery_simulation as
+    scalar loops: per step one predictor and one corrector pass over the
+    grid, the boundary conditions, and the monitor recording (every
+    save_every steps plus the last; with envelope, min/max of each interval
+    into A_lo ... Q_hi).
+
+    Same arithmetic, in the same order, as maccormack_step_into, so the
+    python and jit backends reproduce the numpy one. Written for Numba
+    (arrays and scalars only); see solvers/backends.py. A, Q and
+    Q_out_hist hold the state, running (4 x monitors: the envelope of the
+    current interval, starting as +inf, -inf, +inf, -inf) and frame the
+    recording, so a run can be split into calls over consecutive steps.
+    Returns the number of frames recorded so far.
+    """
+    Nx = A.shape[0]
+    Nt = A_in.shape[0]
+    n_mon = monitor_idx.shape[0]
+    A_state = A
+    Q_state = Q
+    A_new = np.empty(Nx)
+    Q_new = np.empty(Nx)
+    A_pred = np.empty(Nx)
+    Q_pred = np.empty(Nx)
+    run_A_lo = running[0]
+    run_A_hi = running[1]
+    run_Q_lo = running[2]
+    run_Q_hi = running[3]
+
+    for n in range(n_from, n_to):
+        # --- predictor: forward differences on interior ---
+        for i in range(Nx - 1):
+            A_pred[i] = A[i] - (Q[i+1] - Q[i]) * r
+            Q_pred[i] = (Q[i] - (A[i+1]*c0_sq - A[i]*c0_sq) * r) - Q[i] * dt_delta
+        A_pred[0] = A_in[n]
         Q_pred[0] = Q_pred[1]
 
-        # outlet predictor via Windkessel model
+        # --- Windkessel outlet ---
         Q_out_hist[2] = Q_out_hist[1]
         Q_out_hist[1] = Q_out_hist[0]
-        Q_out_hist[0] = Q_tilde[-1]
-
-        if n >= 2:
-            dQdt   = (Q_out_hist[0] - Q_out_hist[1]) / dt
+        Q_out_hist[0] = Q[Nx-1]
+        if n >= wk_from:
+            dQdt = (Q_out_hist[0] - Q_out_hist[1]) / dt
             d2Qdt2 = (Q_out_hist[0] - 2*Q_out_hist[1] + Q_out_hist[2]) / dt**2
         else:
-            dQdt = d2Qdt2 = 0.0
+            dQdt = 0.0
+            d2Qdt2 = 0.0
+        RHS = wk_q2*d2Qdt2 + wk_q1*dQdt + wk_q0*Q[Nx-1]
+        A_pred[Nx-1] = A[Nx-1] + dt * (-wk_lam*A[Nx-1] + RHS)
+        Q_pred[Nx-1] = Q_pred[Nx-2]
 
-        A_out = A_tilde[-1]
+        # --- corrector: backward differences ---
+        for i in range(1, Nx):
+            A_new[i] = ((A[i] + A_pred[i]) - (Q_pred[i] - Q_pred[i-1]) * r) * 0.5
+            s = Q[i] + Q_pred[i]
+            Q_new[i] = ((s - (A_pred[i]*c0_sq - A_pred[i-1]*c0_sq) * r) - s * dt_delta / 2) * 0.5
+        A_new[0] = A_in[n]
+        Q_new[0] = Q_new[1]
+        A_new[Nx-1] = A_pred[Nx-1]
+        Q_new[Nx-1] = Q_new[Nx-2]
+
+        A, A_new = A_new, A
+        Q, Q_new = Q_new, Q
+
+        # --- monitors ---
+        if envelope:
+            for k in range(n_mon):
+                a = A[monitor_idx[k]]
+                q = Q[monitor_idx[k]]
+                run_A_lo[k] = min(run_A_lo[k], a)
+                run_A_hi[k] = max(run_A_hi[k], a)
+                run_Q_lo[k] = min(run_Q_lo[k], q)
+                run_Q_hi[k] = max(run_Q_hi[k], q)
+        if n % save_every == 0 or n == Nt - 1:
+            t_rec[frame] = n * dt + dt
+            for k in range(n_mon):
+                A_rec[frame, k] = A[monitor_idx[k]]
+                Q_rec[frame, k] = Q[monitor_idx[k]]
+            if envelope:
+                for k in range(n_mon):
+                    A_lo[frame, k] = run_A_lo[k]
+                    A_hi[frame, k] = run_A_hi[k]
+                    Q_lo[frame, k] = run_Q_lo[k]
+                    Q_hi[frame, k] = run_Q_hi[k]
+                run_A_lo[:] = np.inf
+                run_A_hi[:] = -np.inf
+                run_Q_lo[:] = np.inf
+                run_Q_hi[:] = -np.inf
+            frame += 1
+
+    if (n_to - n_from) % 2 == 1:        # the state ended up in the scratch buffers
+        A_state[:] = A
+        Q_state[:] = Q
+    return frame
+
+
+maccormack_run_jit = backends.jit(maccormack_run_fused)
+FUSED_CHUNK_STEPS = 512     # steps per kernel call of a run followed by a progress
+
+
+def _running_envelope(n_mon):
+    """The running argument of maccormack_run_fused for a new run."""
+    return np.array([[np.inf], [-np.inf], [np.inf], [-np.inf]]) * np.ones(n_mon)
+
+
+def _warm_fused():
+    """Compile (or load from the Numba cache) the jit kernel on a tiny grid."""
+    frames = np.empty((2, 3))
+    maccormack_run_jit(np.zeros(8), np.zeros(8), np.zeros(3), np.zeros(2), 0, 2, 1e-5, 1e-2,
+                       1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 2, np.array([0, 4, 7]), 1, True,
+                       np.empty(2), frames, frames.copy(), frames.copy(), frames.copy(),
+                       frames.copy(), frames.copy(), _running_envelope(3), 0)
+
+
+backends.register_warmup("artery_sim_full", _warm_fused)
+
+
+# -------------------------
+# 5. Packed state x = [A, Q, Q_out^{n-1}, Q_out^{n-2}] for the analysis tools
+# -------------------------
+def pack_state(A, Q, Q_out_hist):
+    """Stack (A, Q, Q_out^{n-1}, Q_out^{n-2}) into one state vector (or matrix)."""
+    return np.concatenate([A, Q, Q_out_hist[:2]], axis=0)
+
+
+def unpack_state(x, Nx):
+    """Inverse of pack_state; returns fresh (A, Q, Q_out_hist) arrays."""
+    A = x[:Nx].copy()
+    Q = x[Nx:2*Nx].copy()
+    Q_out_hist = np.zeros((3,) + x.shape[1:], dtype=x.dtype)
+    Q_out_hist[:2] = x[2*Nx:2*Nx + 2]
+    return A, Q, Q_out_hist
+
+
+def linear_step(x, u, prm, wk_active=True):
+    """One full-order step x -> M x + b u on packed (possibly batched) states."""
+    A, Q, Q_out_hist = unpack_state(x, prm["Nx"])
+    A, Q = maccormack_step(A, Q, Q_out_hist, u, prm, wk_active=wk_active)
+    return pack_state(A, Q, Q_out_hist)
+
+
+def state_space(**params):
+    """
+    Linear step x_{n+1} = M x_n + B u_n on the packed state with
+    u_n = A_in(t_{n+1}), for analysis/linear_operator.py. M has the
+    Windkessel active, i.e. it is the step of every time level except the
+    first two of a run from rest.
+    """
+    prm = artery_parameters(**params)
+    Nx, Nt, dt = prm["Nx"], prm["Nt"], prm["dt"]
+    A_in = (inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"]) - prm["P_ref"]) / prm["alpha"]
+
+    def step(x, u):
+        return linear_step(x, u[0], prm)
+
+    return {
+        "step": step,
+        "n_state": 2*Nx + 2,
+        "n_input": 1,
+        "dt": dt,
+        "Nt": Nt,
+        "x0": np.zeros(2*Nx + 2),
+        "u": A_in[:, None],
+        "steps_per_cycle": int(round(prm["T_heart"] / dt)),
+        "fields": {"A": slice(0, Nx), "Q": slice(Nx, 2*Nx), "Q_out_hist": slice(2*Nx, 2*Nx + 2)},
+    }
 
-        RHS = (Lint/alpha)*d2Qdt2 \
-            + (Rp + Lint/(Rd*Cw))/alpha*dQdt \
-            + (1.0/Cw + Rp/(Rd*Cw))/alpha*Q_tilde[-1]
 
-        dA_dt_out = - (1.0/(Rd*Cw))*A_out + RHS
+def numerics(**params):
+    """Discretization summary for the pre-flight check (solvers/stability.py)."""
+    prm = artery_parameters(**params)
+    frames = prm["Nt"] // prm["save_every"] + 1
+    return {
+        "scheme": SPATIAL_ORDERS[prm["order"]],
+        "c": float(np.max(prm["c0"])),
+        "dt": prm["dt"],
+        "dz": prm["dz"],
+        "delta": float(np.max(prm["delta"])),
+        "Nt": prm["Nt"],
+        "Nx": prm["Nx"],
+        "n_fields": 2,
+        # t, 3 monitors x (P, Q, A), P_out, Q_out, P_wk (+ min/max of P and Q)
+        "n_output_values": (13 + 12 * bool(prm["envelope"])) * frames,
+        "save_every": prm["save_every"],
+        "resolution": {"dt": "dt", "dz": "dz", "save_every": "save_every"},
+    }
 
-        A_pred[-1] = A_out + dt * dA_dt_out
-        Q_pred[-1] = Q_pred[-2]
 
-        # --- corrector ---
-        F1p, F2p = flux(A_pred, Q_pred)
-        A_new = A_tilde.copy()
-        Q_new = Q_tilde.copy()
+# coefficients applied to the (possibly float32) state in the stencil
+_STENCIL_COEFFICIENTS = ("r", "c0_sq", "dt_delta")
 
-        for i in range(1, Nx):
-            A_new[i] = 0.5*(A_tilde[i] + A_pred[i]
-                            - dt/dz*(F1p[i] - F1p[i-1]))
-            Q_new[i] = 0.5*(Q_tilde[i] + Q_pred[i]
-                            - dt/dz*(F2p[i] - F2p[i-1])
-                            - dt * delta * (Q_tilde[i] + Q_pred[i]) / 2)
-
-        # inlet corrector
-        A_new[0] = (inlet_pressure(t + dt) - P_ref) / alpha
-        Q_new[0] = Q_new[1]
 
-        # outlet corrector
-        A_new[-1] = A_pred[-1]
-        Q_new[-1] = Q_new[-2]
+def _run_numpy(prm, initial_state, Q_out_hist, A_in, monitor_idx, precision="float64", clock=None,
+               progress=None, state_out=None):
+    """
+    numpy backend: vectorized steps in a Workspace, monitors through a
+    Recorder. A Q_out_hist of shape (3, k) runs a batch of k columns
+    (see run_batch); the series then have shape (frames, 3, k).
+    """
+    Nt, dt = prm["Nt"], prm["dt"]
+    dtype = fp.state_dtype(precision)
+    batch = Q_out_hist.shape[1:]
+
+    # area / flow perturbation, double-buffered with the step's scratch arrays
+    ws = Workspace((prm["Nx"],) + batch, ("A", "Q"), MACCORMACK_SCRATCH, dtype)
+    if initial_state is not None:
+        ws.load(A=initial_state[0], Q=initial_state[1])
+    coef = step_coefficients(prm)
+
+    # reduced precision: stencil coefficients in the state dtype so the
+    # ufuncs run in float32; the Windkessel ODE in the accumulator dtype,
+    # on its own outlet area (wk_state) unless that is float32 as well
+    wk_state = None
+    if precision != "float64":
+        wk_dtype = fp.accumulator_dtype(precision)
+        coef = {k: dtype.type(v) if k in _STENCIL_COEFFICIENTS or wk_dtype == dtype else v
+                for k, v in coef.items()}
+        Q_out_hist = Q_out_hist.astype(wk_dtype)
+        if wk_dtype != dtype:
+            wk_state = np.array(ws.cur["A"][-1] if initial_state is None else initial_state[0][-1],
+                                dtype=wk_dtype)
+
+    # decimated monitor histories; P, P_out and P_wk follow from A (linear tube law)
+    rec = Recorder({"A": (3,) + batch, "Q": (3,) + batch}, EveryN(prm["save_every"]), Nt,
+                   envelope=bool(prm["envelope"]), dtype=dtype)
+    if clock is not None:
+        clock.lap("setup")
 
-        # update for next step
-        A_tilde = A_new
-        Q_tilde = Q_new
+    for n in range(Nt):
+        t = n * dt
+
+        maccormack_step_into(
+            ws, Q_out_hist, A_in[n], coef,
+            wk_active=n >= 2 or initial_state is not None, wk_state=wk_state, clock=clock,
+        )
+        A_tilde, Q_tilde = ws.state()
 
         # --- record histories (with decimation) ---
-        if n % save_every == 0 or n == Nt - 1:  # save every Nth step + final step
-            t_curr = t + dt
-            t_hist.append(t_curr)
-
-            P_out = P_ref + alpha * A_tilde[-1]
-            P_out_hist.append(P_out)
-            P_wk_hist.append(P_out)
-            Q_out_hist_rec.append(Q_tilde[-1])
-
-            # monitor at inlet, mid, outlet
-            for k, idx in enumerate(monitor_idx):
-                A_hist_multi[k].append(A_tilde[idx] + A_ref)
-                Q_hist_multi[k].append(Q_tilde[idx])
-                P_hist_multi[k].append(P_ref + alpha * A_tilde[idx])
-        
-        # Progress logging every 20% 
-        if n % (Nt // 5) == 0:
+        if rec.needs(n):
+            rec.record(n, t + dt, A=A_tilde[monitor_idx], Q=Q_tilde[monitor_idx])
+
+        # Progress logging every 20%
+        if n % max(Nt // 5, 1) == 0:
             print(f"Simulation progress: {100*n//Nt}% ({n}/{Nt} steps)")
+        if progress is not None:
+            progress.update(n + 1)
+        if clock is not None:
+            clock.lap("record")
+
+    if state_out is not None:
+        state_out["state"] = (*(a.copy() for a in ws.state()), Q_out_hist.copy())
+    env = None
+    if rec.envelope:
+        env = rec.envelope_of("A") + rec.envelope_of("Q")
+    return rec.times(), rec.series("A"), rec.series("Q"), env
+
+
+def _run_fused(prm, initial_state, Q_out_hist, A_in, monitor_idx, jit=True, clock=None,
+               progress=None, state_out=None):
+    """
+    python / jit backends: the fused kernel writes the monitor frames, so
+    its phases are timed together as "kernel". With a progress it runs in
+    calls of FUSED_CHUNK_STEPS steps, reporting (and checking for
+    cancellation) between them; otherwise in one call.
+    """
+    Nx, Nt, save_every = prm["Nx"], prm["Nt"], prm["save_every"]
+    coef = {k: float(v) for k, v in step_coefficients(prm).items()}
+
+    A = np.zeros(Nx)
+    Q = np.zeros(Nx)
+    if initial_state is not None:
+        A[:] = initial_state[0]
+        Q[:] = initial_state[1]
+
+    capacity = -(-Nt // save_every) + 1
+    t_rec = np.empty(capacity)
+    frames = [np.empty((capacity, len(monitor_idx))) for _ in range(6)]
+    running = _running_envelope(len(monitor_idx))
+    kernel = maccormack_run_jit if jit else maccormack_run_fused
+    chunk = Nt if progress is None else FUSED_CHUNK_STEPS
+    if clock is not None:
+        clock.lap("setup")
+    count = 0
+    for n_from in range(0, Nt, chunk):
+        n_to = min(n_from + chunk, Nt)
+        count = kernel(
+            A, Q, Q_out_hist, A_in, n_from, n_to,
+            coef["dt"], coef["r"], coef["c0_sq"], coef["dt_delta"],
+            coef["wk_lam"], coef["wk_q2"], coef["wk_q1"], coef["wk_q0"],
+            0 if initial_state is not None else 2,
+            monitor_idx.astype(np.int64), save_every, bool(prm["envelope"]),
+            t_rec, *frames, running, count,
+        )
+        if progress is not None:
+            progress.update(n_to)
+    if clock is not None:
+        clock.lap("kernel")
+    if state_out is not None:
+        state_out["state"] = (A, Q, Q_out_hist.copy())
+    A_rec, Q_rec, A_lo, A_hi, Q_lo, Q_hi = (f[:count] for f in frames)
+    env = (A_lo, A_hi, Q_lo, Q_hi) if prm["envelope"] else None
+    return t_rec[:count], A_rec, Q_rec, env
+
+
+def _run_compact(prm, initial_state, Q_out_hist, monitor_idx, clock=None, progress=None,
+                 state_out=None):
+    """
+    order=4: compact fourth-order derivatives with RK4 (solvers/highorder.py).
+
+    The inlet area and the Windkessel outlet area are imposed as incoming
+    characteristics on every RK stage. The outlet ODE is advanced once per
+    step, with the same explicit update as the MacCormack scheme, and
+    interpolated linearly to the stage times. The RK4 stages (with the
+    boundary conditions) are timed together as "compact_rk4".
+    """
+    Nt, dt = prm["Nt"], prm["dt"]
+    c0 = float(prm["c0"])
+    solver = CompactRK4(prm["Nx"], prm["dz"], c0, float(prm["delta"]))
+    w = solver.state
+    if initial_state is not None:
+        w[0], w[1] = initial_state[0], initial_state[1]
+
+    # inlet area at the stage times t + dt/2 and t + dt of every step
+    t_half = dt * (np.arange(Nt) + 0.5)
+    A_in_half = (inlet_pressure(t_half, prm["T_heart"]) - prm["P_ref"]) / prm["alpha"]
+    A_in_full = (inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"]) - prm["P_ref"]) / prm["alpha"]
+    coef = step_coefficients(prm)
+    lam, q2, q1, q0 = coef["wk_lam"], coef["wk_q2"], coef["wk_q1"], coef["wk_q0"]
+
+    # boundary areas of the current step's stages: [inlet, outlet] at t + dt/2 and t + dt
+    stage_A = {}
+
+    def bc(w, t):
+        A_inlet, A_outlet = stage_A[t]
+        at_boundary(w, 0, c0, A=A_inlet)
+        at_boundary(w, -1, c0, A=A_outlet)
+
+    rec = Recorder({"A": (3,), "Q": (3,)}, EveryN(prm["save_every"]), Nt,
+                   envelope=bool(prm["envelope"]))
+    if clock is not None:
+        clock.lap("setup")
+
+    for n in range(Nt):
+        t = n * dt
+        w = solver.state
+
+        Q_out_hist[2] = Q_out_hist[1]
+        Q_out_hist[1] = Q_out_hist[0]
+        Q_out_hist[0] = w[1, -1]
+        if n >= 2 or initial_state is not None:
+            dQdt = (Q_out_hist[0] - Q_out_hist[1]) / dt
+            d2Qdt2 = (Q_out_hist[0] - 2*Q_out_hist[1] + Q_out_hist[2]) / dt**2
+        else:
+            dQdt = d2Qdt2 = 0.0
+        A_out = w[0, -1]
+        A_out_new = A_out + dt * (-lam*A_out + q2*d2Qdt2 + q1*dQdt + q0*Q_out_hist[0])
+
+        stage_A.clear()
+        stage_A[t + 0.5 * dt] = (A_in_half[n], 0.5 * (A_out + A_out_new))
+        stage_A[t + dt] = (A_in_full[n], A_out_new)
+        if clock is not None:
+            clock.lap("windkessel")
+        solver.step(t, dt, bc)
+        if clock is not None:
+            clock.lap("compact_rk4")
+
+        if rec.needs(n):
+            w = solver.state
+            rec.record(n, t + dt, A=w[0, monitor_idx], Q=w[1, monitor_idx])
+
+        if n % max(Nt // 5, 1) == 0:
+            print(f"Simulation progress: {100*n//Nt}% ({n}/{Nt} steps)")
+        if progress is not None:
+            progress.update(n + 1)
+        if clock is not None:
+            clock.lap("record")
+
+    if state_out is not None:
+        w = solver.state
+        state_out["state"] = (w[0].copy(), w[1].copy(), Q_out_hist.copy())
+    env = None
+    if rec.envelope:
+        env = rec.envelope_of("A") + rec.envelope_of("Q")
+    return rec.times(), rec.series("A"), rec.series("Q"), env
+
+
+def run_artery_simulation(initial_state=None, warm_start=False, backend=None,
+                          precision="float64", timings=False, progress=None, state_out=None,
+                          **params):
+    """
+    Runs the healthy artery model with Windkessel outlet
+    and returns time series for pressure, flow, and area
+    at inlet, midpoint, and outlet, plus outlet/Windkessel signals.
+
+    Keyword arguments override DEFAULT_PARAMS (e.g. E, Rp, N_cycles).
+    With envelope=1 the result also holds "envelope": min/max pressure and
+    flow at the monitors over each save interval, so peaks between saved
+    steps are kept.
+    initial_state : optional (A_tilde, Q_tilde, Q_out_hist) to start from
+                    instead of rest; Q_out_hist holds the outlet flows at
+                    -dt, -2dt, -3dt
+    warm_start    : take initial_state from the periodic 0-D model
+                    (solvers/lumped.py), so the run starts close to the
+                    periodic steady state
+    backend       : "python", "numpy", "jit" or "auto"/None (default, see
+                    solvers/backends.py); jit falls back to numpy without Numba
+    precision     : "float64", "mixed" or "float32" (solvers/precision.py);
+                    reduced precision runs on the numpy backend and returns
+                    float32 values (t stays float64)
+    timings       : add "timings", the wall time of each phase of the run
+                    (setup, predictor, corrector, inlet_bc, windkessel,
+                    record, output; see solvers/instrument.py)
+    progress      : optional solvers/progress.py Progress, updated every
+                    step (raises Cancelled when the run is cancelled); the
+                    python / jit backends every FUSED_CHUNK_STEPS steps
+    state_out     : optional dict; receives the final (A_tilde, Q_tilde,
+                    Q_out_hist) under "state", e.g. to start a finer run
+                    from it (see refine_state)
+    All pressures are returned in mmHg for convenience.
+    """
+    clock = PhaseTimer() if timings else None
+    if warm_start and initial_state is None:
+        from solvers.lumped import initial_state_1d
+        initial_state = initial_state_1d(**params)
+
+    prm = artery_parameters(**params)
+    L, Nx, Nt = prm["L"], prm["Nx"], prm["Nt"]
+    dt, save_every = prm["dt"], prm["save_every"]
+    A_ref, alpha, P_ref = prm["A_ref"], prm["alpha"], prm["P_ref"]
+
+    # inlet area perturbation at every new time level t + dt
+    A_in = (inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"]) - P_ref) / alpha
+
+    # -------------------------
+    # 6. Spatial Grid and Monitoring Setup
+    # -------------------------
+
+    z = np.linspace(0, L, Nx)
+
+    # Monitor at inlet, midpoint, outlet
+    monitor_z = np.array([0.0, L/2, L])
+    monitor_idx = np.array([np.argmin(np.abs(z - zz)) for zz in monitor_z])
+
+    # outlet time derivative buffers for Windkessel
+    Q_out_hist = np.zeros(3)
+    if initial_state is not None:
+        Q_out_hist[:] = initial_state[2]
+
+    backend = backends.resolve(backend)
+    if fp.check(precision) != "float64":
+        backend = "numpy"       # the fused kernel is float64 only
+    scheme = SPATIAL_ORDERS[prm["order"]]
+    if scheme == "compact_rk4":
+        if precision != "float64":
+            raise ValueError("The compact scheme (order=4) runs in float64 only")
+        backend = "numpy"
+    print(f"Starting artery simulation: {Nt} steps, saving every {save_every} ({scheme}, {backend} backend)")
+    if clock is not None:
+        clock.lap("setup")
+    if progress is not None:
+        progress.start(Nt)
 
-    print("Simulation completed! Processing results...")
-    
     # -------------------------
-    # 6. Convert to arrays and JSON-friendly lists
+    # 7. Time Stepping (MacCormack, or compact + RK4 for order=4)
     # -------------------------
-    t_hist = np.array(t_hist)
-    P_out_hist = np.array(P_out_hist)
-    Q_out_hist_rec = np.array(Q_out_hist_rec)
-    P_wk_hist = np.array(P_wk_hist)
+    if scheme == "compact_rk4":
+        t_rec, A_rec, Q_rec, env = _run_compact(prm, initial_state, Q_out_hist, monitor_idx, clock,
+                                                progress, state_out)
+    elif backend == "numpy":
+        t_rec, A_rec, Q_rec, env = _run_numpy(prm, initial_state, Q_out_hist, A_in, monitor_idx,
+                                              precision, clock, progress, state_out)
+    else:
+        t_rec, A_rec, Q_rec, env = _run_fused(prm, initial_state, Q_out_hist, A_in, monitor_idx,
+                                              jit=backend == "jit", clock=clock, progress=progress,
+                                              state_out=state_out)
+
+    print("Simulation completed! Processing results...")
+
+    result = _package(t_rec, monitor_z, A_rec, Q_rec, env, alpha, A_ref, P_ref,
+                      fp.state_dtype(precision))
+    if clock is not None:
+        clock.lap("output")
+        result["timings"] = clock.breakdown(steps=Nt)
+
+    return result
 
-    # assemble lists for each monitor location
-    pressure_mmHg = []
-    flow = []
-    area = []
 
-    for k in range(len(monitor_idx)):
-        P_arr = np.array(P_hist_multi[k]) / mmHg_to_Pa  # Pa -> mmHg
-        Q_arr = np.array(Q_hist_multi[k])
-        A_arr = np.array(A_hist_multi[k])
+# -------------------------
+# 8. Convert to arrays and JSON-friendly lists
+# -------------------------
+def _package(t_rec, monitor_z, A_rec, Q_rec, env, alpha, A_ref, P_ref, dtype):
+    """Result dict of one run from its monitor series (frames, 3)."""
+    # monitors are (inlet, mid, outlet); the outlet is the last grid point
+    def to_list(a):
+        return fp.to_list(np.asarray(a).astype(dtype, copy=False))
 
-        pressure_mmHg.append(P_arr.tolist())
-        flow.append(Q_arr.tolist())
-        area.append(A_arr.tolist())
+    A_rec, Q_rec = A_rec.T, Q_rec.T
+    P_mmHg = (P_ref + alpha * A_rec) / mmHg_to_Pa       # Pa -> mmHg
 
     result = {
-        "t": t_hist.tolist(),
+        "t": t_rec.tolist(),
         "monitor_z": monitor_z.tolist(),          # [0.0, L/2, L]
-        "pressure_mmHg": pressure_mmHg,          # list of 3 lists
-        "flow": flow,                            # list of 3 lists
-        "area": area,                            # list of 3 lists
-        "P_out_mmHg": (P_out_hist / mmHg_to_Pa).tolist(),
-        "Q_out": Q_out_hist_rec.tolist(),
-        "P_wk_mmHg": (P_wk_hist / mmHg_to_Pa).tolist(),
+        "pressure_mmHg": to_list(P_mmHg),        # list of 3 lists
+        "flow": to_list(Q_rec),                  # list of 3 lists
+        "area": to_list(A_rec + A_ref),          # list of 3 lists
+        "P_out_mmHg": to_list(P_mmHg[-1]),
+        "Q_out": to_list(Q_rec[-1]),
+        "P_wk_mmHg": to_list(P_mmHg[-1]),
     }
-
+    if env is not None:
+        A_lo, A_hi, Q_lo, Q_hi = env
+        result["envelope"] = {
+            "pressure_mmHg": {"min": to_list((P_ref + alpha * A_lo.T) / mmHg_to_Pa),
+                              "max": to_list((P_ref + alpha * A_hi.T) / mmHg_to_Pa)},
+            "flow": {"min": to_list(Q_lo.T), "max": to_list(Q_hi.T)},
+        }
     return result
 
+
+def refine_state(state, dt_from, **params):
+    """
+    initial_state for a run with params from the final (A_tilde, Q_tilde,
+    Q_out_hist) of a run on another grid and time step dt_from (e.g. a
+    coarse preview; see state_out): the fields interpolated linearly in z,
+    the outlet flow history linearly in t.
+    """
+    prm = artery_parameters(**params)
+    A, Q, Q_out_hist = (np.asarray(v, dtype=float) for v in state)
+    z_from = np.linspace(0, prm["L"], len(A))
+    z = np.linspace(0, prm["L"], prm["Nx"])
+
+    # outlet flow at 0, -dt_from, -2 dt_from, -3 dt_from, oldest first for np.interp
+    t_from = -dt_from * np.arange(3, -1, -1)
+    Q_out = np.concatenate([Q_out_hist[::-1], Q[-1:]])
+    return (np.interp(z, z_from, A), np.interp(z, z_from, Q),
+            np.interp(-prm["dt"] * np.arange(1, 4), t_from, Q_out))
+
+
 # Wrapper for auto-registration
-def run_simulation():
+def run_simulation(**params):
     """Thin wrapper so the registry picks up this simulation under key 'artery_sim_full'."""
-    return run_artery_simulation()
+    return run_artery_simulation(**params)
+
+
+# physical parameters that may differ between the columns of one batched run
+BATCH_PARAMS = ("rho", "mu", "D_ref", "E", "h", "Rp", "Rd", "Cw", "Lint")
+
+
+def run_batch(params_list, progress=None):
+    """
+    Runs parameter sets that differ only in BATCH_PARAMS as one vectorized
+    ensemble (numpy backend, float64, the state has a column per set) and
+    returns their results, each the same as run_simulation(**params).
+    Sets for the compact scheme (order=4) run one by one.
+    progress: optional solvers/progress.py Progress, updated every step of
+    the ensemble (or of each run, when they run one by one)
+    """
+    shared = {k: v for k, v in params_list[0].items() if k not in BATCH_PARAMS}
+    for params in params_list[1:]:
+        if {k: v for k, v in params.items() if k not in BATCH_PARAMS} != shared:
+            raise ValueError(f"Batched runs may only differ in {BATCH_PARAMS}")
+    if artery_parameters(**shared)["order"] != 2 or len(params_list) == 1:
+        return [run_artery_simulation(**params, progress=progress) for params in params_list]
+
+    k = len(params_list)
+    columns = {name: np.array([params.get(name, DEFAULT_PARAMS[name]) for params in params_list], float)
+               for name in BATCH_PARAMS if any(name in params for params in params_list)}
+    prm = artery_parameters(**shared, **columns)
+    Nt, dt, L = prm["Nt"], prm["dt"], prm["L"]
+    alpha = np.broadcast_to(prm["alpha"], (k,))
+    A_ref = np.broadcast_to(prm["A_ref"], (k,))
+    A_in = (inlet_pressure(dt * np.arange(1, Nt + 1), prm["T_heart"])[:, None] - prm["P_ref"]) / alpha
+
+    z = np.linspace(0, L, prm["Nx"])
+    monitor_z = np.array([0.0, L/2, L])
+    monitor_idx = np.array([np.argmin(np.abs(z - zz)) for zz in monitor_z])
+    print(f"Starting artery batch: {k} runs of {Nt} steps")
+    if progress is not None:
+        progress.start(Nt)
+
+    t_rec, A_rec, Q_rec, env = _run_numpy(prm, None, np.zeros((3, k)), A_in, monitor_idx,
+                                          progress=progress)
+    print("Batch completed! Processing results...")
+    return [
+        _package(t_rec, monitor_z, A_rec[..., j], Q_rec[..., j],
+                 None if env is None else tuple(e[..., j] for e in env),
+                 alpha[j], A_ref[j], prm["P_ref"], np.float64)
+        for j in range(k)
+    ]
+
+
+# -------------------------
+# 9. Manifest for the API (parameters, outputs, cost)
+# -------------------------
+def _dims(**params):
+    prm = artery_parameters(**params)
+    Nt, save_every = prm["Nt"], prm["save_every"]
+    frames = -(-Nt // save_every) + ((Nt - 1) % save_every != 0)   # every Nth step + final step
+    return {"frames": frames, "monitors": 3}
+
+
+MANIFEST = Manifest(
+    name="artery_sim_full",
+    description="Linearized 1-D artery, MacCormack, Blackman–Harris inlet, 4-element Windkessel outlet",
+    parameters=(
+        Parameter("L", DEFAULT_PARAMS["L"], 0.01, 1.0, "m", description="artery length"),
+        Parameter("dz", DEFAULT_PARAMS["dz"], 1.0e-4, 1.0e-2, "m", description="spatial step"),
+        Parameter("T_heart", DEFAULT_PARAMS["T_heart"], 0.3, 2.0, "s", description="heart period"),
+        Parameter("N_cycles", DEFAULT_PARAMS["N_cycles"], 1, 200, kind=int,
+                  description="simulated heart cycles"),
+        Parameter("dt", DEFAULT_PARAMS["dt"], 1.0e-7, 1.0e-3, "s", description="time step"),
+        Parameter("save_every", DEFAULT_PARAMS["save_every"], 1, 100000, kind=int,
+                  description="output decimation"),
+        Parameter("envelope", DEFAULT_PARAMS["envelope"], 0, 1, kind=int,
+                  description="1: add per-interval min/max of pressure and flow"),
+        Parameter("order", DEFAULT_PARAMS["order"], 2, 4, kind=int, choices=(2, 4),
+                  description="spatial order: 2 MacCormack, 4 compact finite differences + RK4"),
+        Parameter("rho", DEFAULT_PARAMS["rho"], 900.0, 1200.0, "kg/m^3", description="blood density"),
+        Parameter("mu", DEFAULT_PARAMS["mu"], 1.0e-3, 1.0e-2, "Pa s", description="viscosity"),
+        Parameter("D_ref", DEFAULT_PARAMS["D_ref"], 1.0e-3, 3.0e-2, "m", description="reference diameter"),
+        Parameter("E", DEFAULT_PARAMS["E"], 1.0e5, 1.0e7, "Pa", description="Young's modulus"),
+        Parameter("h", DEFAULT_PARAMS["h"], 1.0e-5, 3.0e-3, "m", description="wall thickness"),
+        Parameter("Rp", DEFAULT_PARAMS["Rp"], 1.0e6, 1.0e11, "Pa s/m^3", description="proximal resistance"),
+        Parameter("Rd", DEFAULT_PARAMS["Rd"], 1.0e7, 1.0e12, "Pa s/m^3", description="distal resistance"),
+        Parameter("Cw", DEFAULT_PARAMS["Cw"], 1.0e-14, 1.0e-8, "m^3/Pa", description="compliance"),
+        Parameter("Lint", DEFAULT_PARAMS["Lint"], 0.0, 1.0e8, "Pa s^2/m^3", description="inertance"),
+    ),
+    outputs=(
+        Output("t", ("frames",), "s"),
+        Output("monitor_z", ("monitors",), "m", "inlet, midpoint, outlet"),
+        Output("pressure_mmHg", ("monitors", "frames"), "mmHg"),
+        Output("flow", ("monitors", "frames"), "m^3/s", "flow perturbation"),
+        Output("area", ("monitors", "frames"), "m^2"),
+        Output("P_out_mmHg", ("frames",), "mmHg"),
+        Output("Q_out", ("frames",), "m^3/s"),
+        Output("P_wk_mmHg", ("frames",), "mmHg"),
+    ),
+    dims=_dims,
+    numerics=numerics,
+)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,9 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+from solvers.recorder import EveryN, Recorder
+from solvers.stability import require_stable
+
 """
 Linearized 1D blood flow in an artery with:
 
@@ -64,6 +67,9 @@ print(f"Nx = {Nx}, Nt = {Nt}")
 print(f"Wave speed c0 = {c0:.2f} m/s,   delta = {delta:.3f} 1/s")
 print(f"CFL number = {CFL:.3f} (should be < 1)")
 
+# stop here rather than spend the whole run producing NaNs
+require_stable("lax_wendroff", c0, dt, dz, delta)
+
 
 # Inlet pressure: Blackman–Harris waveform
 
@@ -156,15 +162,12 @@ Q_out_hist = np.zeros(3)
 
 # Monitor at three positions: inlet, mid, outlet
 monitor_z = np.array([0.0, L/2, L])
-monitor_idx = [np.argmin(np.abs(z - zz)) for zz in monitor_z]
+monitor_idx = np.array([np.argmin(np.abs(z - zz)) for zz in monitor_z])
 
-t_hist = []
-# total area A_ref + A_tilde
-A_hist = [[], [], []]
-# flow perturbation  
-Q_hist = [[], [], []]
-# total pressure P_ref + α A_tilde  
-P_hist = [[], [], []]  
+# Monitor histories of A_tilde and Q_tilde, one frame every record_every steps
+# plus per-frame min/max, so the plots keep the peaks of every step
+record_every = 10
+rec = Recorder({"A": (3,), "Q": (3,)}, EveryN(record_every), Nt, envelope=True)
 
 # Time-stepping loop: Lax–Wendroff + Windkessel BC
 
@@ -232,18 +235,16 @@ for n in range(Nt):
     Q_tilde = Q_new
 
     #  Record histories at inlet / mid / outlet
-    t_curr = t + dt
-    t_hist.append(t_curr)
-    for k, idx in enumerate(monitor_idx):
-        A_hist[k].append(A_ref + A_tilde[idx])          # total area
-        Q_hist[k].append(Q_tilde[idx])                  # flow perturbation
-        P_hist[k].append(P_ref + alpha * A_tilde[idx])  # total pressure
-
-# Convert histories to arrays
-t_hist = np.array(t_hist)
-A_hist = [np.array(a) for a in A_hist]
-Q_hist = [np.array(q) for q in Q_hist]
-P_hist = [np.array(p) for p in P_hist]
+    rec.record(n, t + dt, A=A_tilde[monitor_idx], Q=Q_tilde[monitor_idx])
+
+# Histories as (3, frames) arrays
+t_hist = rec.times()
+A_hist = A_ref + rec.series("A").T                   # total area
+Q_hist = rec.series("Q").T                           # flow perturbation
+P_hist = P_ref + alpha * rec.series("A").T           # total pressure
+A_lo, A_hi = (A_ref + a.T for a in rec.envelope_of("A"))
+Q_lo, Q_hi = (q.T for q in rec.envelope_of("Q"))
+P_lo, P_hi = (P_ref + alpha * a.T for a in rec.envelope_of("A"))
 
 # pressure, flow, area vs time at inlet/mid/outlet
 
@@ -255,6 +256,7 @@ plt.figure(figsize=(10, 8))
 plt.subplot(3,1,1)
 for k in range(3):
     plt.plot(t_hist, P_hist[k] / mmHg_to_Pa, label=labels[k])
+    plt.fill_between(t_hist, P_lo[k] / mmHg_to_Pa, P_hi[k] / mmHg_to_Pa, alpha=0.3)
 plt.ylabel("Pressure [mmHg]")
 plt.title("Pressure at Inlet, Mid, and Outlet")
 plt.grid(True)
@@ -264,6 +266,7 @@ plt.legend()
 plt.subplot(3,1,2)
 for k in range(3):
     plt.plot(t_hist, Q_hist[k], label=labels[k])
+    plt.fill_between(t_hist, Q_lo[k], Q_hi[k], alpha=0.3)
 plt.ylabel("Flow Q̃ [m³/s]")
 plt.title("Flow at Inlet, Mid, and Outlet")
 plt.grid(True)
@@ -273,6 +276,7 @@ plt.legend()
 plt.subplot(3,1,3)
 for k in range(3):
     plt.plot(t_hist, A_hist[k], label=labels[k])
+    plt.fill_between(t_hist, A_lo[k], A_hi[k], alpha=0.3)
 plt.ylabel("Area [m²]")
 plt.xlabel("Time [s]")
 plt.title("Area at Inlet, Mid, and Outlet")
@@ -1,74 +1,218 @@
 # backend-python/simulations/healthy_domain_sim.py
 import numpy as np
 
-def run_simulation(save_every: int = 50):
+from solvers import precision as fp
+from solvers.boundaries import BOUNDARIES, Ends
+from solvers.manifest import Manifest, Output, Parameter
+from solvers.workspace import Workspace
+
+# --- Original parameters ---
+K3 = 0.0002          # damping coefficient
+N  = 400             # number of spatial points
+dx = 1.0 / N         # grid spacing
+x  = (np.arange(N) + 0.5) * dx   # cell-centered coordinates
+
+
+def grid(length=1.0, dx=dx):
+    """Cells and cell centres of a domain [0, length] at the spacing dx."""
+    n = int(round(length / dx))
+    return n, (np.arange(n) + 0.5) * dx
+
+
+tau_final = 2.6
+CFL = 0.4
+
+
+def time_step(dt=None):
+    """dt (default CFL dx) and number of steps, with dt adjusted so the final time is exact."""
+    if dt is None:
+        dt = CFL * dx
+        Nt = int(tau_final / dt)
+    else:
+        Nt = max(int(round(tau_final / dt)), 1)
+    return tau_final / Nt, Nt
+
+
+# --- Initial conditions ---
+def bump(x, center, width, amp):
+    s = (x - center) / width
+    out = np.zeros_like(x)
+    mask = np.abs(s) < 1
+    out[mask] = amp * 0.5 * (1 + np.cos(np.pi * s[mask]))
+    return out
+
+
+def initial_condition(eps=0.020, x=x):
+    """Interior a, q at t = 0."""
+    return bump(x, center=0.7, width=eps, amp=0.10), bump(x, center=0.4, width=eps, amp=0.02)
+
+
+# --- Boundary conditions ---
+def apply_bc(a, q):
+    a[0]  = a[1]
+    q[0]  = q[1]
+    a[-1] = a[-2]
+    q[-1] = q[-2]
+
+
+# zero gradient at both ends (solvers/boundaries.py), the same as apply_bc
+NEUMANN = Ends("neumann", "neumann", 1.0, dx)
+
+
+# --- MacCormack method ---
+MACCORMACK_SCRATCH = ("a_p", "q_p", "diff")
+
+
+def mac_cormack_into(ws, dt, ends=NEUMANN, dx=dx, clock=None):
+    """
+    One MacCormack step on the ghost-padded workspace arrays
+    (solvers/workspace.py): reads ws.cur, writes ws.nxt in place, swaps.
+    Space runs along axis 0, so a batch of states can be advanced as columns.
+    ends imposes the ghost values of the predictor and absorbs at the end of
+    the step (damping layers, Windkessel state). dx defaults to the module
+    grid; other grids serve convergence studies. clock: optional
+    solvers/instrument.py PhaseTimer; the step is booked as predictor,
+    corrector and boundary laps.
+    """
+    a, q = ws.cur["a"], ws.cur["q"]
+    a_new, q_new = ws.nxt["a"], ws.nxt["q"]
+    a_p, q_p = ws.tmp["a_p"], ws.tmp["q_p"]
+    d = ws.tmp["diff"][1:-1]
+    r = dt / dx
+    k = dt*K3
+
+    # Predictor step (forward differences)
+    np.subtract(q[2:], q[1:-1], out=d)
+    np.multiply(d, r, out=d)
+    np.subtract(a[1:-1], d, out=a_p[1:-1])
+    np.subtract(a[2:], a[1:-1], out=d)
+    np.multiply(d, r, out=d)
+    np.subtract(q[1:-1], d, out=q_p[1:-1])
+    np.multiply(q[1:-1], k, out=d)
+    np.subtract(q_p[1:-1], d, out=q_p[1:-1])
+    if clock is not None:
+        clock.lap("predictor")
+
+    ends.apply(a_p, q_p)
+    if clock is not None:
+        clock.lap("boundary")
+
+    # Corrector step (backward differences); ghost cells carried over
+    a_new[0], a_new[-1] = a[0], a[-1]
+    q_new[0], q_new[-1] = q[0], q[-1]
+    np.subtract(q_p[1:-1], q_p[:-2], out=d)
+    np.multiply(d, r, out=d)
+    np.add(a[1:-1], a_p[1:-1], out=a_new[1:-1])
+    np.subtract(a_new[1:-1], d, out=a_new[1:-1])
+    np.multiply(a_new[1:-1], 0.5, out=a_new[1:-1])
+
+    np.subtract(a_p[1:-1], a_p[:-2], out=d)
+    np.multiply(d, r, out=d)
+    np.add(q[1:-1], q_p[1:-1], out=q_new[1:-1])
+    np.subtract(q_new[1:-1], d, out=q_new[1:-1])
+    np.multiply(q_p[1:-1], k, out=d)
+    np.subtract(q_new[1:-1], d, out=q_new[1:-1])
+    np.multiply(q_new[1:-1], 0.5, out=q_new[1:-1])
+    if clock is not None:
+        clock.lap("corrector")
+
+    ends.end_step(a_new, q_new, dt)
+    ws.swap()
+    if clock is not None:
+        clock.lap("boundary")
+
+
+def mac_cormack(a, q, dt):
+    """Allocating form of mac_cormack_into; returns the new ghost-padded (a, q)."""
+    ws = Workspace.for_state(("a", "q"), MACCORMACK_SCRATCH, a=a, q=q)
+    mac_cormack_into(ws, dt)
+    return ws.state()
+
+
+def state_space():
+    """
+    Linear step x_{n+1} = M x_n of this scheme on the interior state
+    x = [a, q] (ghost cells follow from apply_bc), for analysis/linear_operator.py.
+    """
+    dt, Nt = time_step()
+
+    def step(x_n, u_n=None):
+        shape = (N + 2,) + x_n.shape[1:]
+        a = np.zeros(shape, dtype=x_n.dtype)
+        q = np.zeros(shape, dtype=x_n.dtype)
+        a[1:-1], q[1:-1] = x_n[:N], x_n[N:]
+        apply_bc(a, q)
+        a, q = mac_cormack(a, q, dt)
+        return np.concatenate([a[1:-1], q[1:-1]])
+
+    return {
+        "step": step,
+        "n_state": 2 * N,
+        "n_input": 0,
+        "dt": dt,
+        "Nt": Nt,
+        "x0": np.concatenate(initial_condition()),
+        "fields": {"a": slice(0, N), "q": slice(N, 2 * N)},
+    }
+
+
+DT = time_step()[0]     # default time step
+
+
+def numerics(save_every: int = 50, boundary: int = 0, length: float = 1.0, dt: float = DT,
+             dx: float = dx):
+    """Discretization summary for the pre-flight check (solvers/stability.py)."""
+    dt, Nt = time_step(dt)
+    frames = Nt // save_every + 1
+    n = grid(length, dx)[0]
+    return {
+        "scheme": "maccormack",
+        "c": 1.0,
+        "dt": dt,
+        "dz": dx,
+        "delta": K3,
+        "Nt": Nt + 1,
+        "Nx": n + 2,
+        "n_fields": 2,
+        "n_output_values": frames * (2 * n + 1) + n,
+        "save_every": save_every,
+        "resolution": {"save_every": "save_every", "dt": "dt", "dz": "dx"},
+    }
+
+
+def run_simulation(save_every: int = 50, boundary: int = 0, length: float = 1.0, dt: float = DT,
+                   dx: float = dx, precision="float64", progress=None, clock=None):
     """
     Runs the MacCormack simulation and returns:
     x        : (N,) spatial grid
     times    : (num_frames,) time samples
     a_arr    : (num_frames, N)
     q_arr    : (num_frames, N)
+    boundary : condition at both ends, a solvers/boundaries.py BOUNDARIES
+               code (0 zero gradient, 1 characteristic, 2 damping layer,
+               3 matched Windkessel)
+    length   : domain length; with an absorbing boundary a shorter domain
+               gives the same solution on the cells it keeps
+    dt, dx   : time step (adjusted so the final time is exact) and cell
+               size, e.g. coarser for a quick preview
+    precision "mixed"/"float32" steps a float32 state and returns float32
+    a_arr, q_arr (solvers/precision.py)
+    progress : optional solvers/progress.py Progress, updated every step
+               (raises Cancelled when the run is cancelled)
+    clock    : optional solvers/instrument.py PhaseTimer, booked with the
+               wall time of each phase of the run (setup, predictor,
+               corrector, boundary, record, output)
     """
-    # --- Original parameters ---
-    K3 = 0.0002          # damping coefficient
-    N  = 400             # number of spatial points
-    dx = 1.0 / N         # grid spacing
-    x  = (np.arange(N) + 0.5) * dx   # cell-centered coordinates
-
-    tau_final = 2.6
-    CFL = 0.4
-    dt  = CFL * dx
-    Nt  = int(tau_final / dt)
-    dt  = tau_final / Nt             # adjust dt so final time is exact
-
-    # solution arrays with ghost cells
-    a = np.zeros(N + 2)
-    q = np.zeros(N + 2)
-
-    # --- Initial conditions ---
-    def bump(x, center, width, amp):
-        s = (x - center) / width
-        out = np.zeros_like(x)
-        mask = np.abs(s) < 1
-        out[mask] = amp * 0.5 * (1 + np.cos(np.pi * s[mask]))
-        return out
-
-    eps = 0.020
-    a[1:-1] = bump(x, center=0.7, width=eps, amp=0.10)
-    q[1:-1] = bump(x, center=0.4, width=eps, amp=0.02)
-
-    # --- Boundary conditions ---
-    def apply_bc(a, q):
-        a[0]  = a[1]
-        q[0]  = q[1]
-        a[-1] = a[-2]
-        q[-1] = q[-2]
-
-    apply_bc(a, q)
-
-    # --- MacCormack method ---
-    def mac_cormack(a, q):
-        a_p = a.copy()   # predictor arrays
-        q_p = q.copy()
-
-        # Predictor step (forward differences)
-        for i in range(1, N + 1):
-            a_p[i] = a[i] - (dt/dx)*(q[i+1] - q[i])
-            q_p[i] = q[i] - (dt/dx)*(a[i+1] - a[i]) - dt*K3*q[i]
-
-        apply_bc(a_p, q_p)
-
-        # Corrector step
-        a_new = a.copy()
-        q_new = q.copy()
-
-        for i in range(1, N + 1):
-            a_new[i] = 0.5*(a[i] + a_p[i] - (dt/dx)*(q_p[i] - q_p[i-1]))
-            q_new[i] = 0.5*(q[i] + q_p[i]
-                            - (dt/dx)*(a_p[i] - a_p[i-1])
-                            - dt*K3*q_p[i])
-
-        return a_new, q_new
+    dt, Nt = time_step(dt)
+    n_cells, x = grid(length, dx)
+    ends = NEUMANN if boundary == 0 else Ends(boundary, boundary, 1.0, dx)
+
+    # solution arrays with ghost cells, double-buffered
+    ws = Workspace((n_cells + 2,), ("a", "q"), MACCORMACK_SCRATCH, fp.state_dtype(precision))
+    a, q = ws.state()
+    a[1:-1], q[1:-1] = initial_condition(x=x)
+
+    ends.apply(a, q)
 
     # --- Simulation loop ---
     a_hist = []
@@ -76,6 +220,10 @@ def run_simulation(save_every: int = 50):
     t_hist = []
 
     tau = 0.0
+    if clock is not None:
+        clock.lap("setup")
+    if progress is not None:
+        progress.start(Nt + 1)
 
     for n in range(Nt + 1):
 
@@ -83,18 +231,51 @@ def run_simulation(save_every: int = 50):
             a_hist.append(a[1:-1].copy())
             q_hist.append(q[1:-1].copy())
             t_hist.append(tau)
+            if clock is not None:
+                clock.lap("record")
 
-        apply_bc(a, q)
-        a, q = mac_cormack(a, q)
+        ends.apply(a, q)
+        if clock is not None:
+            clock.lap("boundary")
+        mac_cormack_into(ws, dt, ends, dx, clock)
+        a, q = ws.state()
         tau += dt
+        if progress is not None:
+            progress.update(n + 1)
 
     a_arr = np.array(a_hist)
     q_arr = np.array(q_hist)
     times = np.array(t_hist)
+    if clock is not None:
+        clock.lap("output")
 
     return x, times, a_arr, q_arr
 
 
+
+MANIFEST = Manifest(
+    name="healthy_domain_sim",
+    description="Dimensionless damped wave on a cell-centred grid, MacCormack",
+    parameters=(
+        Parameter("save_every", 50, 1, 10000, kind=int, description="output decimation"),
+        Parameter("boundary", 0, 0, max(BOUNDARIES), kind=int,
+                  description="both ends: 0 zero gradient, 1 characteristic, 2 damping layer, 3 matched Windkessel"),
+        Parameter("length", 1.0, 0.8, 4.0, description="domain length (the pulses start at 0.4 and 0.7)"),
+        Parameter("dt", DT, 1.0e-4, 0.05, description="time step"),
+        Parameter("dx", dx, 1.0e-4, 0.05, description="cell size"),
+    ),
+    outputs=(
+        Output("x", ("nx",)),
+        Output("times", ("frames",)),
+        Output("a", ("frames", "nx")),
+        Output("q", ("frames", "nx")),
+    ),
+    dims=lambda save_every=50, boundary=0, length=1.0, dt=DT, dx=dx: {
+        "frames": time_step(dt)[1] // save_every + 1, "nx": grid(length, dx)[0]},
+    numerics=numerics,
+)
+
+
 if __name__ == "__main__":
     # quick manual test
     x, times, a_arr, q_arr = run_simulation()
@@ -0,0 +1,75 @@
+# backend-python/solvers/backends.py
+"""
+Kernel backends for the time-stepping loops.
+
+    python   reference: the fused scalar kernel run by the interpreter
+             (slow; defines what the other two must reproduce)
+    numpy    vectorized step with preallocated buffers (solvers/workspace.py)
+    jit      the fused scalar kernel compiled by Numba: predictor, corrector,
+             boundary conditions and recording in one pass over the grid,
+             without temporaries
+
+Numba is optional. jit() returns the plain function when it is missing, and
+resolve() falls back from "jit" to "numpy", so the same code runs
+everywhere. "auto" (the default, or the SIM_BACKEND environment variable)
+picks jit when Numba is installed.
+
+Compiled kernels are cached on disk (cache=True) and can be compiled ahead
+of the first request: modules register a small representative run with
+register_warmup(), and warm() runs them once, e.g. at server start-up.
+"""
+import os
+import time
+
+try:
+    import numba
+except ImportError:     # optional dependency
+    numba = None
+
+BACKENDS = ("python", "numpy", "jit")
+
+_WARMUPS = {}
+
+
+def jit_available():
+    return numba is not None
+
+
+def default_backend():
+    return os.environ.get("SIM_BACKEND", "auto")
+
+
+def resolve(backend=None):
+    """Concrete backend for a request: "auto"/None -> jit or numpy; jit without Numba -> numpy."""
+    backend = backend or default_backend()
+    if backend == "auto":
+        return "jit" if jit_available() else "numpy"
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}' (expected auto or one of {BACKENDS})")
+    if backend == "jit" and not jit_available():
+        return "numpy"
+    return backend
+
+
+def jit(func):
+    """Numba-compiled func (nopython, cached on disk), or func itself without Numba."""
+    if numba is None:
+        return func
+    return numba.njit(cache=True)(func)
+
+
+def register_warmup(name, func):
+    """func() runs a tiny problem through a compiled kernel so it is compiled (or loaded from cache)."""
+    _WARMUPS[name] = func
+
+
+def warm(names=None):
+    """Run the registered warm-ups; returns {name: seconds}. A no-op without Numba."""
+    if not jit_available():
+        return {}
+    timings = {}
+    for name in names or list(_WARMUPS):
+        start = time.perf_counter()
+        _WARMUPS[name]()
+        timings[name] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,175 @@
+# backend-python/solvers/boundaries.py
+"""
+Boundary conditions for the damped linear wave solvers
+
+    A_t + Q_z = 0
+    Q_t + c^2 A_z = -delta Q
+
+on grids whose first and last entries are boundary nodes or ghost cells.
+
+Zero-gradient ends reflect part of every wave, so the test models used to
+need long domains and short runs. The absorbing conditions here let a wave
+leave the domain:
+
+    neumann         zero gradient, A_0 = A_1, Q_0 = Q_1 (the old default)
+    characteristic  non-reflecting: the outgoing Riemann invariant
+                    W = Q +- c A is taken from the neighbour, the incoming
+                    one is prescribed (0: nothing enters)
+    damping_layer   perfectly matched damping layer: the last cells damp A
+                    and Q at the same rate sigma(z), which leaves the
+                    impedance unchanged, so waves enter the layer without
+                    reflecting and decay in it; the edge is characteristic
+    windkessel      three-element Windkessel whose proximal resistance equals
+                    the characteristic impedance 1/c, so it absorbs the
+                    high-frequency content and stores the mean in a
+                    compliance C drained through R
+
+Each object handles one end, given by bind(end, c, dz) as 0 (inlet) or -1
+(outlet). apply(A, Q) is called wherever a solver imposes boundary values
+(several times per step is fine); end_step(A, Q, dt) once per completed
+step, for the layer damping and the Windkessel state. Ends combines the
+two ends of a grid.
+
+BOUNDARIES maps the integer codes of the simulations' "boundary" parameter
+to the kinds, make() builds one with default settings.
+"""
+import math
+
+import numpy as np
+
+BOUNDARIES = {0: "neumann", 1: "characteristic", 2: "damping_layer", 3: "windkessel"}
+
+
+class Boundary:
+    end = 0
+    c = 1.0
+    dz = 1.0
+
+    def bind(self, end, c, dz):
+        self.end, self.c, self.dz = end, float(c), float(dz)
+        # +1 where the outgoing wave is W+ (outlet), -1 where it is W- (inlet)
+        self.sign = 1.0 if end == -1 else -1.0
+        self.inner = -2 if end == -1 else 1
+        return self
+
+    def apply(self, A, Q):
+        raise NotImplementedError
+
+    def end_step(self, A, Q, dt):
+        pass
+
+    def outgoing(self, A, Q):
+        """Outgoing Riemann invariant, taken from the node next to the boundary."""
+        return Q[self.inner] + self.sign * self.c * A[self.inner]
+
+
+class Neumann(Boundary):
+    def apply(self, A, Q):
+        A[self.end] = A[self.inner]
+        Q[self.end] = Q[self.inner]
+
+
+class Characteristic(Boundary):
+    """Outgoing invariant from the interior, incoming invariant prescribed."""
+
+    def __init__(self, incoming=0.0):
+        self.incoming = incoming
+
+    def apply(self, A, Q):
+        w_out = self.outgoing(A, Q)
+        A[self.end] = self.sign * (w_out - self.incoming) / (2 * self.c)
+        Q[self.end] = (w_out + self.incoming) / 2
+
+
+class DampingLayer(Boundary):
+    """
+    `cells` absorbing cells with sigma = sigma_max (d / width)^power, d the
+    distance into the layer. sigma_max defaults to the value for which a
+    wave crossing the layer twice keeps a fraction `reflection` of its
+    amplitude. The edge itself is characteristic.
+    """
+
+    def __init__(self, cells=20, reflection=1e-4, power=3, sigma_max=None):
+        self.cells, self.reflection, self.power = int(cells), reflection, power
+        self.sigma_max = sigma_max
+        self.edge = Characteristic()
+        self._dt = None
+
+    def bind(self, end, c, dz):
+        super().bind(end, c, dz)
+        self.edge.bind(end, c, dz)
+        width = self.cells * self.dz
+        if self.sigma_max is None:
+            self.sigma_max = (self.power + 1) * self.c * math.log(1.0 / self.reflection) / (2.0 * width)
+        d = (np.arange(self.cells) + 1.0) / self.cells          # 1 at the edge
+        self.sigma = self.sigma_max * d**self.power
+        if end == 0:
+            self.sigma = self.sigma[::-1].copy()
+        return self
+
+    def apply(self, A, Q):
+        self.edge.apply(A, Q)
+
+    def end_step(self, A, Q, dt):
+        if dt != self._dt:
+            self.factor = np.exp(-self.sigma * dt)
+            self._dt = dt
+        layer = slice(0, self.cells) if self.end == 0 else slice(-self.cells, None)
+        A[layer] *= self.factor
+        Q[layer] *= self.factor
+
+
+class Windkessel(Boundary):
+    """
+    A_b = Z q + P with the outflow q = +-Q_b, and C dP/dt = q - P / R.
+    Z defaults to the characteristic impedance 1/c (no reflection of fast
+    waves); R and C are in the same A-per-Q units.
+    """
+
+    def __init__(self, R=10.0, C=1.0, Z=None, P0=0.0):
+        self.R, self.C, self.Z, self.P = R, C, Z, P0
+
+    def bind(self, end, c, dz):
+        super().bind(end, c, dz)
+        if self.Z is None:
+            self.Z = 1.0 / self.c
+        return self
+
+    def apply(self, A, Q):
+        s, c = self.sign, self.c
+        Qb = (self.outgoing(A, Q) - s * c * self.P) / (1.0 + c * self.Z)
+        A[self.end] = s * self.Z * Qb + self.P
+        Q[self.end] = Qb
+
+    def end_step(self, A, Q, dt):
+        # exact for the flow held over the step
+        decay = math.exp(-dt / (self.R * self.C))
+        self.P = self.P * decay + self.R * self.sign * Q[self.end] * (1.0 - decay)
+
+
+def make(kind, **settings):
+    """A boundary by name or BOUNDARIES code, with default settings."""
+    kind = BOUNDARIES.get(kind, kind)
+    classes = {"neumann": Neumann, "characteristic": Characteristic,
+               "damping_layer": DampingLayer, "windkessel": Windkessel}
+    if kind not in classes:
+        raise ValueError(f"Unknown boundary {kind!r} (expected one of {BOUNDARIES})")
+    return classes[kind](**settings)
+
+
+class Ends:
+    """Inlet and outlet boundaries of one grid, bound to its wave speed and spacing."""
+
+    def __init__(self, inlet, outlet, c, dz):
+        self.inlet = make(inlet) if isinstance(inlet, (int, str)) else inlet
+        self.outlet = make(outlet) if isinstance(outlet, (int, str)) else outlet
+        self.inlet.bind(0, c, dz)
+        self.outlet.bind(-1, c, dz)
+
+    def apply(self, A, Q):
+        self.inlet.apply(A, Q)
+        self.outlet.apply(A, Q)
+
+    def end_step(self, A, Q, dt):
+        self.inlet.end_step(A, Q, dt)
+        self.outlet.end_step(A, Q, dt)
@@ -0,0 +1,123 @@
+# backend-python/solvers/instrument.py
+"""
+Timing instrumentation for the solver loops, and profilers for the debug
+endpoint.
+
+PhaseTimer splits a run into phases with one clock read per phase
+boundary: lap(name) books the time since the previous lap to `name`, so a
+loop body
+
+    clock.lap("predictor") ... clock.lap("corrector") ...
+
+costs a perf_counter call and a dict update per phase. Solvers take
+clock=None and guard each lap with `if clock is not None`, which is all a
+run pays when timing is off.
+
+Profilers (opt-in, for GET /debug/profile):
+    sample_stacks   a thread samples the calling thread's Python stack
+                    every `interval` seconds; returns the counts of each
+                    stack in the folded format of flamegraph.pl / speedscope
+                    ("outer;inner;leaf count"). Samples are only taken when
+                    the sampler gets the GIL, so the effective interval is
+                    at least the interpreter switch interval (5 ms) in pure
+                    Python code.
+    cprofile_stats  deterministic cProfile of the call; per-function call
+                    counts and own / cumulative time (no stacks).
+"""
+import collections
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+
+PROFILE_MODES = ("sample", "cprofile")
+MIN_SAMPLE_INTERVAL_S = 1e-4    # a shorter interval only spins the sampler thread
+
+
+class PhaseTimer:
+    """Wall time per named phase, accumulated over laps."""
+
+    def __init__(self):
+        self.totals = {}
+        self._last = time.perf_counter()
+
+    def start(self):
+        """Restart the current lap (time since the last lap is discarded)."""
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def breakdown(self, steps=None):
+        """{"total_s", "steps", "phases": {name: {"s", "share", "us_per_step"}}}."""
+        total = sum(self.totals.values())
+        phases = {}
+        for name, seconds in self.totals.items():
+            phases[name] = {"s": seconds, "share": seconds / total if total else 0.0}
+            if steps:
+                phases[name]["us_per_step"] = 1e6 * seconds / steps
+        return {"total_s": total, "steps": steps, "phases": phases}
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(func, *args, interval=0.001, **kwargs):
+    """
+    Calls func(*args, **kwargs) while sampling its stack; returns
+    (result, {folded stack: samples}). Frames above this call are cut off.
+    Raises ValueError for an interval below MIN_SAMPLE_INTERVAL_S.
+    """
+    if not interval >= MIN_SAMPLE_INTERVAL_S:
+        raise ValueError(f"The sampling interval must be at least {MIN_SAMPLE_INTERVAL_S * 1e3} ms, "
+                         f"got {interval * 1e3} ms")
+    target = threading.get_ident()
+    root = sample_stacks.__code__
+    counts = collections.Counter()
+    stop = threading.Event()
+
+    def sampler():
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None and frame.f_code is not root:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                counts[";".join(reversed(stack))] += 1
+
+    thread = threading.Thread(target=sampler, daemon=True)
+    thread.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        stop.set()
+        thread.join()
+    return result, dict(counts)
+
+
+def folded(counts):
+    """flamegraph.pl / speedscope input text of sample_stacks counts."""
+    return "\n".join(f"{stack} {n}" for stack, n in sorted(counts.items()))
+
+
+def cprofile_stats(func, *args, top=40, **kwargs):
+    """Calls func under cProfile; returns (result, the `top` functions by cumulative time)."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "own_s": own,
+            "cumulative_s": cumulative,
+        })
+    rows.sort(key=lambda row: row["cumulative_s"], reverse=True)
+    return result, rows[:top]
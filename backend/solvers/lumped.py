@@ -0,0 +1,278 @@
+# backend-python/solvers/lumped.py
+"""
+0-D lumped-parameter model of the artery_sim_full segment.
+
+The 1-D segment is lumped into an L-network driven by the same inlet
+pressure waveform, loaded by the same 4-element Windkessel:
+
+    p_in --- R_v --- L_v ---+--- Lint --- Rp ---+------+
+                            |                   |      |
+                           C_v                 Cw      Rd
+                            |                   |      |
+                           ---                 ---    ---
+
+    L_v = rho L / A_ref     (from Q_t + (A_ref/rho) P_z = -delta Q)
+    R_v = delta L_v
+    C_v = L / alpha         (from A_t + Q_z = 0 with P = alpha A)
+
+The Windkessel branch is exactly the outlet ODE of artery_sim_full:
+    P' + P/(Rd Cw) = Lint Q'' + (Rp + Lint/(Rd Cw)) Q' + (1/Cw + Rp/(Rd Cw)) Q
+
+State x = [Q_v, P_out, Q_out, P_c] (pressures are perturbations about
+P_ref); with Lint = 0 the Q_out state drops out, Q_out = (P_out - P_c)/Rp,
+and the ODE has the three other states (the RC Windkessel). The linear
+ODE x' = A x + B p_in(t) is advanced with its exact discretization for a
+piecewise-linear input (augmented matrix exponential), so a large step
+(T_heart / 2000) is stable despite the stiff Lint/Rp branch.
+
+Uses:
+    run_lumped              outlet pressure/flow, thousands of times cheaper
+                            than the 1-D run
+    periodic_state          periodic steady state via (I - Phi^N) x0 = psi
+    initial_state_1d        1-D fields near periodic steady state
+    calibrate_windkessel    Rp, Rd, Cw fitted to an outlet pressure waveform
+"""
+import numpy as np
+
+from simulations.artery_sim_full import (
+    artery_parameters,
+    inlet_pressure,
+    mmHg_to_Pa,
+)
+
+
+def lumped_parameters(**params):
+    """Lumped vessel elements R_v, L_v, C_v plus the artery parameters they come from."""
+    prm = artery_parameters(**params)
+    prm["L_v"] = prm["rho"] * prm["L"] / prm["A_ref"]
+    prm["R_v"] = prm["delta"] * prm["L_v"]
+    prm["C_v"] = prm["L"] / prm["alpha"]
+    return prm
+
+
+def system_matrices(prm):
+    """
+    A, B of x' = A x + B p_in for x = [Q_v, P_out, Q_out, P_c], or for
+    x = [Q_v, P_out, P_c] when Lint = 0 (see _full_state).
+    """
+    L_v, R_v, C_v = prm["L_v"], prm["R_v"], prm["C_v"]
+    Rp, Rd, Cw, Lint = prm["Rp"], prm["Rd"], prm["Cw"], prm["Lint"]
+
+    if Lint == 0:
+        A = np.array([
+            [-R_v / L_v, -1.0 / L_v, 0.0],
+            [1.0 / C_v, -1.0 / (Rp * C_v), 1.0 / (Rp * C_v)],
+            [0.0, 1.0 / (Rp * Cw), -1.0 / (Rp * Cw) - 1.0 / (Rd * Cw)],
+        ])
+        return A, np.array([1.0 / L_v, 0.0, 0.0])
+
+    A = np.array([
+        [-R_v / L_v, -1.0 / L_v, 0.0, 0.0],
+        [1.0 / C_v, 0.0, -1.0 / C_v, 0.0],
+        [0.0, 1.0 / Lint, -Rp / Lint, -1.0 / Lint],
+        [0.0, 0.0, 1.0 / Cw, -1.0 / (Rd * Cw)],
+    ])
+    B = np.array([1.0 / L_v, 0.0, 0.0, 0.0])
+    return A, B
+
+
+def _states(prm):
+    """Indices in [Q_v, P_out, Q_out, P_c] of the states of system_matrices(prm)."""
+    return [0, 1, 3] if prm["Lint"] == 0 else [0, 1, 2, 3]
+
+
+def _full_state(prm, X):
+    """States of system_matrices(prm) (last axis) as [Q_v, P_out, Q_out, P_c]."""
+    if X.shape[-1] == 4:
+        return X
+    Q_out = (X[..., 1] - X[..., 2]) / prm["Rp"]
+    return np.insert(X, 2, Q_out, axis=-1)
+
+
+def _balance(M):
+    """
+    Diagonal similarity D^-1 M D (powers of two, Parlett–Reinsch) that
+    equalizes row and column norms. Flows (~1e-6 m^3/s) and pressures
+    (~1e3 Pa) make the raw matrix badly scaled for the exponential.
+    """
+    B = M.copy()
+    d = np.ones(len(M))
+    converged = False
+    while not converged:
+        converged = True
+        for i in range(len(B)):
+            c = np.sum(np.abs(B[:, i])) - abs(B[i, i])
+            r = np.sum(np.abs(B[i, :])) - abs(B[i, i])
+            if c == 0 or r == 0:
+                continue
+            f = 2.0 ** np.round(0.5 * np.log2(r / c))
+            if f != 1.0 and (c * f + r / f) < 0.95 * (c + r):
+                d[i] *= f
+                B[:, i] *= f
+                B[i, :] /= f
+                converged = False
+    return B, d
+
+
+def _expm(M):
+    """Matrix exponential by balancing, scaling and squaring with a Taylor series."""
+    B, d = _balance(M)
+    norm = np.max(np.sum(np.abs(B), axis=1))
+    s = max(0, int(np.ceil(np.log2(norm / 0.5)))) if norm > 0 else 0
+    X = B / 2.0**s
+
+    E = np.eye(len(M))
+    term = np.eye(len(M))
+    for k in range(1, 18):
+        term = term @ X / k
+        E = E + term
+    for _ in range(s):
+        E = E @ E
+    return d[:, None] * E / d[None, :]
+
+
+def discretize(A, B, dt):
+    """
+    Exact step for an input that is linear over [t_n, t_n + dt]:
+        x_{n+1} = Phi x_n + G0 u_n + G1 (u_{n+1} - u_n)
+    """
+    n = len(A)
+    M = np.zeros((n + 2, n + 2))
+    M[:n, :n] = A * dt
+    M[:n, n] = B * dt
+    M[n, n + 1] = 1.0
+    E = _expm(M)
+    return E[:n, :n], E[:n, n], E[:n, n + 1]
+
+
+def _simulate(prm, dt, Nt, x0):
+    """States x_0..x_Nt (as [Q_v, P_out, Q_out, P_c]) and the inlet perturbation at the same times."""
+    A, B = system_matrices(prm)
+    Phi, G0, G1 = discretize(A, B, dt)
+
+    t = dt * np.arange(Nt + 1)
+    p_in = inlet_pressure(t, prm["T_heart"]) - prm["P_ref"]
+
+    X = np.empty((Nt + 1, len(A)))
+    X[0] = np.asarray(x0)[_states(prm)]
+    for n in range(Nt):
+        X[n + 1] = Phi @ X[n] + G0 * p_in[n] + G1 * (p_in[n + 1] - p_in[n])
+    return t, p_in, _full_state(prm, X)
+
+
+def periodic_state(prm, steps_per_cycle=2000):
+    """State at t = 0 of the periodic steady state for the T_heart-periodic inlet."""
+    dt = prm["T_heart"] / steps_per_cycle
+    A, B = system_matrices(prm)
+    Phi, _, _ = discretize(A, B, dt)
+
+    _, _, X = _simulate(prm, dt, steps_per_cycle, np.zeros(4))
+    Phi_N = np.linalg.matrix_power(Phi, steps_per_cycle)
+    return _full_state(prm, np.linalg.solve(np.eye(len(Phi)) - Phi_N, X[-1, _states(prm)]))
+
+
+def run_lumped(steps_per_cycle=2000, periodic=False, **params):
+    """
+    Runs the 0-D model over the same window as artery_sim_full
+    (N_cycles heart periods, from rest unless periodic=True) and returns
+    its inlet/outlet signals in the artery_sim_full result format.
+    """
+    prm = lumped_parameters(**params)
+    dt = prm["T_heart"] / steps_per_cycle
+    Nt = int(round(prm["T_final"] / dt))
+    x0 = periodic_state(prm, steps_per_cycle) if periodic else np.zeros(4)
+
+    t, p_in, X = _simulate(prm, dt, Nt, x0)
+    P_ref, A_ref, alpha = prm["P_ref"], prm["A_ref"], prm["alpha"]
+
+    P_in = (P_ref + p_in) / mmHg_to_Pa
+    P_out = (P_ref + X[:, 1]) / mmHg_to_Pa
+
+    return {
+        "t": t[1:].tolist(),
+        "monitor_z": [0.0, prm["L"]],
+        "pressure_mmHg": [P_in[1:].tolist(), P_out[1:].tolist()],
+        "flow": [X[1:, 0].tolist(), X[1:, 2].tolist()],
+        "area": [(A_ref + p_in[1:] / alpha).tolist(), (A_ref + X[1:, 1] / alpha).tolist()],
+        "P_out_mmHg": P_out[1:].tolist(),
+        "Q_out": X[1:, 2].tolist(),
+        "P_wk_mmHg": P_out[1:].tolist(),
+        "fidelity": "0d",
+    }
+
+
+def initial_state_1d(steps_per_cycle=2000, **params):
+    """
+    Initial (A_tilde, Q_tilde, Q_out_hist) for artery_sim_full close to the
+    periodic steady state: area and flow interpolated linearly between the
+    0-D inlet and outlet values, and the Windkessel flow history taken from
+    the end of the periodic 0-D cycle at the 1-D time step.
+    """
+    prm = lumped_parameters(**params)
+    Nx, dt_1d, T = prm["Nx"], prm["dt"], prm["T_heart"]
+    dt = T / steps_per_cycle
+
+    x0 = periodic_state(prm, steps_per_cycle)
+    t, p_in, X = _simulate(prm, dt, steps_per_cycle, x0)
+
+    s = np.linspace(0.0, 1.0, Nx)
+    A_tilde = ((1 - s) * p_in[0] + s * x0[1]) / prm["alpha"]
+    Q_tilde = (1 - s) * x0[0] + s * x0[2]
+
+    # flows at -dt, -2dt, -3dt (one period back on the periodic orbit)
+    Q_out_hist = np.interp(T - dt_1d * np.arange(1, 4), t, X[:, 2])
+    return A_tilde, Q_tilde, Q_out_hist
+
+
+def calibrate_windkessel(t_meas, P_meas, names=("Rp", "Rd", "Cw"), params0=None,
+                         steps_per_cycle=2000, max_iter=50, tol=1e-10):
+    """
+    Fits Windkessel parameters so the periodic 0-D outlet pressure matches
+    a measured waveform (t_meas within one heart period, P_meas in mmHg).
+
+    Levenberg–Marquardt on log-parameters with a finite-difference
+    Jacobian; each residual costs one 0-D cycle. Returns the full parameter
+    dict, ready to pass to run_artery_simulation(**params).
+    """
+    params = dict(params0 or {})
+    names = list(names)
+    u = np.log([float(lumped_parameters(**params)[k]) for k in names])
+    P_meas = np.asarray(P_meas, dtype=float)
+
+    def residual(u):
+        p = {**params, **dict(zip(names, np.exp(u)))}
+        prm = lumped_parameters(**p)
+        dt = prm["T_heart"] / steps_per_cycle
+        t, _, X = _simulate(prm, dt, steps_per_cycle, periodic_state(prm, steps_per_cycle))
+        P_out = (prm["P_ref"] + X[:, 1]) / mmHg_to_Pa
+        return np.interp(np.mod(t_meas, prm["T_heart"]), t, P_out) - P_meas
+
+    r = residual(u)
+    lam = 1e-3
+    for _ in range(max_iter):
+        J = np.empty((len(r), len(u)))
+        for j in range(len(u)):
+            du = np.zeros(len(u))
+            du[j] = 1e-5
+            J[:, j] = (residual(u + du) - r) / 1e-5
+
+        g = J.T @ r
+        H = J.T @ J
+        while True:
+            step = np.linalg.solve(H + lam * np.diag(np.diag(H) + 1e-30), -g)
+            r_new = residual(u + step)
+            if r_new @ r_new < r @ r:
+                lam = max(lam / 3, 1e-12)
+                break
+            lam *= 4
+            if lam > 1e12:
+                step = np.zeros(len(u))
+                r_new = r
+                break
+
+        improvement = r @ r - r_new @ r_new
+        u, r = u + step, r_new
+        if improvement <= tol * max(r @ r, 1e-30) or not np.any(step):
+            break
+
+    return {**params, **dict(zip(names, np.exp(u).tolist()))}
@@ -0,0 +1,151 @@
+# backend-python/solvers/manifest.py
+"""
+Typed simulation manifests.
+
+Every module in simulations/ declares a MANIFEST next to its
+run_simulation(): the tunable parameters (type, default, range, unit), the
+output arrays with their shapes in terms of named dimensions, and the
+numerics() hook that solvers/stability.py turns into a cost estimate.
+
+The API uses it instead of inspecting function signatures:
+    validate      coerce query strings, fill defaults, reject unknown or
+                  out-of-range values (ValueError)
+    cache_key     stable hash of (simulation, version, validated params)
+    cost          estimated wall time [s] of a run
+    output_shapes array shapes of a run, to pre-size buffers
+    to_dict       JSON description served at /manifest/{name}
+"""
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Parameter:
+    name: str
+    default: float
+    minimum: float | None = None
+    maximum: float | None = None
+    unit: str = ""
+    kind: type = float
+    description: str = ""
+    choices: tuple | None = None        # allowed values, when not every number in range is
+
+    def coerce(self, value):
+        """value as self.kind, range-checked; raises ValueError."""
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{self.name} must be a number, got {value!r}")
+        if not math.isfinite(number):
+            raise ValueError(f"{self.name} must be finite")
+        if self.kind is int:
+            if number != int(number):
+                raise ValueError(f"{self.name} must be an integer, got {value!r}")
+            number = int(number)
+
+        if self.minimum is not None and number < self.minimum:
+            raise ValueError(f"{self.name} = {number} is below the minimum {self.minimum}")
+        if self.maximum is not None and number > self.maximum:
+            raise ValueError(f"{self.name} = {number} is above the maximum {self.maximum}")
+        if self.choices is not None and number not in self.choices:
+            raise ValueError(f"{self.name} = {number} is not one of {list(self.choices)}")
+        return number
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "type": self.kind.__name__,
+            "default": self.default,
+            "min": self.minimum,
+            "max": self.maximum,
+            "unit": self.unit,
+            "description": self.description,
+            "choices": None if self.choices is None else list(self.choices),
+        }
+
+
+@dataclass(frozen=True)
+class Output:
+    name: str
+    shape: tuple        # ints or dimension names resolved by Manifest.dims
+    unit: str = ""
+    description: str = ""
+
+    def to_dict(self):
+        return {"name": self.name, "shape": list(self.shape), "unit": self.unit,
+                "description": self.description}
+
+
+@dataclass(frozen=True)
+class Manifest:
+    name: str
+    parameters: tuple = ()
+    outputs: tuple = ()
+    dims: Callable | None = None        # params -> {dimension: size}
+    numerics: Callable | None = None    # params -> numerics dict (solvers/stability.py)
+    version: int = 1                    # bump when results change for equal params
+    description: str = ""
+    _index: dict = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_index", {p.name: p for p in self.parameters})
+
+    def defaults(self):
+        return {p.name: p.default for p in self.parameters}
+
+    def validate(self, params=None):
+        """
+        Full parameter set (defaults filled in) for a request; None values
+        count as absent. Raises ValueError on unknown or invalid parameters.
+        """
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        unknown = set(params) - set(self._index)
+        if unknown:
+            accepted = ", ".join(self._index) or "none"
+            raise ValueError(
+                f"Simulation '{self.name}' does not accept {sorted(unknown)} (accepted: {accepted})"
+            )
+        full = self.defaults()
+        for key, value in params.items():
+            full[key] = self._index[key].coerce(value)
+        return full
+
+    def cache_key(self, params=None):
+        """sha256 of the simulation, manifest version and validated parameters."""
+        payload = {"simulation": self.name, "version": self.version,
+                   "params": self.validate(params)}
+        text = json.dumps(payload, sort_keys=True, default=repr)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def estimate(self, params=None, step_cost_s=None):
+        """solvers/stability.py estimate of a run, or None without numerics."""
+        if self.numerics is None:
+            return None
+        from solvers.stability import estimate
+
+        return estimate(self.numerics(**self.validate(params)), step_cost_s)
+
+    def cost(self, params=None, step_cost_s=None):
+        """Estimated wall time [s] of a run (None when unknown)."""
+        est = self.estimate(params, step_cost_s)
+        return None if est is None else est["wall_time_s"]
+
+    def output_shapes(self, params=None):
+        """{output name: shape tuple} for a run with these parameters."""
+        dims = self.dims(**self.validate(params)) if self.dims else {}
+        return {
+            out.name: tuple(dims[d] if isinstance(d, str) else d for d in out.shape)
+            for out in self.outputs
+        }
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "version": self.version,
+            "description": self.description,
+            "parameters": [p.to_dict() for p in self.parameters],
+            "outputs": [o.to_dict() for o in self.outputs],
+        }
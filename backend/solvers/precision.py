@@ -0,0 +1,46 @@
+# backend-python/solvers/precision.py
+"""
+Precision modes for the solvers.
+
+    float64   reference: state, boundary models and output in double precision
+    mixed     float32 state and output; quantities that accumulate many small
+              increments (time, the Windkessel outlet ODE) stay float64
+    float32   everything the step touches in single precision
+
+The perturbation fields are small and smooth, so float32 state costs little
+accuracy while halving the memory traffic of every step and the size of
+stored histories. analysis/precision.py measures the error per simulation.
+
+to_list() turns float32 output into JSON-ready lists of the shortest
+decimals that round-trip in float32 (about 9 characters instead of 18), so
+the payload shrinks with the arrays.
+"""
+import numpy as np
+
+PRECISIONS = ("float64", "mixed", "float32")
+
+
+def check(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}' (expected one of {PRECISIONS})")
+    return precision
+
+
+def state_dtype(precision):
+    """dtype of the solver state (and of the output) for a precision mode."""
+    return np.dtype(np.float64 if check(precision) == "float64" else np.float32)
+
+
+def accumulator_dtype(precision):
+    """dtype of long-running accumulators (ODE states, time) for a precision mode."""
+    return np.dtype(np.float32 if check(precision) == "float32" else np.float64)
+
+
+def to_list(a):
+    """a.tolist(), with float32 values written as their shortest float32 decimal."""
+    a = np.asarray(a)
+    if a.dtype != np.float32:
+        return a.tolist()
+    if a.ndim == 0:
+        return float(str(a))
+    return np.frompyfunc(float, 1, 1)(a.astype(str)).tolist()
@@ -0,0 +1,113 @@
+# backend-python/solvers/progress.py
+"""
+Cooperative progress reporting and cancellation for the time loops.
+
+A run_simulation that takes progress=None calls progress.start(steps) once
+and progress.update(step) after each time step (guarded by `if progress is
+not None`). update() records the step and raises Cancelled when cancel()
+has been called from another thread, so a cancelled run stops within one
+step and frees its worker. Loops that hand the run to a compiled kernel
+(the fused kernel of solvers/backends.py) call it over chunks of steps and
+update between them.
+
+With cpu_budget_s set, update() also raises BudgetExceeded once the run
+has used that much CPU time in its loops; the clock is read every
+BUDGET_CHECK_STEPS steps. CPU time is per thread and the loops of one run
+(e.g. the levels of a progressive request) may run on different threads,
+so it is summed over the segments from each start() or budget check to the
+next check in the same thread.
+"""
+import threading
+import time
+
+STATES = ("pending", "running", "done", "cancelled", "failed")
+BUDGET_CHECK_STEPS = 64
+
+
+class Cancelled(Exception):
+    """Raised in the time loop of a cancelled run."""
+
+
+class BudgetExceeded(Cancelled):
+    """Raised in the time loop of a run over its CPU-time budget."""
+
+
+class Progress:
+    """Step counter, timing and cancel flag of one run."""
+
+    def __init__(self, label=None, cpu_budget_s=None):
+        self.label = label
+        self.cpu_budget_s = cpu_budget_s
+        self.cpu_s = 0.0
+        self._marks = {}        # thread: its CPU time at its last start() or budget check
+        self.state = "pending"
+        self.steps = None
+        self.step = 0
+        self.started = None
+        self.finished = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def start(self, steps):
+        """Begin (or, for a run in several loops, restart) counting `steps` steps."""
+        self.steps, self.step = int(steps), 0
+        if self.started is None:
+            self.started = time.monotonic()
+        with self._lock:
+            self._marks[threading.get_ident()] = time.thread_time()
+        self.state = "running"
+        if self.cancelled:
+            raise Cancelled(self.label)
+
+    def update(self, step):
+        self.step = step
+        if self.cancelled:
+            raise Cancelled(self.label)
+        if self.cpu_budget_s is not None and step % BUDGET_CHECK_STEPS == 0 \
+                and self._charge() > self.cpu_budget_s:
+            self.cancelled = True
+            raise BudgetExceeded(f"CPU-time budget of {self.cpu_budget_s:.0f} s exceeded")
+
+    def _charge(self):
+        # add the calling thread's CPU time since its last start() or check to cpu_s
+        thread, now = threading.get_ident(), time.thread_time()
+        with self._lock:
+            if thread in self._marks:
+                self.cpu_s += now - self._marks[thread]
+            self._marks[thread] = now
+            return self.cpu_s
+
+    def cancel(self):
+        """Ask the run to stop at its next step; False when it has already ended."""
+        with self._lock:
+            if self.state in ("done", "cancelled", "failed"):
+                return False
+            self.cancelled = True
+            return True
+
+    def finish(self, state="done"):
+        with self._lock:
+            self.state = "cancelled" if self.cancelled and state != "done" else state
+            self.finished = time.monotonic()
+
+    def snapshot(self):
+        """State, steps, fraction done, elapsed seconds and ETA (None when unknown)."""
+        now = self.finished or time.monotonic()
+        elapsed = now - self.started if self.started is not None else 0.0
+        fraction = self.step / self.steps if self.steps else 0.0
+        if self.state == "done":
+            fraction = 1.0
+        eta = None
+        if self.state == "running" and fraction > 0.0:
+            eta = elapsed * (1.0 - fraction) / fraction
+        return {
+            "label": self.label,
+            "state": self.state,
+            "step": self.step,
+            "steps": self.steps,
+            "fraction": fraction,
+            "elapsed_s": elapsed,
+            "eta_s": eta,
+            "cpu_s": self.cpu_s,
+            "cancel_requested": self.cancelled,
+        }
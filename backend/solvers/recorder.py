@@ -0,0 +1,222 @@
+# backend-python/solvers/recorder.py
+"""
+Preallocated time-series recorder for solver monitors.
+
+Appending one Python float per channel and step to lists, and converting
+them at the end, costs more than a vectorized stencil update of a small
+grid. Recorder keeps NumPy buffers sized up front from the decimation
+policy, and writes a frame only when the policy keeps the step.
+
+Policies (which steps become frames):
+    EveryN(n)                 every n-th step plus the final one
+    EveryDT(interval)         at most one frame per `interval` of model time
+    Adaptive(channel, ...)    when the channel changed by more than
+                              atol + rtol |last kept value|, or after max_gap steps
+
+With envelope=True every step also updates a running min/max per channel,
+stored with each frame for the interval since the previous frame, so a
+decimated series still carries every peak. needs(step) tells a solver loop
+whether a step has to be offered at all, so plain EveryN recording costs
+nothing between frames. With ring=True only the last
+`capacity` frames are kept (e.g. the last heart cycle of a long run).
+"""
+import math
+
+import numpy as np
+
+
+class EveryN:
+    """Keep steps 0, n, 2n, ... and the final step."""
+
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError("EveryN needs n >= 1")
+        self.n = int(n)
+        self.last = None
+
+    def start(self, n_steps, t_end=None):
+        self.last = n_steps - 1
+
+    def capacity(self, n_steps, t_end=None):
+        return -(-n_steps // self.n) + 1
+
+    def needs(self, step):
+        return step % self.n == 0 or step == self.last
+
+    def keep(self, step, t, values):
+        return step % self.n == 0 or step == self.last
+
+
+class EveryDT:
+    """Keep the first step at or after each multiple of `interval` (model time), and the final step."""
+
+    def __init__(self, interval):
+        if interval <= 0:
+            raise ValueError("EveryDT needs a positive interval")
+        self.interval = float(interval)
+        self.next_t = 0.0
+        self.last = None
+
+    def start(self, n_steps, t_end=None):
+        self.next_t = -math.inf
+        self.last = n_steps - 1
+
+    def capacity(self, n_steps, t_end=None):
+        if t_end is None:
+            return n_steps
+        return min(n_steps, int(math.ceil(t_end / self.interval)) + 2)
+
+    def needs(self, step):
+        return True
+
+    def keep(self, step, t, values):
+        if t >= self.next_t or step == self.last:
+            base = t if self.next_t == -math.inf else self.next_t
+            self.next_t = base + self.interval * max(1, math.floor((t - base) / self.interval) + 1)
+            return True
+        return False
+
+
+class Adaptive:
+    """
+    Keep a step when `channel` moved by more than atol + rtol |last kept|
+    in any component, or max_gap steps after the last frame.
+    """
+
+    def __init__(self, channel, rtol=1e-3, atol=0.0, max_gap=100):
+        self.channel = channel
+        self.rtol, self.atol = rtol, atol
+        self.max_gap = int(max_gap)
+        self.ref = None
+        self.last_step = None
+        self.last = None
+
+    def start(self, n_steps, t_end=None):
+        self.ref = None
+        self.last_step = None
+        self.last = n_steps - 1
+
+    def capacity(self, n_steps, t_end=None):
+        # a first guess only: Recorder grows the buffers if the signal is busy
+        return -(-n_steps // self.max_gap) + 2
+
+    def needs(self, step):
+        return True
+
+    def keep(self, step, t, values):
+        v = values[self.channel]
+        keep = (self.ref is None or step == self.last
+                or step - self.last_step >= self.max_gap
+                or np.any(np.abs(v - self.ref) > self.atol + self.rtol * np.abs(self.ref)))
+        if keep:
+            if self.ref is None:
+                self.ref = np.array(v, dtype=float)
+            else:
+                self.ref[...] = v
+            self.last_step = step
+        return keep
+
+
+class Recorder:
+    """
+    Decimated recording of named channels.
+
+    channels : {name: sample shape}, e.g. {"A": (3,), "P_out": ()}
+    policy   : EveryN / EveryDT / Adaptive instance
+    n_steps  : steps the solver will take (sizes the buffers)
+    t_end    : final model time, for time-based capacity
+    """
+
+    def __init__(self, channels, policy, n_steps, t_end=None, envelope=False,
+                 ring=False, capacity=None, dtype=float):
+        self.policy = policy
+        self.policy.start(n_steps, t_end)
+        self.channels = {name: tuple(np.atleast_1d(shape)) if shape != () else ()
+                         for name, shape in channels.items()}
+        self.capacity = int(capacity or policy.capacity(n_steps, t_end))
+        self.ring = ring
+        self.envelope = envelope
+        self.count = 0          # frames written (including overwritten ones in ring mode)
+
+        self._t = np.empty(self.capacity)
+        self._step = np.empty(self.capacity, dtype=np.int64)
+        self._data = {name: np.empty((self.capacity,) + shape, dtype)
+                      for name, shape in self.channels.items()}
+        if envelope:
+            self._lo = {name: np.empty_like(buf) for name, buf in self._data.items()}
+            self._hi = {name: np.empty_like(buf) for name, buf in self._data.items()}
+            self._run_lo = {name: np.full(shape, np.inf, dtype) for name, shape in self.channels.items()}
+            self._run_hi = {name: np.full(shape, -np.inf, dtype) for name, shape in self.channels.items()}
+
+    def needs(self, step):
+        """
+        Whether record() must see this step's values. Loops that gather their
+        channels from a larger state can skip the gather when it is False.
+        """
+        return self.envelope or self.policy.needs(step)
+
+    def record(self, step, t, **values):
+        """Offer one step's channel values; they are copied only if the policy keeps the step."""
+        if self.envelope:
+            for name, v in values.items():
+                np.minimum(self._run_lo[name], v, out=self._run_lo[name])
+                np.maximum(self._run_hi[name], v, out=self._run_hi[name])
+        if self.policy.keep(step, t, values):
+            self._write(step, t, values)
+
+    def _write(self, step, t, values):
+        if self.count >= self.capacity and not self.ring:
+            self._grow()
+        i = self.count % self.capacity
+        self._t[i] = t
+        self._step[i] = step
+        for name, v in values.items():
+            self._data[name][i] = v
+        if self.envelope:
+            for name in values:
+                self._lo[name][i] = self._run_lo[name]
+                self._hi[name][i] = self._run_hi[name]
+                self._run_lo[name].fill(np.inf)
+                self._run_hi[name].fill(-np.inf)
+        self.count += 1
+
+    def _grow(self):
+        self.capacity *= 2
+
+        def grown(a):
+            b = np.empty((self.capacity,) + a.shape[1:], a.dtype)
+            b[:len(a)] = a
+            return b
+
+        self._t, self._step = grown(self._t), grown(self._step)
+        self._data = {k: grown(v) for k, v in self._data.items()}
+        if self.envelope:
+            self._lo = {k: grown(v) for k, v in self._lo.items()}
+            self._hi = {k: grown(v) for k, v in self._hi.items()}
+
+    # ---------- read-out (chronological order) ----------
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _ordered(self, buf):
+        n = len(self)
+        if self.ring and self.count > self.capacity:
+            start = self.count % self.capacity
+            return np.concatenate([buf[start:], buf[:start]])
+        return buf[:n]
+
+    def times(self):
+        return self._ordered(self._t)
+
+    def steps(self):
+        return self._ordered(self._step)
+
+    def series(self, name):
+        """Recorded samples of a channel, shape (frames,) + sample shape."""
+        return self._ordered(self._data[name])
+
+    def envelope_of(self, name):
+        """(min, max) of a channel over each frame's interval, same shape as series(name)."""
+        if not self.envelope:
+            raise ValueError("Recorder was created without envelope=True")
+        return self._ordered(self._lo[name]), self._ordered(self._hi[name])
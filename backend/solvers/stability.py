@@ -0,0 +1,140 @@
+# backend-python/solvers/stability.py
+"""
+Cheap a-priori stability and cost estimates for the 1-D schemes.
+
+All solvers in simulations/ discretize the damped linear wave system
+
+    A_t + Q_z = 0
+    Q_t + c^2 A_z = -delta Q
+
+so a Fourier mode w_j = w_hat exp(i j theta) is advanced by a 2x2
+amplification matrix G(theta). Its largest eigenvalue modulus over theta is
+the von Neumann amplification factor: > 1 means the run will blow up,
+whatever the CFL number printed by the script says.
+
+Schemes:
+    maccormack     forward-difference predictor, backward-difference corrector
+    lax_wendroff   one-step (or Richtmyer two-step, identical when linear)
+    compact_rk4    fourth-order Padé derivatives, classical RK4 (solvers/highorder.py)
+    characteristics  shifted Riemann invariants with cubic interpolation and
+                   split exact damping (solvers/characteristics.py); stable at any CFL
+
+estimate() combines this with the step count, grid size and stored output
+into a wall-time and peak-memory estimate for a run.
+"""
+import numpy as np
+
+from solvers.characteristics import shift_weights
+
+SCHEMES = ("maccormack", "lax_wendroff", "compact_rk4", "characteristics")
+# compact_rk4: RK4 reaches 2 sqrt(2) on the imaginary axis, the Padé
+# derivative's largest modified wavenumber is sqrt(3) / dz
+CFL_LIMIT = {"maccormack": 1.0, "lax_wendroff": 1.0, "compact_rk4": 2.0 * np.sqrt(2.0 / 3.0),
+             "characteristics": np.inf}
+
+_THETA = np.linspace(0.0, np.pi, 721)
+
+# wall-time model when nothing has been measured yet: a vectorized step costs
+# a fixed interpreter/numpy overhead plus a per-cell amount
+STEP_OVERHEAD_S = 3.0e-5
+CELL_COST_S = 5.0e-8
+
+# bytes per stored output value: float64 in the array, the Python float in
+# the .tolist() payload and its JSON text
+BYTES_PER_OUTPUT_VALUE = 8 + 32 + 20
+# solver work arrays per field (state, predictor, fluxes, temporaries)
+WORK_ARRAYS_PER_FIELD = 12
+
+
+def amplification_matrix(scheme, c, dt, dz, delta=0.0, theta=_THETA):
+    """G(theta), shape (len(theta), 2, 2), for the state w = [A, Q]."""
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unknown scheme '{scheme}' (expected one of {SCHEMES})")
+
+    theta = np.asarray(theta, dtype=float)
+    I = np.eye(2)
+    K = np.array([[0.0, 1.0], [c**2, 0.0]])          # flux Jacobian
+    S = np.array([[0.0, 0.0], [0.0, delta]])          # damping
+    r = dt / dz
+
+    if scheme == "maccormack":
+        d_fwd = (np.exp(1j * theta) - 1.0)[:, None, None]
+        d_bwd = (1.0 - np.exp(-1j * theta))[:, None, None]
+        pred = I - r * d_fwd * K - dt * S
+        corr = I - r * d_bwd * K - dt * S
+        return 0.5 * (I + corr @ pred)
+
+    if scheme == "compact_rk4":
+        kappa = (3.0 * np.sin(theta) / (2.0 + np.cos(theta)))[:, None, None]
+        Z = -r * 1j * kappa * K - dt * S
+        G = np.broadcast_to(I, Z.shape).astype(complex)
+        term = G.copy()
+        for j in range(1, 5):
+            term = term @ Z / j
+            G += term
+        return G
+
+    if scheme == "characteristics":
+        # W = P [A, Q]: W+ is shifted right, W- left by the same stencil
+        m, w = shift_weights(c * dt / dz)
+        g = sum(wk * np.exp(1j * (k - m - 2) * theta) for k, wk in enumerate(w))
+        P = np.array([[c, 1.0], [-c, 1.0]])
+        T = np.zeros((len(theta), 2, 2), dtype=complex)
+        T[:, 0, 0], T[:, 1, 1] = g, np.conj(g)
+        D = np.diag([1.0, np.exp(-0.5 * delta * dt)])
+        return D @ np.linalg.inv(P) @ T @ P @ D
+
+    d1 = (1j * np.sin(theta))[:, None, None]
+    d2 = (-4.0 * np.sin(theta / 2.0)**2)[:, None, None]
+    return I - r * d1 * K + 0.5 * r**2 * d2 * (K @ K) - dt * S
+
+
+def max_amplification(scheme, c, dt, dz, delta=0.0):
+    """von Neumann amplification factor max_theta rho(G(theta))."""
+    G = amplification_matrix(scheme, c, dt, dz, delta)
+    return float(np.max(np.abs(np.linalg.eigvals(G))))
+
+
+def require_stable(scheme, c, dt, dz, delta=0.0, tol=1e-12):
+    """Raises ValueError when the scheme is unstable for these numerics."""
+    cfl = c * dt / dz
+    g = max_amplification(scheme, c, dt, dz, delta)
+    if g > 1.0 + tol:
+        raise ValueError(
+            f"{scheme} is unstable: CFL = {cfl:.3f} (limit {CFL_LIMIT[scheme]}), "
+            f"amplification factor = {g:.6f} > 1"
+        )
+    return cfl, g
+
+
+def estimate(numerics, step_cost_s=None):
+    """
+    Pre-flight estimate for one run described by a simulation's numerics()
+    dict (scheme, c, dt, dz, delta, Nt, Nx, n_fields, n_output_values).
+    step_cost_s overrides the default per-step wall-time model, e.g. with a
+    value measured on earlier runs.
+    """
+    scheme, c, dt, dz = numerics["scheme"], numerics["c"], numerics["dt"], numerics["dz"]
+    delta = numerics.get("delta", 0.0)
+    Nt, Nx = int(numerics["Nt"]), int(numerics["Nx"])
+    n_fields = numerics.get("n_fields", 2)
+
+    cfl = float(c * dt / dz)
+    g = max_amplification(scheme, c, dt, dz, delta)
+    if step_cost_s is None:
+        step_cost_s = STEP_OVERHEAD_S + CELL_COST_S * Nx * n_fields
+
+    work_bytes = WORK_ARRAYS_PER_FIELD * n_fields * Nx * 8
+    output_bytes = BYTES_PER_OUTPUT_VALUE * int(numerics.get("n_output_values", 0))
+
+    return {
+        "scheme": scheme,
+        "cfl": cfl,
+        "cfl_limit": CFL_LIMIT[scheme] if np.isfinite(CFL_LIMIT[scheme]) else None,
+        "amplification": g,
+        "stable": g <= 1.0 + 1e-12,
+        "steps": Nt,
+        "cells": Nx,
+        "wall_time_s": Nt * step_cost_s,
+        "peak_memory_mb": (work_bytes + output_bytes) / 2**20,
+    }
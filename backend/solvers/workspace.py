@@ -0,0 +1,64 @@
+# backend-python/solvers/workspace.py
+"""
+Preallocated solver workspace.
+
+A time-stepping loop that builds its predictor, corrector and flux arrays
+with .copy(), np.zeros or arithmetic temporaries allocates several
+field-sized arrays per step. Over hundreds of thousands of steps that is
+mostly allocator and garbage-collector work, and the fresh arrays keep
+leaving the cache.
+
+Workspace holds everything once:
+    cur / nxt   ping-pong pair per state field: a kernel reads cur,
+                writes nxt (numpy ufuncs with out=), then swap() flips them
+    tmp         named scratch arrays of the same shape (predictor states,
+                fluxes, differences); kernels that need a shorter array
+                (one-sided differences, half-step values) use a slice
+
+Arrays keep the field shape given at construction, (N,) or batched
+(N, k), so the same kernel advances a single run or a batch of columns.
+"""
+import numpy as np
+
+
+class Workspace:
+    """Ping-pong state buffers plus scratch arrays for one solver."""
+
+    def __init__(self, shape, fields=("A", "Q"), scratch=(), dtype=float):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.fields = tuple(fields)
+        self.cur = {f: np.zeros(self.shape, self.dtype) for f in self.fields}
+        self.nxt = {f: np.zeros(self.shape, self.dtype) for f in self.fields}
+        self.tmp = {name: np.zeros(self.shape, self.dtype) for name in scratch}
+
+    @classmethod
+    def for_state(cls, fields, scratch=(), dtype=None, **arrays):
+        """Workspace sized (and typed, unless dtype is given) after the arrays, loaded with them."""
+        first = np.asarray(arrays[fields[0]])
+        if dtype is None:
+            dtype = np.result_type(*arrays.values())
+        ws = cls(first.shape, fields, scratch, dtype)
+        ws.load(**arrays)
+        return ws
+
+    def load(self, **arrays):
+        """Copy arrays into the current buffers."""
+        for name, value in arrays.items():
+            self.cur[name][...] = value
+        return self
+
+    def swap(self):
+        """Make the freshly written buffers current."""
+        self.cur, self.nxt = self.nxt, self.cur
+
+    def state(self, copy=False):
+        """Current field arrays (views into the workspace unless copy=True)."""
+        if copy:
+            return tuple(self.cur[f].copy() for f in self.fields)
+        return tuple(self.cur[f] for f in self.fields)
+
+    @property
+    def nbytes(self):
+        arrays = list(self.cur.values()) + list(self.nxt.values()) + list(self.tmp.values())
+        return sum(a.nbytes for a in arrays)
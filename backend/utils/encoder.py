@@ -0,0 +1,100 @@
+# backend-python/utils/encoder.py
+"""
+Packed binary encoding of payloads holding many numeric arrays.
+
+    b"BFS1" | header length (uint32, little-endian) | JSON header | array data
+
+The JSON header is the payload with every numeric array (a numpy array, or
+a non-empty rectangular list of numbers) replaced by {"$array": i}, plus
+"arrays": for each i its dtype, shape, offset into the array data and size
+in bytes. Arrays are little-endian, C-ordered and start at multiples of
+ALIGN from the beginning of the array data, so a client views them in place
+(numpy.frombuffer, a JS Float64Array) instead of parsing decimal text.
+An array object appearing several times in the payload is stored once.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"BFS1"
+ALIGN = 8
+
+
+def _strip(value, arrays, seen):
+    # the JSON part of value; numeric arrays are appended to arrays
+    if isinstance(value, dict):
+        return {k: _strip(v, arrays, seen) for k, v in value.items()}
+    if isinstance(value, np.ndarray) and (value.ndim == 0 or value.size == 0) or isinstance(value, np.generic):
+        return value.tolist()
+    if isinstance(value, (list, tuple, np.ndarray)) and len(value):
+        if id(value) in seen:
+            return {"$array": seen[id(value)]}
+        try:
+            array = np.asarray(value)
+        except ValueError:              # ragged
+            array = None
+        if array is not None and array.dtype.kind in "biuf":
+            seen[id(value)] = len(arrays)
+            arrays.append(np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<")))
+            return {"$array": len(arrays) - 1}
+        return [_strip(v, arrays, seen) for v in value]
+    return value
+
+
+def pack(payload):
+    """payload (dicts, lists, numbers, strings, numpy arrays) as BFS1 bytes."""
+    arrays = []
+    body = _strip(payload, arrays, {})
+    table, offset = [], 0
+    for array in arrays:
+        offset += -offset % ALIGN
+        table.append({"dtype": array.dtype.str, "shape": list(array.shape),
+                      "offset": offset, "nbytes": array.nbytes})
+        offset += array.nbytes
+
+    header = json.dumps({"payload": body, "arrays": table}, separators=(",", ":")).encode()
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % ALIGN)      # aligns the array data
+    start = len(MAGIC) + 4 + len(header)
+    out = bytearray(start + offset)
+    out[:start] = MAGIC + struct.pack("<I", len(header)) + header
+    for array, entry in zip(arrays, table):
+        position = start + entry["offset"]
+        out[position:position + entry["nbytes"]] = array.tobytes()
+    return bytes(out)
+
+
+def _restore(value, arrays):
+    if isinstance(value, dict):
+        if value.keys() == {"$array"}:
+            return arrays[value["$array"]]
+        return {k: _restore(v, arrays) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_restore(v, arrays) for v in value]
+    return value
+
+
+def to_lists(payload):
+    """payload with its numpy arrays as (nested) lists, e.g. for a JSON response."""
+    if isinstance(payload, np.ndarray):
+        return payload.tolist()
+    if isinstance(payload, dict):
+        return {k: to_lists(v) for k, v in payload.items()}
+    if isinstance(payload, list):
+        return [to_lists(v) for v in payload]
+    return payload
+
+
+def unpack(data):
+    """The payload of BFS1 bytes, with read-only numpy arrays viewing data."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a BFS1 payload")
+    (length,) = struct.unpack_from("<I", data, len(MAGIC))
+    start = len(MAGIC) + 4 + length
+    header = json.loads(bytes(data[len(MAGIC) + 4:start]))
+    arrays = [
+        np.frombuffer(data, dtype=entry["dtype"], count=int(np.prod(entry["shape"])),
+                      offset=start + entry["offset"]).reshape(entry["shape"])
+        for entry in header["arrays"]
+    ]
+    return _restore(header["payload"], arrays)
@@ -31,18 +31,53 @@ let simData = null;
  * LOAD SIMULATION FROM BACKEND
  **********************************************/
 async function loadSimulation(params = {}) {
+    // progressive endpoint: NDJSON lines, a coarse "preview" (when the
+    // simulation can be coarsened) followed by the "full" result
     const query = new URLSearchParams(params).toString();
-    const endpoint = `${API_BASE}/simulation/${simName}` + (query ? `?${query}` : "");
+    const endpoint = `${API_BASE}/simulation-progressive/${simName}` + (query ? `?${query}` : "");
     console.log("Fetching:", endpoint);
 
     const res = await fetch(endpoint);
+    if (res.status === 429) {
+        // server busy: retry after its hint
+        const retryAfter = parseInt(res.headers.get("Retry-After") || "1");
+        timeLabel.textContent = `Server busy, retrying in ${retryAfter} s`;
+        setTimeout(() => loadSimulation(params), retryAfter * 1000);
+        return;
+    }
     if (!res.ok) {
         timeLabel.textContent = `Error loading ${simName}`;
         console.log(await res.text());
         return;
     }
 
-    simData = await res.json();
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = "";
+    while (true) {
+        const { value, done } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split("\n");
+        buffered = lines.pop();
+        for (const line of lines) {
+            if (!line.trim()) continue;
+            const level = JSON.parse(line);
+            if (level.error) {
+                timeLabel.textContent = `Error loading ${simName}`;
+                console.log(level.error);
+                return;
+            }
+            showLevel(level);
+        }
+        if (done) break;
+    }
+}
+
+function showLevel(level) {
+    // keep the slider at the same fraction of the run when the full result replaces the preview
+    const fraction = simData ? parseInt(timeSlider.value) / Math.max(simData.times.length - 1, 1) : 0;
+    simData = level.result;
+    console.log(`${simName}: ${level.level} (${level.cache}, ${level.elapsed_s.toFixed(2)} s)`);
 
     // Reset plotting state for a fresh simulation run
     drawFrame.ymin = undefined;
@@ -52,9 +87,9 @@ async function loadSimulation(params = {}) {
 
     timeSlider.min = 0;
     timeSlider.max = simData.times.length - 1;
-    timeSlider.value = 0;
+    timeSlider.value = Math.round(fraction * (simData.times.length - 1));
 
-    drawFrame(0);
+    drawFrame(parseInt(timeSlider.value));
     if (!loadSimulation.initialized) {
         timeSlider.addEventListener("input", () => {
             drawFrame(parseInt(timeSlider.value));